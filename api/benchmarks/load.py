@@ -0,0 +1,380 @@
+"""Load test of the API routers.
+
+Boots the app against its own throwaway database, seeded with Users, Companies, Shop Items and earned Achievements,
+and drives each scenario in-process through an ASGI transport, with a fixed number of clients sending requests
+concurrently. Reports the throughput and the p50, p95 and p99 latencies of each scenario, and writes them as JSON
+along with the commit they were measured on, so that runs can be compared across commits.
+
+Run from the `api` directory:
+
+    python -m benchmarks.load --requests 2000 --concurrency 20
+    python -m benchmarks.load --compare benchmarks/results/load-<commit>.json
+
+Each scenario sends `--requests` requests. The Companies are used in turn, so with no more requests than Companies,
+each of them is collected once and has its full day of Resources to harvest.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+# The app reads its configuration at import, so point it at a throwaway database first
+_workdir: Path = Path(tempfile.mkdtemp(prefix="exoplanets-bench-"))
+os.environ["DATABASE"] = f"sqlite:///{_workdir.joinpath('bench.sqlite')}"
+os.environ["HARVEST_SCHEDULER"] = "false"
+
+from httpx import ASGITransport, AsyncClient, Response  # noqa: E402
+from sqlmodel import Session, insert, select  # noqa: E402
+from src.achievement_engine import LEVEL_ACHIEVEMENTS  # noqa: E402
+from src.classes.achievements import award_achievements  # noqa: E402
+from src.db import engine  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models import Achievement, Company, ShopItem, User  # noqa: E402
+
+RESULTS_DIR: Path = Path(__file__).parent.joinpath("results")
+PAGE_SIZE: int = 50
+STARTING_NETWORTH: float = 1_000_000_000.0
+ITEM_STOCK: int = 1_000_000_000
+
+type Request = Callable[[AsyncClient, int], Awaitable[Response]]
+
+
+class Scenario:
+    """Requests of the same kind, the `i`-th one being sent by `request(client, i)`."""
+
+    def __init__(self, name: str, request: Request, expected: int = 200) -> None:
+        self.name: str = name
+        self.request: Request = request
+        # Status code of the requests that succeed
+        self.expected: int = expected
+
+
+class Seed:
+    """What the database is seeded with, for the scenarios to pick from."""
+
+    def __init__(self, companies: int, items: int) -> None:
+        self.companies: int = companies
+        self.items: int = items
+        self.item_ids: list[int] = []
+        # Cursor of each page of the Companies, to request pages deep in the list
+        self.cursors: list[str] = []
+
+    def owner(self, i: int) -> str:
+        """Get the owner of the Company the `i`-th request uses."""
+        return f"owner{i % self.companies}"
+
+    def item(self, i: int) -> int:
+        """Get the ID of the Shop Item the `i`-th request uses."""
+        return self.item_ids[i % len(self.item_ids)]
+
+
+def _scenarios(seed: Seed) -> list[Scenario]:
+    """Get the scenarios, in the order they are run. The Companies deleted are the ones created before.
+
+    :param seed: What the database is seeded with.
+    :return: Scenarios.
+    """
+    return [
+        Scenario(
+            "company_create",
+            lambda client, i: client.post("/company", json={"name": f"New {i}", "owner_id": f"new{i}"}),
+            expected=201,
+        ),
+        Scenario("company_get", lambda client, i: client.get(f"/company/{seed.owner(i)}")),
+        Scenario(
+            "company_update",
+            lambda client, i: client.patch(
+                f"/company/{seed.owner(i)}", json={"name": f"Company {i % seed.companies}"}
+            ),
+        ),
+        Scenario("company_delete", lambda client, i: client.delete(f"/company/new{i}")),
+        Scenario(
+            "companies_page",
+            lambda client, i: client.get(
+                "/companies", params={"limit": PAGE_SIZE, "page": i % max(seed.companies // PAGE_SIZE, 1) + 1}
+            ),
+        ),
+        Scenario(
+            "companies_cursor",
+            lambda client, i: client.get(
+                "/companies", params={"limit": PAGE_SIZE, "cursor": seed.cursors[i % len(seed.cursors)]}
+            ),
+        ),
+        Scenario("leaderboard", lambda client, i: client.get("/leaderboard", params={"offset": i % 100})),
+        Scenario(
+            "shop_list",
+            lambda client, i: client.get(
+                "/shop", params={"limit": PAGE_SIZE, "sort_by": ("price", "quantity", "name")[i % 3]}
+            ),
+        ),
+        Scenario(
+            "shop_purchase",
+            lambda client, i: client.post(
+                f"/shop/{seed.item(i)}/buy",
+                json={"company_id": seed.owner(i), "item_id": seed.item(i), "purchase_quantity": 1},
+            ),
+        ),
+        Scenario("collect", lambda client, i: client.get(f"/company/{seed.owner(i)}/collect")),
+        Scenario("achievements", lambda client, _: client.get("/achievements")),
+        Scenario("company_achievements", lambda client, i: client.get(f"/company/{seed.owner(i)}/achievements")),
+        Scenario("user_get", lambda client, i: client.get(f"/user/{seed.owner(i)}")),
+        Scenario("planet_get", lambda client, _: client.get("/planet/EA0000")),
+        Scenario(
+            "autocomplete", lambda client, i: client.get("/autocomplete/resource", params={"prefix": "abcdefg"[i % 7]})
+        ),
+    ]
+
+
+def _seed(seed: Seed, requests: int) -> None:
+    """Create the Users, Companies and Shop Items, before the app starts and loads them.
+
+    :param seed: What to seed the database with.
+    :param requests: Number of requests per scenario, which is the number of Companies created.
+    :return: None
+    """
+    collected: datetime = datetime.now() - timedelta(days=1)  # noqa: DTZ005, timestamps are stored as naive local times
+
+    with Session(engine) as session:
+        session.exec(
+            insert(User),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[{"user_id": f"owner{i}", "experience": 0} for i in range(seed.companies)]
+            + [{"user_id": f"new{i}", "experience": 0} for i in range(requests)],
+        )
+        session.exec(
+            insert(Company),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[
+                {
+                    "name": f"Company {i}",
+                    "owner_id": f"owner{i}",
+                    "networth": STARTING_NETWORTH,
+                    "current_planet": "EA0000",
+                    "last_resource_collect": collected,
+                }
+                for i in range(seed.companies)
+            ],
+        )
+        session.exec(
+            insert(ShopItem),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[
+                {"name": f"Item {i}", "price": 1.0 + i, "available_quantity": ITEM_STOCK} for i in range(seed.items)
+            ],
+        )
+        session.commit()
+
+        seed.item_ids = list(session.exec(select(ShopItem.id)).all())  # type: ignore[reportArgumentType]
+
+
+def _seed_achievements() -> None:
+    """Award the level Achievements to every Company, once the app has created the Achievements."""
+    with engine.begin() as connection:
+        achievement_ids: list[int] = list(
+            connection.execute(select(Achievement.id).where(Achievement.name.in_(LEVEL_ACHIEVEMENTS))).scalars()  # type: ignore[reportAttributeAccessIssue]
+        )
+        companies: list[Any] = list(connection.execute(select(Company.id, Company.owner_id)).all())
+        award_achievements(
+            connection,
+            [
+                (achievement_id, company_id, owner_id)
+                for company_id, owner_id in companies
+                for achievement_id in achievement_ids
+            ],
+            datetime.now(),  # noqa: DTZ005, timestamps are stored as naive local times
+        )
+
+
+async def _collect_cursors(client: AsyncClient, seed: Seed) -> None:
+    """Walk the pages of the Companies, keeping the cursor of each page.
+
+    :param client: Client of the app.
+    :param seed: What the database is seeded with.
+    :return: None
+    """
+    cursor: str | None = ""
+    while cursor is not None:
+        seed.cursors.append(cursor)
+        response: Response = await client.get("/companies", params={"limit": PAGE_SIZE, "cursor": cursor})
+        response.raise_for_status()
+        cursor = response.json()["next_cursor"]
+
+
+def _percentile(latencies: list[float], fraction: float) -> float:
+    """Get a percentile of sorted latencies, in milliseconds.
+
+    :param latencies: Latencies in seconds, in ascending order.
+    :param fraction: Fraction of the latencies at or below the percentile, e.g. `0.99`.
+    :return: Percentile.
+    """
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+
+async def run_scenario(client: AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict[str, Any]:
+    """Send the requests of a scenario from concurrent clients, each sending its next request once answered.
+
+    :param client: Client of the app.
+    :param scenario: Scenario to run.
+    :param requests: Number of requests.
+    :param concurrency: Number of concurrent clients.
+    :return: Throughput, latencies and status codes.
+    """
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    # Shared by the clients, so each request is sent once
+    pending = iter(range(requests))
+
+    async def send() -> None:
+        for i in pending:
+            start: float = time.perf_counter()
+            response: Response = await scenario.request(client, i)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(concurrency)))
+    elapsed: float = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "requests_per_s": requests / elapsed,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "max_ms": latencies[-1] * 1000,
+        "statuses": statuses,
+        "errors": requests - statuses.get(str(scenario.expected), 0),
+    }
+
+
+async def main(companies: int, items: int, requests: int, concurrency: int, names: list[str]) -> list[dict[str, Any]]:
+    """Run the scenarios one after the other.
+
+    :param companies: Number of Companies in the database.
+    :param items: Number of Shop Items in the database.
+    :param requests: Number of requests per scenario.
+    :param concurrency: Number of concurrent clients.
+    :param names: Scenarios to run, all of them if empty.
+    :return: Results of each scenario.
+    """
+    seed: Seed = Seed(companies, items)
+    _seed(seed, requests)
+
+    async with (
+        app.router.lifespan_context(app),
+        AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client,
+    ):
+        _seed_achievements()
+        await _collect_cursors(client, seed)
+
+        return [
+            await run_scenario(client, scenario, requests, concurrency)
+            for scenario in _scenarios(seed)
+            if not names or scenario.name in names
+        ]
+
+
+def _commit() -> str | None:
+    """Get the commit the benchmark is run on, marked `-dirty` if there are uncommitted changes.
+
+    :return: Commit hash, or None outside of a git repository.
+    """
+    try:
+        commit: str = subprocess.run(  # noqa: S603
+            ["git", "describe", "--always", "--dirty", "--abbrev=12"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return commit
+
+
+def _compare(results: list[dict[str, Any]], baseline: dict[str, Any]) -> list[dict[str, Any]]:
+    """Compare the results to those of an earlier run.
+
+    :param results: Results of each scenario.
+    :param baseline: Output of the earlier run.
+    :return: Change of the throughput and p99 latency of each scenario run both times, in percent.
+    """
+    before: dict[str, dict[str, Any]] = {result["scenario"]: result for result in baseline["scenarios"]}
+
+    return [
+        {
+            "scenario": result["scenario"],
+            "requests_per_s_change_pct": (result["requests_per_s"] / previous["requests_per_s"] - 1) * 100,
+            "p99_ms_change_pct": (result["p99_ms"] / previous["p99_ms"] - 1) * 100,
+        }
+        for result in results
+        if (previous := before.get(result["scenario"])) is not None
+    ]
+
+
+def cli() -> None:
+    """Run the benchmark from the command line, writing the results as JSON."""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=2000, help="number of Companies in the database")
+    parser.add_argument("--items", type=int, default=200, help="number of Shop Items in the database")
+    parser.add_argument("--requests", type=int, default=1000, help="number of requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of concurrent clients")
+    parser.add_argument(
+        "--scenarios",
+        nargs="*",
+        default=[],
+        choices=[scenario.name for scenario in _scenarios(Seed(1, 1))],
+        help="scenarios to run, all of them by default",
+    )
+    parser.add_argument("--output", type=Path, help="file to write the results to, in `benchmarks/results` by default")
+    parser.add_argument("--compare", type=Path, help="results of an earlier run to compare to")
+    args: argparse.Namespace = parser.parse_args()
+
+    commit: str | None = _commit()
+    results: list[dict[str, Any]] = asyncio.run(
+        main(args.companies, args.items, args.requests, args.concurrency, args.scenarios)
+    )
+    output: dict[str, Any] = {
+        "commit": commit,
+        "date": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "companies": args.companies,
+            "items": args.items,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    if args.compare is not None:
+        output["comparison"] = {
+            "commit": (baseline := json.loads(args.compare.read_text()))["commit"],
+            "scenarios": _compare(results, baseline),
+        }
+
+    path: Path = args.output or RESULTS_DIR.joinpath(f"load-{commit or 'unknown'}.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(output, indent=2) + "\n")
+
+    json.dump(output, sys.stdout, indent=2)
+    print()
+    print(f"Results written to {path}", file=sys.stderr)
+
+    if any(result["errors"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
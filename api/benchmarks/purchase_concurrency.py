@@ -0,0 +1,180 @@
+"""Concurrency benchmark of the Shop purchase path.
+
+Many buyers, each with their own Company, race to buy the same Shop Item. Reports the purchases per second and checks
+that the Item was not oversold: the stock taken out of the Shop must match the stock added to the inventories, never
+exceed what was available, and be paid for in full.
+
+Run from the `api` directory, the benchmark uses its own throwaway database:
+
+    python -m benchmarks.purchase_concurrency --buyers 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# The app reads its configuration at import, so point it at a throwaway database first
+_workdir: Path = Path(tempfile.mkdtemp(prefix="exoplanets-bench-"))
+os.environ["DATABASE"] = f"sqlite:///{_workdir.joinpath('bench.sqlite')}"
+os.environ["HARVEST_SCHEDULER"] = "false"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlmodel import Session, delete, func, insert, select  # noqa: E402
+from src.db import engine  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models import Company, Inventory, ShopItem, User  # noqa: E402
+
+ITEM_PRICE: float = 10.0
+STARTING_NETWORTH: float = 1_000_000.0
+
+
+def _setup(buyers: int, stock: int) -> int:
+    """Create the buyers and the Shop Item they race for.
+
+    :param buyers: Number of buyers.
+    :param stock: Available quantity of the Shop Item.
+    :return: ID of the Shop Item.
+    """
+    with Session(engine) as session:
+        for model in (Inventory, ShopItem, Company, User):
+            session.exec(delete(model))  # type: ignore[reportCallIssue, reportArgumentType]
+
+        session.exec(insert(User), params=[{"user_id": f"buyer{i}", "experience": 0} for i in range(buyers)])  # type: ignore[reportCallIssue, reportArgumentType]
+        session.exec(
+            insert(Company),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[
+                {
+                    "name": f"Buyer {i}",
+                    "owner_id": f"buyer{i}",
+                    "networth": STARTING_NETWORTH,
+                    "current_planet": "EA0000",
+                }
+                for i in range(buyers)
+            ],
+        )
+        item: ShopItem = ShopItem(name="Contested", price=ITEM_PRICE, available_quantity=stock)
+        session.add(item)
+        session.commit()
+        session.refresh(item)
+
+    if item.id is None:
+        msg = "Shop Item was not created."
+        raise RuntimeError(msg)
+    return item.id
+
+
+def _check(item_id: int, stock: int, buyers: int) -> dict[str, Any]:
+    """Check the state of the database after the purchases.
+
+    :param item_id: ID of the Shop Item.
+    :param stock: Initial quantity of the Shop Item.
+    :param buyers: Number of buyers.
+    :return: Quantities sold and any inconsistency found.
+    """
+    with Session(engine) as session:
+        item: ShopItem | None = session.get(ShopItem, item_id)
+        in_inventories: int = session.exec(select(func.coalesce(func.sum(Inventory.stock), 0))).one()
+        spent: float = session.exec(
+            select(func.coalesce(func.sum(STARTING_NETWORTH - Company.networth), 0)).where(
+                Company.owner_id.like("buyer%")  # type: ignore[reportAttributeAccessIssue]
+            )
+        ).one()
+        overdrawn: int = session.exec(select(func.count()).where(Company.networth < 0)).one()
+
+    taken: int = stock - (item.available_quantity if item is not None else 0)
+
+    return {
+        "sold": taken,
+        "in_inventories": in_inventories,
+        "oversold": max(in_inventories - stock, 0) + abs(in_inventories - taken),
+        "unpaid": round(in_inventories * ITEM_PRICE - spent, 6),
+        "overdrawn_companies": overdrawn,
+        "buyers": buyers,
+    }
+
+
+async def _buy(client: AsyncClient, item_id: int, buyer: int, quantity: int) -> tuple[int, float]:
+    """Buy the Shop Item as the given buyer.
+
+    :return: Status code and latency in seconds.
+    """
+    start: float = time.perf_counter()
+    response = await client.post(
+        f"/shop/{item_id}/buy", json={"company_id": f"buyer{buyer}", "item_id": item_id, "purchase_quantity": quantity}
+    )
+    return response.status_code, time.perf_counter() - start
+
+
+async def run_scenario(buyers: int, stock: int, quantity: int) -> dict[str, Any]:
+    """Have every buyer try to buy the Shop Item at the same time.
+
+    :param buyers: Number of concurrent buyers.
+    :param stock: Available quantity of the Shop Item.
+    :param quantity: Quantity each buyer tries to buy.
+    :return: Throughput, latencies, status codes and consistency checks.
+    """
+    item_id: int = _setup(buyers, stock)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        start: float = time.perf_counter()
+        results: list[tuple[int, float]] = await asyncio.gather(
+            *(_buy(client, item_id, buyer, quantity) for buyer in range(buyers))
+        )
+        elapsed: float = time.perf_counter() - start
+
+    statuses: dict[str, int] = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    latencies: list[float] = sorted(latency for _, latency in results)
+    succeeded: int = statuses.get("200", 0)
+
+    return {
+        "stock": stock,
+        "quantity_per_buyer": quantity,
+        "elapsed_s": elapsed,
+        "purchases_per_s": succeeded / elapsed,
+        "requests_per_s": buyers / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "statuses": statuses,
+        **_check(item_id, stock, buyers),
+    }
+
+
+async def main(buyers: int, quantity: int) -> list[dict[str, Any]]:
+    """Run the benchmark with enough stock for every buyer, and with only enough for half of them.
+
+    :param buyers: Number of concurrent buyers.
+    :param quantity: Quantity each buyer tries to buy.
+    :return: Results of each scenario.
+    """
+    async with app.router.lifespan_context(app):
+        return [
+            await run_scenario(buyers, buyers * quantity, quantity),
+            await run_scenario(buyers, buyers * quantity // 2, quantity),
+        ]
+
+
+def cli() -> None:
+    """Run the benchmark from the command line, printing the results as JSON."""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=100, help="number of concurrent buyers")
+    parser.add_argument("--quantity", type=int, default=1, help="quantity each buyer tries to buy")
+    args: argparse.Namespace = parser.parse_args()
+
+    results: list[dict[str, Any]] = asyncio.run(main(args.buyers, args.quantity))
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+    if any(result["oversold"] or result["unpaid"] or result["overdrawn_companies"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,204 @@
+"""Benchmark of the trusted serialization path of the list endpoints.
+
+Serves `/companies?limit=1000` and `/achievements` both as the app does, building the public models from trusted rows
+and encoding them with orjson, and as they were served before: building the public models by validating tracked rows,
+and having FastAPI validate and serialize them again against the response model. Reports the latency of each, and
+checks that both return the same content.
+
+Run from the `api` directory, the benchmark uses its own throwaway database:
+
+    python -m benchmarks.serialization --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# The app reads its configuration at import, so point it at a throwaway database first
+_workdir: Path = Path(tempfile.mkdtemp(prefix="exoplanets-bench-"))
+os.environ["DATABASE"] = f"sqlite:///{_workdir.joinpath('bench.sqlite')}"
+os.environ["HARVEST_SCHEDULER"] = "false"
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlmodel import Session, delete, insert, select  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+from src.classes.achievements import AchievementRepresentation  # noqa: E402
+from src.classes.pagination import CompanyPagination, Paginate  # noqa: E402
+from src.db import engine, get_session  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models import (  # noqa: E402
+    Achievement,
+    AchievementPublic,
+    Company,
+    CompanyAchievementPublic,
+    CompanyPublic,
+    User,
+)
+
+ENDPOINTS: list[str] = ["/companies?limit=1000", "/achievements"]
+
+# The endpoints as they were served before the trusted serialization path
+validated_app: FastAPI = FastAPI()
+
+
+@validated_app.get("/companies")
+async def validated_companies(
+    params: CompanyPagination = Depends(), session: AsyncSession = Depends(get_session)
+) -> dict[str, Any]:
+    """Get the Companies, validating each of them twice."""
+    paginator: Paginate = Paginate(
+        query=select(Company), session=session, params=params, sort_column=Company.networth, id_column=Company.id
+    )
+    paginator.add_data(
+        {"companies": [CompanyPublic.model_validate(company) for company in await paginator.get_data()]}
+    )
+    return paginator.get_page()
+
+
+@validated_app.get("/achievements")
+async def validated_achievements(session: AsyncSession = Depends(get_session)) -> dict[str, list[AchievementPublic]]:
+    """Get the Achievements, validating each of them twice."""
+    achievements: list[AchievementPublic] = []
+
+    for representation in await AchievementRepresentation.fetch_achievements(session=session):
+        achievement: Achievement = representation.get_achievement()
+        earned: dict[str, CompanyAchievementPublic | None] = {
+            key: CompanyAchievementPublic(name=achievement.name, owner_id=owner_id, date=achieved)
+            if owner_id is not None and achieved is not None
+            else None
+            for key, owner_id, achieved in (
+                ("first_achieved", achievement.first_owner_id, achievement.first_achieved),
+                ("latest_achieved", achievement.latest_owner_id, achievement.latest_achieved),
+            )
+        }
+        achievements.append(
+            AchievementPublic.model_validate(
+                {
+                    "id": achievement.id,
+                    "name": achievement.name,
+                    "description": achievement.description,
+                    "companies_earned": achievement.earned_count,
+                    **earned,
+                }
+            )
+        )
+
+    return {"achievements": achievements}
+
+
+def _setup(companies: int, achievements: int) -> None:
+    """Create the Companies and Achievements to list.
+
+    :param companies: Number of Companies.
+    :param achievements: Number of Achievements, on top of the ones of the game.
+    """
+    with Session(engine) as session:
+        for model in (Company, User):
+            session.exec(delete(model))  # type: ignore[reportCallIssue, reportArgumentType]
+        session.exec(delete(Achievement).where(Achievement.name.like("Bench %")))  # type: ignore[reportCallIssue, reportArgumentType, reportAttributeAccessIssue]
+
+        session.exec(insert(User), params=[{"user_id": f"owner{i}", "experience": 0} for i in range(companies)])  # type: ignore[reportCallIssue, reportArgumentType]
+        session.exec(
+            insert(Company),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[
+                {"name": f"Company {i}", "owner_id": f"owner{i}", "networth": 1000.0 + i, "current_planet": "EA0000"}
+                for i in range(companies)
+            ],
+        )
+        session.exec(
+            insert(Achievement),  # type: ignore[reportCallIssue, reportArgumentType]
+            params=[
+                {"name": f"Bench {i}", "description": f"Achievement {i} of the serialization benchmark."}
+                for i in range(achievements)
+            ],
+        )
+        session.commit()
+
+
+async def _measure(client: AsyncClient, url: str, requests: int) -> tuple[dict[str, Any], Any]:
+    """Request the endpoint over and over.
+
+    :param client: Client of the app serving the endpoint.
+    :param url: Endpoint to request.
+    :param requests: Number of requests.
+    :return: Latencies and size of the responses, and the content of the last response.
+    """
+    # Warm up, e.g. the connection pool
+    await client.get(url)
+
+    latencies: list[float] = []
+    for _ in range(requests):
+        start: float = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "bytes": len(response.content),
+    }, response.json()
+
+
+async def main(companies: int, achievements: int, requests: int) -> list[dict[str, Any]]:
+    """Request each endpoint from both serialization paths.
+
+    :param companies: Number of Companies to list.
+    :param achievements: Number of Achievements to list, on top of the ones of the game.
+    :param requests: Number of requests per endpoint and path.
+    :return: Results of each endpoint.
+    """
+    _setup(companies, achievements)
+    results: list[dict[str, Any]] = []
+
+    async with (
+        app.router.lifespan_context(app),
+        AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as trusted,
+        AsyncClient(transport=ASGITransport(app=validated_app), base_url="http://bench") as validated,
+    ):
+        for url in ENDPOINTS:
+            before, before_content = await _measure(validated, url, requests)
+            after, after_content = await _measure(trusted, url, requests)
+
+            results.append(
+                {
+                    "endpoint": url,
+                    "requests": requests,
+                    "validated": before,
+                    "trusted": after,
+                    "speedup": before["mean_ms"] / after["mean_ms"],
+                    "same_content": before_content == after_content,
+                }
+            )
+
+    return results
+
+
+def cli() -> None:
+    """Run the benchmark from the command line, printing the results as JSON."""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=5000, help="number of Companies in the database")
+    parser.add_argument("--achievements", type=int, default=1000, help="number of extra Achievements")
+    parser.add_argument("--requests", type=int, default=200, help="number of requests per endpoint and path")
+    args: argparse.Namespace = parser.parse_args()
+
+    results: list[dict[str, Any]] = asyncio.run(main(args.companies, args.achievements, args.requests))
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+    if not all(result["same_content"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
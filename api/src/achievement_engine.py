@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from contextlib import suppress
+from datetime import datetime
+
+from sqlalchemy import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, not_, or_, select
+
+from .classes.achievements import award_achievements
+from .db import async_engine
+from .leaderboard import leaderboard
+from .models import Achievement, Company, Experience
+
+achievement_logger = logging.getLogger(__name__)
+
+# Achievement engine configuration
+FLUSH_INTERVAL: float = float(os.environ.get("ACHIEVEMENT_FLUSH_INTERVAL", "5"))
+LEADERBOARD_TOP: int = int(os.environ.get("ACHIEVEMENT_LEADERBOARD_TOP", "10"))
+
+# Achievements earned by reaching a level, by name
+LEVEL_ACHIEVEMENTS: dict[str, int] = {
+    "Reach level 5.": 5,
+    "Reach level 10.": 10,
+    "Reach level 20.": 20,
+    "Reach level 30.": 30,
+}
+# Achievement earned by being in the top of the leaderboard
+LEADERBOARD_ACHIEVEMENT: str = "Leaderboard Achieved!"
+
+
+def _experience_for_level(level: int) -> int:
+    """Get the least experience needed to reach the level.
+
+    :param level: Level to reach.
+    :return: Experience needed.
+    """
+    low: int = 0
+    high: int = 1
+    while Experience.level_from_experience(high) < level:
+        low, high = high, high * 2
+
+    while low < high:
+        middle: int = (low + high) // 2
+        if Experience.level_from_experience(middle) < level:
+            low = middle + 1
+        else:
+            high = middle
+
+    return low
+
+
+class AchievementEngine:
+    """Awards the Achievements as the events that earn them happen.
+
+    The events only ever check the rules they can affect: a change of experience looks up the level thresholds it
+    crossed in a sorted table, and a change of networth reads the top of the leaderboard. The Achievements earned
+    are queued, and awarded in bulk every `flush_interval` seconds and when the app shuts down, so the requests
+    raising the events never wait on them.
+    """
+
+    def __init__(self, flush_interval: float, leaderboard_top: int) -> None:
+        self.flush_interval: float = flush_interval
+        self.leaderboard_top: int = leaderboard_top
+
+        # Experience needed for each level Achievement, in ascending order, and the matching Achievement IDs
+        self._thresholds: list[int] = []
+        self._level_achievements: list[int] = []
+        self._leaderboard_achievement: int | None = None
+
+        # Achievements earned and not awarded yet, to the active Company of an owner, or to a Company
+        self._by_owner: set[tuple[int, str]] = set()
+        self._by_company: set[tuple[int, int]] = set()
+        # Achievements known to have been awarded, so they are not queued again
+        self._awarded: set[tuple[int, int]] = set()
+
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def load(self, session: Session) -> None:
+        """Build the threshold tables of the rules, for the Achievements that exist.
+
+        :param session: Database session.
+        :return: None
+        """
+        achievement_ids: dict[str, int] = dict(session.exec(select(Achievement.name, Achievement.id)).all())  # type: ignore[reportArgumentType]
+
+        levels: list[tuple[int, int]] = sorted(
+            (_experience_for_level(level), achievement_ids[name])
+            for name, level in LEVEL_ACHIEVEMENTS.items()
+            if name in achievement_ids
+        )
+        self._thresholds = [threshold for threshold, _ in levels]
+        self._level_achievements = [achievement_id for _, achievement_id in levels]
+        self._leaderboard_achievement = achievement_ids.get(LEADERBOARD_ACHIEVEMENT)
+
+    def experience_changed(self, owner_id: str, before: int, after: int) -> None:
+        """Queue the level Achievements the User earned with a change of experience.
+
+        :param owner_id: ID of the User.
+        :param before: Experience before the change.
+        :param after: Experience after the change.
+        :return: None
+        """
+        if after <= before:
+            return
+
+        # Thresholds in (before, after]
+        for position in range(bisect_right(self._thresholds, before), bisect_left(self._thresholds, after + 1)):
+            self._by_owner.add((self._level_achievements[position], owner_id))
+
+    def experiences_changed(self, changes: Iterable[tuple[str, int, int]]) -> None:
+        """Queue the level Achievements earned with the changes of experience of many Users, e.g. by a harvest.
+
+        :param changes: ID of the User, experience before and experience after of each change.
+        :return: None
+        """
+        for owner_id, before, after in changes:
+            self.experience_changed(owner_id, before, after)
+
+    def leaderboard_changed(self) -> None:
+        """Queue the leaderboard Achievement for the Companies at the top of the leaderboard.
+
+        To be called whenever the networth of Companies changes. Only the top of the leaderboard is read, as Companies
+        can also make it there when another one drops out.
+
+        :return: None
+        """
+        if self._leaderboard_achievement is None:
+            return
+
+        for _, company_id, _ in leaderboard.top(self.leaderboard_top):
+            if (self._leaderboard_achievement, company_id) not in self._awarded:
+                self._by_company.add((self._leaderboard_achievement, company_id))
+
+    async def flush(self) -> int:
+        """Award the queued Achievements.
+
+        If the awards fail, they stay queued and are retried by the next flush.
+
+        :return: Number of Achievements awarded.
+        """
+        async with self._lock:
+            if not self._by_owner and not self._by_company:
+                return 0
+
+            by_owner, self._by_owner = self._by_owner, set()
+            by_company, self._by_company = self._by_company, set()
+
+            try:
+                async with async_engine.begin() as connection:
+                    awards: list[tuple[int, int, str]] = await connection.run_sync(
+                        _award,
+                        by_owner,
+                        by_company,
+                        datetime.now(),  # noqa: DTZ005, timestamps are stored as naive local times
+                    )
+
+            except SQLAlchemyError:
+                achievement_logger.exception("cannot award the achievements, keeping them for the next flush")
+                self._by_owner |= by_owner
+                self._by_company |= by_company
+                return 0
+
+            self._awarded.update((achievement_id, company_id) for achievement_id, company_id, _ in awards)
+
+        achievement_logger.debug(f"awarded {len(awards)} achievements")
+        return len(awards)
+
+    async def _run(self) -> None:
+        """Award the queued Achievements every `flush_interval` seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start awarding the queued Achievements periodically. Must be called from the event loop serving requests.
+
+        :return: None
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop awarding the queued Achievements periodically, and award what is still queued.
+
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await self.flush()
+
+
+def _award(
+    connection: Connection, by_owner: set[tuple[int, str]], by_company: set[tuple[int, int]], achieved: datetime
+) -> list[tuple[int, int, str]]:
+    """Award the Achievements to the active Companies they were earned by.
+
+    :param connection: Database connection, the caller is responsible for committing.
+    :param by_owner: Achievements earned by the active Company of an owner.
+    :param by_company: Achievements earned by a Company.
+    :param achieved: When the Achievements were earned.
+    :return: Achievement ID, Company ID and owner of every Achievement the Companies now hold, awarded or not.
+    """
+    owner_ids: set[str] = {owner_id for _, owner_id in by_owner}
+    company_ids: set[int] = {company_id for _, company_id in by_company}
+
+    companies: list[tuple[int, str]] = list(
+        connection.execute(
+            select(Company.id, Company.owner_id).where(
+                or_(Company.owner_id.in_(owner_ids), Company.id.in_(company_ids)),  # type: ignore[reportAttributeAccessIssue, reportOptionalMemberAccess]
+                not_(Company.is_bankrupt),
+            )
+        ).all()  # type: ignore[reportArgumentType]
+    )
+    active_company: dict[str, int] = {owner_id: company_id for company_id, owner_id in companies}
+    owners: dict[int, str] = dict(companies)
+
+    awards: list[tuple[int, int, str]] = [
+        (achievement_id, active_company[owner_id], owner_id)
+        for achievement_id, owner_id in sorted(by_owner)
+        if owner_id in active_company
+    ]
+    awards.extend(
+        (achievement_id, company_id, owners[company_id])
+        for achievement_id, company_id in sorted(by_company)
+        if company_id in owners
+    )
+
+    award_achievements(connection, awards, achieved)
+    return awards
+
+
+achievement_engine: AchievementEngine = AchievementEngine(FLUSH_INTERVAL, LEADERBOARD_TOP)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Folded term, name and value of an entry
+type PrefixKey = tuple[str, str, str]
+
+
+class PrefixIndex:
+    """Names searchable by prefix, regardless of case.
+
+    Each entry has a name and a value (what the endpoints take to address it, e.g. a Planet ID), and can be found
+    by the prefix of several terms (e.g. both its name and its ID). The terms are kept in a sorted array, so the
+    entries starting with a prefix are found with a binary search, and then read in order.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[PrefixKey] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _key(term: str, name: str, value: str) -> PrefixKey:
+        return term.casefold(), name, value
+
+    def rebuild(self, entries: Iterable[tuple[Iterable[str], str, str]]) -> None:
+        """Replace the index with the given entries.
+
+        :param entries: Terms, name and value of each entry.
+        :return: None
+        """
+        self._keys = sorted({self._key(term, name, value) for terms, name, value in entries for term in terms})
+
+    def add(self, term: str, name: str, value: str) -> None:
+        """Make the entry searchable by the prefix of the term.
+
+        :param term: Term to search the entry by.
+        :param name: Name of the entry.
+        :param value: Value of the entry.
+        :return: None
+        """
+        key: PrefixKey = self._key(term, name, value)
+        position: int = bisect_left(self._keys, key)
+
+        if position == len(self._keys) or self._keys[position] != key:
+            self._keys.insert(position, key)
+
+    def discard(self, term: str, name: str, value: str) -> None:
+        """Stop making the entry searchable by the prefix of the term, if it was.
+
+        :param term: Term the entry was searchable by.
+        :param name: Name of the entry.
+        :param value: Value of the entry.
+        :return: None
+        """
+        key: PrefixKey = self._key(term, name, value)
+        position: int = bisect_left(self._keys, key)
+
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, str]]:
+        """Find the entries with a term starting with the prefix, in the order of their terms.
+
+        :param prefix: Start of the terms, in any case.
+        :param limit: Maximum number of entries to find.
+        :return: Name and value of each entry found.
+        """
+        folded: str = prefix.casefold()
+        found: dict[str, str] = {}
+
+        for position in range(bisect_left(self._keys, (folded,)), len(self._keys)):
+            term, name, value = self._keys[position]
+
+            if len(found) == limit or not term.startswith(folded):
+                break
+            found.setdefault(value, name)
+
+        return [(name, value) for value, name in found.items()]
+
+
+# Indexes of the game config, which only changes at startup. The Shop Items are indexed by the Shop catalog.
+planet_index: PrefixIndex = PrefixIndex()
+resource_index: PrefixIndex = PrefixIndex()
+collector_index: PrefixIndex = PrefixIndex()
@@ -1,30 +1,48 @@
-from typing import TYPE_CHECKING, Any, Self
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Self
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import Connection, bindparam, case, func, insert, or_, tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import NO_RELATIONSHIPS, LoadingPlan
 from src.models import Achievement, AchievementPublic, CompanyAchievementPublic, EarnedAchievements
+from src.responses import construct_public
 
-if TYPE_CHECKING:
-    from collections.abc import Sequence
+# Columns of the Achievements their details are made of
+ACHIEVEMENT_DETAIL_COLUMNS: tuple[Any, ...] = (
+    Achievement.id,
+    Achievement.name,
+    Achievement.description,
+    Achievement.earned_count,
+    Achievement.first_owner_id,
+    Achievement.first_achieved,
+    Achievement.latest_owner_id,
+    Achievement.latest_achieved,
+)
 
 
 class AchievementRepresentation:
     """Class representing an `achievement` in the database."""
 
-    def __init__(self, session: Session, achievement: Achievement) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, achievement: Achievement) -> None:
+        self.session: AsyncSession = session
         self.achievement: Achievement = achievement
 
     @classmethod
-    def fetch_achievement(cls, session: Session, achievement_id: int) -> Self:
+    async def fetch_achievement(
+        cls, session: AsyncSession, achievement_id: int, plan: LoadingPlan = NO_RELATIONSHIPS
+    ) -> Self:
         """Fetch the target Achievement.
 
         :param session: Database session.
         :param achievement_id: ID of achievement to fetch.
+        :param plan: Relationships to load along with the Achievement.
         :return: Details of the achievement.
         """
-        fetched_achievement: Achievement | None = session.exec(
-            select(Achievement).where(Achievement.id == achievement_id)
+        fetched_achievement: Achievement | None = (
+            await session.exec(select(Achievement).where(Achievement.id == achievement_id).options(*plan))
         ).first()
 
         if fetched_achievement is None:
@@ -33,19 +51,34 @@ class AchievementRepresentation:
         return cls(session=session, achievement=fetched_achievement)
 
     @classmethod
-    def fetch_achievements(cls, session: Session) -> list[Self]:
+    async def fetch_achievements(cls, session: AsyncSession, plan: LoadingPlan = NO_RELATIONSHIPS) -> list[Self]:
         """Get all the Achievements from the database.
 
         :param session: Database session.
+        :param plan: Relationships to load along with the Achievements.
         :return: List of all Achievements.
         """
-        fetched_achievements: Sequence[Achievement] = session.exec(select(Achievement)).all()
+        fetched_achievements: Sequence[Achievement] = (await session.exec(select(Achievement).options(*plan))).all()
 
         if len(fetched_achievements) == 0:
             raise HTTPException(status_code=404, detail="Achievements not found.")
 
         return [cls(session=session, achievement=fetched_achievement) for fetched_achievement in fetched_achievements]
 
+    @classmethod
+    async def fetch_achievement_details(cls, session: AsyncSession) -> list[AchievementPublic]:
+        """Get the details of all the Achievements, read as plain rows rather than as tracked Achievements.
+
+        :param session: Database session.
+        :return: Details of all Achievements.
+        """
+        fetched_achievements: Sequence[Any] = (await session.exec(select(*ACHIEVEMENT_DETAIL_COLUMNS))).all()
+
+        if len(fetched_achievements) == 0:
+            raise HTTPException(status_code=404, detail="Achievements not found.")
+
+        return [_details(fetched_achievement) for fetched_achievement in fetched_achievements]
+
     def get_achievement(self) -> Achievement:
         """Get the Achievement bound to the object instance.
 
@@ -54,44 +87,114 @@ class AchievementRepresentation:
         return self.achievement
 
     def get_details(self) -> AchievementPublic:
-        """Get the details of the Achievement.
+        """Get the details of the Achievement, from the statistics kept on it.
 
         :return: Achievement details.
         """
-        details: dict[str, Any] = {
-            "id": self.achievement.id,
-            "name": self.achievement.name,
-            "description": self.achievement.description,
-        }
-
-        # Getting the Companies that have earned the given achievement.
-        companies_earned: list[EarnedAchievements] = self.achievement.companies_earned
-
-        if not companies_earned:
-            details["companies_earned"] = 0
-            details["first_achieved"] = None
-            details["latest_achieved"] = None
-
-        else:
-            # Get the company that 1) earned it first, 2) earned it the latest
-            companies_earned = sorted(companies_earned, key=lambda x: x.achieved, reverse=False)
-            first_company: EarnedAchievements = companies_earned[0]
-            latest_company: EarnedAchievements = companies_earned[-1]
-
-            details["companies_earned"] = len(companies_earned)
-            details["first_achieved"] = CompanyAchievementPublic.model_validate(
-                {
-                    "name": first_company.achievement.name,
-                    "owner_id": first_company.company.owner_id,
-                    "date": first_company.achieved,
-                }
+        return _details(self.achievement)
+
+
+def _earned_by(name: str, owner_id: str | None, achieved: datetime | None) -> CompanyAchievementPublic | None:
+    """Get the details of an Achievement as earned by a Company.
+
+    :param name: Name of the Achievement.
+    :param owner_id: Owner of the Company.
+    :param achieved: When the Company earned the Achievement.
+    :return: Details of the earned Achievement, or None if it has not been earned.
+    """
+    if owner_id is None or achieved is None:
+        return None
+    return construct_public(CompanyAchievementPublic, {"name": name, "owner_id": owner_id, "date": achieved})
+
+
+def _details(achievement: Any) -> AchievementPublic:  # noqa: ANN401
+    """Get the details of an Achievement, from the statistics kept on it.
+
+    The details are read from the database as they are, so they are not validated again.
+
+    :param achievement: Achievement, or row holding its `ACHIEVEMENT_DETAIL_COLUMNS`.
+    :return: Achievement details.
+    """
+    return construct_public(
+        AchievementPublic,
+        {
+            "id": achievement.id,
+            "name": achievement.name,
+            "description": achievement.description,
+            "companies_earned": achievement.earned_count,
+            "first_achieved": _earned_by(achievement.name, achievement.first_owner_id, achievement.first_achieved),
+            "latest_achieved": _earned_by(achievement.name, achievement.latest_owner_id, achievement.latest_achieved),
+        },
+    )
+
+
+def award_achievements(
+    connection: Connection, awards: Sequence[tuple[int, int, str]], achieved: datetime
+) -> list[tuple[int, int, str]]:
+    """Award Achievements to Companies, and update the statistics of the Achievements to match.
+
+    The Achievements the Companies have already earned are skipped. Everything is written with a fixed number of
+    statements, however many Achievements are awarded. The caller is responsible for committing.
+
+    :param connection: Database connection.
+    :param awards: ID of the Achievement, ID of the Company, and owner of the Company, of each award.
+    :param achieved: When the Achievements were earned.
+    :return: Awards that were made.
+    """
+    if not awards:
+        return []
+
+    earned: set[tuple[int, int]] = set(
+        connection.execute(
+            select(EarnedAchievements.achievement_id, EarnedAchievements.company_id).where(
+                tuple_(EarnedAchievements.achievement_id, EarnedAchievements.company_id).in_(
+                    list({(achievement_id, company_id) for achievement_id, company_id, _ in awards})
+                )
             )
-            details["latest_achieved"] = CompanyAchievementPublic.model_validate(
-                {
-                    "name": latest_company.achievement.name,
-                    "owner_id": latest_company.company.owner_id,
-                    "date": latest_company.achieved,
-                }
-            )
-
-        return AchievementPublic.model_validate(details)
+        ).all()  # type: ignore[reportArgumentType]
+    )
+
+    new_awards: list[tuple[int, int, str]] = []
+    for award in awards:
+        if (key := (award[0], award[1])) not in earned:
+            earned.add(key)
+            new_awards.append(award)
+
+    if not new_awards:
+        return []
+
+    connection.execute(
+        insert(EarnedAchievements),
+        [
+            {"achievement_id": achievement_id, "company_id": company_id, "achieved": achieved}
+            for achievement_id, company_id, _ in new_awards
+        ],
+    )
+
+    # The first and latest Companies of each Achievement, in the order of the awards
+    stats: dict[int, dict[str, Any]] = {}
+    for achievement_id, _, owner_id in new_awards:
+        entry: dict[str, Any] = stats.setdefault(
+            achievement_id, {"b_id": achievement_id, "b_count": 0, "b_first": owner_id, "b_achieved": achieved}
+        )
+        entry["b_count"] += 1
+        entry["b_latest"] = owner_id
+
+    is_latest: Any = or_(
+        Achievement.latest_achieved.is_(None),  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+        Achievement.latest_achieved <= bindparam("b_achieved"),  # type: ignore[reportOperatorIssue]
+    )
+    connection.execute(
+        update(Achievement)
+        .where(Achievement.id == bindparam("b_id"))  # type: ignore[reportArgumentType]
+        .values(
+            earned_count=Achievement.earned_count + bindparam("b_count"),
+            first_owner_id=func.coalesce(Achievement.first_owner_id, bindparam("b_first")),
+            first_achieved=func.coalesce(Achievement.first_achieved, bindparam("b_achieved")),
+            latest_owner_id=case((is_latest, bindparam("b_latest")), else_=Achievement.latest_owner_id),
+            latest_achieved=case((is_latest, bindparam("b_achieved")), else_=Achievement.latest_achieved),
+        ),
+        list(stats.values()),
+    )
+
+    return new_awards
@@ -1,22 +1,31 @@
 from typing import Any, Self
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
-from src.models import ResourceCollectorModel, ResourceCollectorPublic
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import NO_RELATIONSHIPS, LoadingPlan
+from src.models import (
+    ResourceCollectorMineableResourcesModel,
+    ResourceCollectorModel,
+    ResourceCollectorPublic,
+    ResourceModel,
+)
 
 
 class ResourceCollectorRepresentation:
     """Class representing a collector from the database."""
 
-    def __init__(self, session: Session, collector: ResourceCollectorModel) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, collector: ResourceCollectorModel) -> None:
+        self.session: AsyncSession = session
         self.collector: ResourceCollectorModel = collector
 
     @classmethod
-    def fetch_collector(cls, session: Session, name: str) -> Self:
+    async def fetch_collector(cls, session: AsyncSession, name: str, plan: LoadingPlan = NO_RELATIONSHIPS) -> Self:
         """Fetch a planet from the database. Return class with fetched planet."""
-        fetched_collector: ResourceCollectorModel | None = session.exec(
-            select(ResourceCollectorModel).where(ResourceCollectorModel.collector_id == name)
+        fetched_collector: ResourceCollectorModel | None = (
+            await session.exec(
+                select(ResourceCollectorModel).where(ResourceCollectorModel.collector_id == name).options(*plan)
+            )
         ).first()
 
         if fetched_collector is None:
@@ -28,8 +37,13 @@ class ResourceCollectorRepresentation:
         """Get the Collector model bound to the instance."""
         return self.collector
 
-    def get_details(self) -> ResourceCollectorPublic:
+    async def get_details(self) -> ResourceCollectorPublic:
         """Get the details of the Planet."""
         data: dict[str, Any] = dict(self.collector)
-        data["mineable_resources"] = [r.resource.resource_id for r in self.collector.mineable_resources]
+        mineable_resources: list[
+            ResourceCollectorMineableResourcesModel
+        ] = await self.collector.awaitable_attrs.mineable_resources
+
+        resources: list[ResourceModel] = [await r.awaitable_attrs.resource for r in mineable_resources]
+        data["mineable_resources"] = [r.resource_id for r in resources]
         return ResourceCollectorPublic.model_validate(data)
@@ -1,45 +1,73 @@
+from collections.abc import Iterator
+from datetime import datetime
+from itertools import chain
 from typing import TYPE_CHECKING, Any, Self
 
+import numpy as np
 from fastapi import HTTPException
-from sqlalchemy.exc import SQLAlchemyError
-from sqlmodel import Session, desc, not_, or_, select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlmodel import Session, not_, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.achievement_engine import achievement_engine
+from src.classes.loading import NO_RELATIONSHIPS, LoadingPlan
 from src.classes.pagination import CompanyPagination, Paginate
 from src.classes.user import UserRepresentation
+from src.experience import experience_buffer
+from src.harvest import HarvestResult, HarvestState, lock_for_harvest
+from src.leaderboard import leaderboard
 from src.models import (
     Achievement,
     AchievementsCompanyPublic,
+    BulkCollection,
     Company,
+    CompanyCollectionPublic,
     CompanyCreate,
     CompanyPublic,
+    CompanyRankPublic,
     CompanyUpdate,
     EarnedAchievements,
     Inventory,
     InventoryPublic,
+    LeaderboardEntryPublic,
     ResourceCollectionPublic,
+    ResourceModel,
+    ShopItem,
 )
-from src.resource import Resource
+from src.responses import construct_public
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
+    from sqlalchemy import Connection
+
+# Companies harvested per batch by a bulk collection
+COLLECT_BATCH_SIZE: int = 1000
+# Attempts at collecting the resources of a Company while the database is locked
+COLLECT_ATTEMPTS: int = 3
+# Columns of the Companies returned by the endpoints, read as plain rows rather than as tracked Companies
+COMPANY_PUBLIC_COLUMNS: tuple[Any, ...] = tuple(getattr(Company, name) for name in CompanyPublic.model_fields)
+
 
 class CompanyRepresentation:
     """Class that represents a `company` that is stored in the database."""
 
-    def __init__(self, session: Session, company: Company) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, company: Company) -> None:
+        self.session: AsyncSession = session
         self.company: Company = company
 
     @classmethod
-    def fetch_company(cls, session: Session, company_id: str) -> Self:
+    async def fetch_company(cls, session: AsyncSession, company_id: str, plan: LoadingPlan = NO_RELATIONSHIPS) -> Self:
         """Return instance with target Company, if it exists.
 
         :param company_id: ID of the Company to search for.
         :param session: Database session.
+        :param plan: Relationships to load along with the Company.
         :return: Instance with the fetched company.
         """
-        fetched_company: Company | None = session.exec(
-            select(Company).where(Company.owner_id == company_id, not_(Company.is_bankrupt))
+        fetched_company: Company | None = (
+            await session.exec(
+                select(Company).where(Company.owner_id == company_id, not_(Company.is_bankrupt)).options(*plan)
+            )
         ).first()
 
         if not fetched_company:
@@ -48,19 +76,22 @@ class CompanyRepresentation:
         return cls(session=session, company=fetched_company)
 
     @classmethod
-    def fetch_companies(cls, session: Session, params: CompanyPagination) -> dict[str, Any]:
+    async def fetch_companies(cls, session: AsyncSession, params: CompanyPagination) -> dict[str, Any]:
         """Return Companies from the database and return them, with pagination.
 
         :param session: Database session.
         :param params: Pagination parameters.
         :return: Paginated response to return.
         """
-        q: Any = select(Company)
-        q = q.order_by(desc(Company.networth)) if not params.ascending else q.order_by(Company.networth)
+        q: Any = select(*COMPANY_PUBLIC_COLUMNS)
 
-        paginator: Paginate = Paginate(query=q, session=session, params=params)
+        paginator: Paginate = Paginate(
+            query=q, session=session, params=params, sort_column=Company.networth, id_column=Company.id
+        )
 
-        res: list[CompanyPublic] = [CompanyPublic.model_validate(company) for company in paginator.get_data()]
+        res: list[CompanyPublic] = [
+            construct_public(CompanyPublic, company._asdict()) for company in await paginator.get_data()
+        ]
 
         # If nothing
         if not res:
@@ -70,7 +101,41 @@ class CompanyRepresentation:
         return paginator.get_page()
 
     @classmethod
-    def create_company(cls, session: Session, data: CompanyCreate) -> Self:
+    async def fetch_leaderboard(cls, session: AsyncSession, limit: int, offset: int = 0) -> dict[str, Any]:
+        """Get the Companies at the top of the leaderboard.
+
+        :param session: Database session.
+        :param limit: Number of Companies to get.
+        :param offset: Number of Companies to skip.
+        :return: Ranked Companies.
+        """
+        top: list[tuple[int, int, float]] = leaderboard.top(limit=limit, offset=offset)
+
+        if not top:
+            raise HTTPException(status_code=404, detail="Companies not found.")
+
+        fetched_companies: Sequence[Any] = (
+            await session.exec(
+                select(*COMPANY_PUBLIC_COLUMNS).where(
+                    Company.id.in_([company_id for _, company_id, _ in top])  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+                )
+            )
+        ).all()
+        companies: dict[int, Any] = {company.id: company for company in fetched_companies}
+
+        res: list[LeaderboardEntryPublic] = [
+            construct_public(
+                LeaderboardEntryPublic,
+                {"rank": rank, "company": construct_public(CompanyPublic, companies[company_id]._asdict())},
+            )
+            for rank, company_id, _ in top
+            if company_id in companies
+        ]
+
+        return {"limit": limit, "offset": offset, "entry_count": len(leaderboard), "leaderboard": res}
+
+    @classmethod
+    async def create_company(cls, session: AsyncSession, data: CompanyCreate) -> Self:
         """Return instance with newly created Company.
 
         If the `owner` already has a company, they cannot create a new one.
@@ -81,11 +146,13 @@ class CompanyRepresentation:
         :return: Instance with the created company.
         """
         # Getting the User
-        fetched_user: UserRepresentation = UserRepresentation.fetch_user(session=session, user_id=data.owner_id)
+        fetched_user: UserRepresentation = await UserRepresentation.fetch_user(session=session, user_id=data.owner_id)
 
         # Query the database
-        target: Sequence[Company] = session.exec(
-            select(Company).where(or_(Company.name == data.name, Company.owner_id == data.owner_id))
+        target: Sequence[Company] = (
+            await session.exec(
+                select(Company).where(or_(Company.name == data.name, Company.owner_id == data.owner_id))
+            )
         ).all()
 
         if target and not any(x.is_bankrupt for x in target):
@@ -96,13 +163,16 @@ class CompanyRepresentation:
                 name=data.name, owner_id=fetched_user.get_user().user_id, current_planet="EA0000"
             )
             session.add(new_company)
-            session.commit()
-            session.refresh(new_company)
+            await session.commit()
+            await session.refresh(new_company)
 
         except SQLAlchemyError:
-            session.rollback()
+            await session.rollback()
             raise HTTPException(status_code=500, detail="Unable to create a new Company") from None
 
+        leaderboard.update(new_company)
+        achievement_engine.leaderboard_changed()
+
         return cls(session=session, company=new_company)
 
     def get_company(self) -> Company:
@@ -119,7 +189,25 @@ class CompanyRepresentation:
         """
         return CompanyPublic.model_validate(self.company)
 
-    def update(self, data: CompanyUpdate) -> None:
+    def get_rank(self) -> CompanyRankPublic:
+        """Get the position of the Company on the leaderboard.
+
+        :return: Company rank.
+        """
+        rank: int | None = leaderboard.rank(self.company.id) if self.company.id is not None else None
+
+        if rank is None:
+            raise HTTPException(status_code=404, detail="Company is not on the leaderboard.")
+
+        return CompanyRankPublic(
+            company_id=self.company.id,  # type: ignore[reportArgumentType]
+            owner_id=self.company.owner_id,
+            networth=self.company.networth,
+            rank=rank,
+            out_of=len(leaderboard),
+        )
+
+    async def update(self, data: CompanyUpdate) -> None:
         """Update the Company's details.
 
         :param data: Data of Company to update.
@@ -141,13 +229,16 @@ class CompanyRepresentation:
                 has_changed = True
 
             if has_changed:
+                self.company.version += 1
                 self.session.add(self.company)
-                self.session.commit()
+                await self.session.commit()
+                leaderboard.update(self.company)
+                achievement_engine.leaderboard_changed()
 
         except SQLAlchemyError:
             raise HTTPException(status_code=500, detail="Unable to update Company.") from None
 
-    def delete(self) -> None:
+    async def delete(self) -> None:
         """Mark the Company as `bankrupt`.
 
         :return: None
@@ -155,44 +246,47 @@ class CompanyRepresentation:
         try:
             self.company.is_bankrupt = True
             self.session.add(self.company)
-            self.session.commit()
+            await self.session.commit()
+            leaderboard.update(self.company)
+            achievement_engine.leaderboard_changed()
 
         except SQLAlchemyError:
             raise HTTPException(status_code=500, detail="Unable to delete Company.") from None
 
-    def get_inventory(self) -> dict[str, Any]:
+    async def get_inventory(self) -> dict[str, Any]:
         """Get the Company's Inventory.
 
         :return: Company's inventory.
         """
-        inventory: list[Inventory] | None = self.company.inventory
+        inventory: list[Inventory] = await self.company.awaitable_attrs.inventory
 
         res: list[InventoryPublic] = []
 
         for item in inventory:
+            shop_item: ShopItem = await item.awaitable_attrs.item
             data: dict[str, Any] = {
                 "company_id": item.company_id,
                 "stock": item.stock,
                 "total_amount_spent": item.total_amount_spent,
-                "item": {"item_id": item.item.id, "name": item.item.name},
+                "item": {"item_id": shop_item.id, "name": shop_item.name},
             }
             res.append(InventoryPublic.model_validate(data))
 
         return {"company_id": self.company.id, "inventory": res}
 
-    def get_achievements(self) -> AchievementsCompanyPublic:
+    async def get_achievements(self) -> AchievementsCompanyPublic:
         """Get the Achievements the Company has achieved.
 
         :return: Company's Achievements.
         """
-        company_achievements: list[EarnedAchievements] = self.company.achievements
+        company_achievements: list[EarnedAchievements] = await self.company.awaitable_attrs.achievements
 
         if not company_achievements:
             raise HTTPException(status_code=404, detail="Company has no Achievements.")
 
         achievements_details: list[AchievementsCompanyPublic.AchievementSingle] = []
         for achievement in company_achievements:
-            ach: Achievement = achievement.achievement
+            ach: Achievement = await achievement.awaitable_attrs.achievement
             details: dict[str, Any] = {
                 "id": ach.id,
                 "name": ach.name,
@@ -215,31 +309,196 @@ class CompanyRepresentation:
 
         return AchievementsCompanyPublic.model_validate(res)
 
-    def collect_resources(self) -> ResourceCollectionPublic:
-        """Collect the resources that have been mined since the last collection."""
-        collected_resources: list[dict[str, Any]] = []
+    async def collect_resources(self) -> ResourceCollectionPublic:
+        """Collect the resources that have been mined since the last collection.
 
-        for resource in self.company.planet.resources:
-            r: Resource = Resource(r_id=resource.resource.resource_id, tier=resource.resource.min_tier)
-            collected_resources_amt = r.collect()
-            xp_collected = r.get_xp_collected()
-            money_collected = r.get_money_collected()
+        Each Resource is harvested for every full epoch elapsed since it was last accounted for, carrying on from
+        the state it was left in. Resources kept up to date by the harvest scheduler have nothing left to harvest.
 
-            # Update the company
-            self.company.networth += money_collected
-            self.company.user.experience += xp_collected  # type: ignore[reportAttributeAccessIssue]
-            self.session.add(self.company)
+        The Company is harvested like in a bulk collection, under the write lock, so that a harvesting tick cannot
+        harvest the same epochs in the meantime, and the money and XP are added to the current values. If the
+        database stays locked, e.g. by a harvesting tick, the collection is retried.
+        """
+        now: datetime = datetime.now()  # noqa: DTZ005, timestamps are stored as naive local times
+        # Rolling back expires the Company, so what is needed of it is read up front
+        company_id: int = self.company.id  # type: ignore[reportAssignmentType]
+        owner_id: str = self.company.owner_id
+
+        for _ in range(COLLECT_ATTEMPTS):
+            try:
+                result: HarvestResult = await self.session.run_sync(_harvest_company, company_id, now)
+                resource_names: dict[int, str] = dict(
+                    (
+                        await self.session.exec(
+                            select(ResourceModel.id, ResourceModel.resource_id).where(
+                                ResourceModel.id.in_(result.resource_ids.tolist())  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+                            )
+                        )
+                    ).all()  # type: ignore[reportArgumentType]
+                )
+                await self.session.commit()
+                break
+
+            except OperationalError:
+                # The database is busy, e.g. locked by a harvesting tick
+                await self.session.rollback()
+
+            except SQLAlchemyError:
+                await self.session.rollback()
+                raise HTTPException(status_code=400, detail="Unable to collect resources.") from None
+
+        else:
+            raise HTTPException(status_code=503, detail="Cannot collect resources; the database is busy.")
+
+        if len(result) == 0:
+            return ResourceCollectionPublic(resources=[])
+
+        result.record_metrics("collect")
+        leaderboard.set(company_id, float(result.networth[0]))
+        achievement_engine.leaderboard_changed()
+        achievement_engine.experiences_changed(result.experience_changes)
+        experience_buffer.forget(owner_id)
+
+        return ResourceCollectionPublic(resources=next(_collections(result, resource_names)).resources)
 
-            # Sort to return to the user
-            collected_resources.append(
-                {
-                    "resource_id": resource.resource.resource_id,
-                    "amount": collected_resources_amt,
-                    "xp_earned": xp_collected,
-                    "money_earned": money_collected,
-                }
+    @classmethod
+    async def collect_resources_bulk(
+        cls, session: AsyncSession, data: BulkCollection
+    ) -> Iterator[CompanyCollectionPublic]:
+        """Collect the resources of many Companies at once, committing once.
+
+        The Companies are loaded and harvested in batches, with a fixed number of queries per batch, using the
+        batch harvesting engine. Each Company's collection is then generated in turn, followed by the requested
+        owners that have no active Company.
+
+        :param session: Database session.
+        :param data: Owners of the Companies to collect the resources of, or all active Companies.
+        :return: Collection of each Company.
+        """
+        if data.all_active == (data.owner_ids is not None):
+            raise HTTPException(status_code=400, detail="Give either a list of owner IDs or `all_active`, not both.")
+
+        now: datetime = datetime.now()  # noqa: DTZ005, timestamps are stored as naive local times
+        owner_ids: list[str] | None = list(dict.fromkeys(data.owner_ids)) if data.owner_ids is not None else None
+
+        try:
+            results: list[HarvestResult] = await session.run_sync(_harvest_companies, owner_ids, now)
+            resource_names: dict[int, str] = dict(
+                (await session.exec(select(ResourceModel.id, ResourceModel.resource_id))).all()  # type: ignore[reportArgumentType]
             )
+            await session.commit()
 
-        self.session.commit()
+        except SQLAlchemyError:
+            await session.rollback()
+            raise HTTPException(status_code=400, detail="Unable to collect resources.") from None
+
+        for result in results:
+            result.record_metrics("collect")
+            achievement_engine.experiences_changed(result.experience_changes)
+            for owner_id, _, _ in result.experience_changes:
+                experience_buffer.forget(owner_id)
+            for company_id, networth, money in zip(result.company_ids, result.networth, result.money, strict=True):
+                if money > 0:
+                    leaderboard.set(int(company_id), float(networth))
+        achievement_engine.leaderboard_changed()
+
+        collected: set[str] = {owner_id for result in results for owner_id in result.owner_ids}
+        missing: list[str] = [owner_id for owner_id in owner_ids or [] if owner_id not in collected]
+
+        return chain(
+            (collection for result in results for collection in _collections(result, resource_names)),
+            (CompanyCollectionPublic(owner_id=owner_id, detail="Company cannot be found.") for owner_id in missing),
+        )
 
-        return ResourceCollectionPublic.model_validate({"resources": collected_resources})
+
+def _harvest_company(session: Session, company_id: int, now: datetime) -> HarvestResult:
+    """Harvest a single active Company, taking the write lock first.
+
+    :param session: Database session, the caller is responsible for committing.
+    :param company_id: ID of the Company to harvest.
+    :param now: Time of the collection.
+    :return: Result of the harvest, empty if the Company is not active.
+    """
+    connection: Connection = session.connection()
+    lock_for_harvest(connection)
+
+    result: HarvestResult = HarvestState.load(connection, where=Company.id == company_id).tick(now)  # type: ignore[reportArgumentType]
+    result.write(connection, collected_at=now)
+    return result
+
+
+def _harvest_companies(session: Session, owner_ids: list[str] | None, now: datetime) -> list[HarvestResult]:
+    """Harvest the active Companies of the given owners, or all active Companies, in batches.
+
+    :param session: Database session, the caller is responsible for committing.
+    :param owner_ids: Owners of the Companies to harvest, all active Companies if not given.
+    :param now: Time of the collection.
+    :return: Result of each batch.
+    """
+    connection: Connection = session.connection()
+    lock_for_harvest(connection)
+
+    results: list[HarvestResult] = []
+    after: int = 0
+
+    while True:
+        if owner_ids is None:
+            state: HarvestState = HarvestState.load(
+                connection,
+                where=Company.id > after,  # type: ignore[reportOptionalOperand]
+                limit=COLLECT_BATCH_SIZE,
+            )
+        else:
+            batch: list[str] = owner_ids[after : after + COLLECT_BATCH_SIZE]
+            if not batch:
+                break
+            state = HarvestState.load(connection, where=Company.owner_id.in_(batch))  # type: ignore[reportAttributeAccessIssue]
+
+        result: HarvestResult = state.tick(now)
+        result.write(connection, collected_at=now)
+        results.append(result)
+
+        if owner_ids is None:
+            if len(result) < COLLECT_BATCH_SIZE:
+                break
+            after = int(result.company_ids[-1])
+        else:
+            after += COLLECT_BATCH_SIZE
+
+    return results
+
+
+def _collections(result: HarvestResult, resource_names: dict[int, str]) -> Iterator[CompanyCollectionPublic]:
+    """Get the collection of each Company in a harvest result.
+
+    :param result: Harvest result.
+    :param resource_names: Resource ID of each Resource, by database ID.
+    :return: Collection of each Company.
+    """
+    # The Resources of each Company are contiguous
+    bounds: list[int] = np.searchsorted(result.company_index, np.arange(len(result) + 1)).tolist()
+
+    for i, (owner_id, company_id, networth) in enumerate(
+        zip(result.owner_ids, result.company_ids.tolist(), result.networth.tolist(), strict=True)
+    ):
+        rows: slice = slice(bounds[i], bounds[i + 1])
+        yield CompanyCollectionPublic(
+            owner_id=owner_id,
+            company_id=company_id,
+            networth=networth,
+            resources=[
+                {
+                    "resource_id": resource_names[resource_id],
+                    "amount": amount,
+                    "xp_earned": xp,
+                    "money_earned": money,
+                }
+                for resource_id, amount, xp, money in zip(
+                    result.resource_ids[rows].tolist(),
+                    result.units[rows].tolist(),
+                    result.resource_xp[rows].tolist(),
+                    result.resource_money[rows].tolist(),
+                    strict=True,
+                )
+            ],
+        )
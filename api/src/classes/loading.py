@@ -0,0 +1,47 @@
+from collections.abc import Sequence
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.base import ExecutableOption
+from src.models import (
+    Company,
+    EarnedAchievements,
+    Inventory,
+    PlanetModel,
+    PlanetResourcesModel,
+    ResourceCollectorMineableResourcesModel,
+    ResourceCollectorModel,
+    ResourceModel,
+)
+
+# A loading plan is the set of loader options passed to a `fetch_*` method, so that the relationships the
+# endpoint is going to read are loaded up front, in a fixed number of queries, rather than one query per row.
+# Collections are loaded with `selectinload` (one extra query per collection), while the many-to-one
+# relationships hanging off them are loaded with `joinedload` (joined into that same query).
+type LoadingPlan = Sequence[ExecutableOption]
+
+NO_RELATIONSHIPS: LoadingPlan = ()
+
+# Company
+COMPANY_INVENTORY: LoadingPlan = (
+    selectinload(Company.inventory).joinedload(Inventory.item),  # type: ignore[reportArgumentType]
+)
+COMPANY_ACHIEVEMENTS: LoadingPlan = (
+    selectinload(Company.achievements).joinedload(EarnedAchievements.achievement),  # type: ignore[reportArgumentType]
+)
+
+# Planet
+PLANET_DETAILS: LoadingPlan = (
+    selectinload(PlanetModel.resources).joinedload(PlanetResourcesModel.resource),  # type: ignore[reportArgumentType]
+)
+
+# Resource
+RESOURCE_DETAILS: LoadingPlan = (
+    selectinload(ResourceModel.on_planets).joinedload(PlanetResourcesModel.planet),  # type: ignore[reportArgumentType]
+)
+
+# Resource Collector
+COLLECTOR_DETAILS: LoadingPlan = (
+    selectinload(ResourceCollectorModel.mineable_resources).joinedload(  # type: ignore[reportArgumentType]
+        ResourceCollectorMineableResourcesModel.resource  # type: ignore[reportArgumentType]
+    ),
+)
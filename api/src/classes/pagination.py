@@ -1,11 +1,17 @@
+import base64
+import binascii
+import json
 import math
+from bisect import bisect_left, bisect_right
 from collections.abc import Sequence
 from enum import IntEnum
 from typing import Any
 
+from fastapi import HTTPException
 from fastapi import Query as Check
 from sqlalchemy import Row, RowMapping
-from sqlmodel import Session
+from sqlmodel import and_, desc, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 class PaginationDefaults(IntEnum):
@@ -15,6 +21,16 @@ class PaginationDefaults(IntEnum):
     LIMIT = 10
 
 
+CURSOR_DESCRIPTION: str = (
+    "Cursor to continue from, taken from the `next_cursor` of the previous page. "
+    "Pass an empty cursor to start from the first page. When given, `page` is ignored."
+)
+TOTAL_DESCRIPTION: str = (
+    "Whether to count the total number of entries. Defaults to `true` when paginating by page, "
+    "and to `false` when paginating by cursor."
+)
+
+
 class Pagination:
     """Base class for pagination."""
 
@@ -22,14 +38,21 @@ class Pagination:
         self,
         page: int = Check(default=PaginationDefaults.PAGE.value, ge=1),
         limit: int = Check(default=PaginationDefaults.LIMIT.value, ge=1),
+        cursor: str | None = Check(default=None, description=CURSOR_DESCRIPTION),
+        total: bool | None = Check(default=None, description=TOTAL_DESCRIPTION),
     ) -> None:
         self.page: int = page
         self.limit: int = limit
+        self.cursor: str | None = cursor
+        self.total: bool | None = total
 
     def as_dict(self) -> dict[str, Any]:
         """Get the params as a dict."""
         res: dict[str, Any] = {"page": self.page, "limit": self.limit}
 
+        if self.cursor is not None:
+            res["cursor"] = self.cursor
+
         return res
 
 
@@ -40,10 +63,12 @@ class CompanyPagination(Pagination):
         self,
         page: int = Check(default=PaginationDefaults.PAGE.value, ge=1),
         limit: int = Check(default=PaginationDefaults.LIMIT.value, ge=1),
+        cursor: str | None = Check(default=None, description=CURSOR_DESCRIPTION),
+        total: bool | None = Check(default=None, description=TOTAL_DESCRIPTION),
         *,
         ascending: bool = False,
     ) -> None:
-        super().__init__(page=page, limit=limit)
+        super().__init__(page=page, limit=limit, cursor=cursor, total=total)
         self.ascending: bool = ascending
 
     def as_dict(self) -> dict[str, Any]:
@@ -58,12 +83,14 @@ class ShopPagination(Pagination):
         self,
         page: int = Check(default=PaginationDefaults.PAGE.value, ge=1),
         limit: int = Check(default=PaginationDefaults.LIMIT.value, ge=1),
+        cursor: str | None = Check(default=None, description=CURSOR_DESCRIPTION),
+        total: bool | None = Check(default=None, description=TOTAL_DESCRIPTION),
         *,
         ascending: bool = False,
         sort_by: str = Check(default="price", examples=["price", "quantity", "name"]),
         is_disabled: bool | None = None,
     ) -> None:
-        super().__init__(page=page, limit=limit)
+        super().__init__(page=page, limit=limit, cursor=cursor, total=total)
         self.ascending: bool = ascending
         self.sort_by: str = sort_by
         self.is_disabled: bool | None = is_disabled
@@ -74,26 +101,177 @@ class ShopPagination(Pagination):
 
 
 class Paginate:
-    """Paginate response."""
+    """Paginate response.
 
-    def __init__(self, query: Any, params: Any, session: Session) -> None:  # noqa: ANN401
+    Pages can be fetched either by page number, using `OFFSET`, or by cursor. A cursor encodes the
+    sort key and ID of the last entry of the previous page, so the next page is found by seeking
+    past it instead of skipping over every previous entry.
+    """
+
+    def __init__(
+        self,
+        query: Any,  # noqa: ANN401
+        params: Any,  # noqa: ANN401
+        session: AsyncSession,
+        sort_column: Any = None,  # noqa: ANN401
+        id_column: Any = None,  # noqa: ANN401
+    ) -> None:
         self.query: Any = query
-        self.session: Session = session
+        self.session: AsyncSession = session
         self.params: Any = params
+        self.sort_column: Any = sort_column
+        self.id_column: Any = id_column
         self.data: list[dict[str, Any]] = []
 
-        # Determining necessary variables
-        self.entry_count: int = len(self.session.exec(self.query).all())  # type: ignore[reportUnknownArgumentType]
-        self.page_count: int = 1 if self.params.limit < 1 else math.ceil(self.entry_count / self.params.limit)
+        # Determined when fetching the data
+        self.entry_count: int | None = None
+        self.page_count: int | None = None
+        self.next_cursor: str | None = None
+
+    def _sort_key(self) -> str:
+        """Get the name of the column the entries are sorted by, used to bind a cursor to its sort."""
+        return self.sort_column.key if self.sort_column is not None else self.id_column.key
+
+    def _encode_cursor(self, entry: Any) -> str:  # noqa: ANN401
+        """Create the cursor pointing after the given entry.
+
+        :param entry: Last entry of the page.
+        :return: Opaque cursor.
+        """
+        value: Any = getattr(entry, self.sort_column.key) if self.sort_column is not None else None
+        return self._make_cursor(value, getattr(entry, self.id_column.key))
+
+    def _make_cursor(self, value: Any, last_id: Any) -> str:  # noqa: ANN401
+        """Create the cursor pointing after the entry with the given sort value and ID.
+
+        :param value: Sort value of the last entry of the page.
+        :param last_id: ID of the last entry of the page.
+        :return: Opaque cursor.
+        """
+        raw: str = json.dumps([self._sort_key(), value, last_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def _decode_cursor(self, cursor: str) -> tuple[Any, Any]:
+        """Get the sort value and ID from the given cursor.
+
+        :param cursor: Opaque cursor.
+        :return: Sort value and ID of the entry the cursor points after.
+        """
+        try:
+            sort_key, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.") from None
+
+        if sort_key != self._sort_key():
+            raise HTTPException(status_code=400, detail="Cursor does not match the sort order.")
+
+        return value, last_id
+
+    def _order(self, query: Any) -> Any:  # noqa: ANN401
+        """Order the query by the sort column, using the ID to break ties."""
+        columns: list[Any] = [c for c in (self.sort_column, self.id_column) if c is not None]
+        return query.order_by(*(c if self.params.ascending else desc(c) for c in columns))
+
+    def _seek(self, query: Any, cursor: str) -> Any:  # noqa: ANN401
+        """Filter the query down to the entries after the cursor."""
+        value, last_id = self._decode_cursor(cursor)
+
+        def after(column: Any, target: Any) -> Any:  # noqa: ANN401
+            return column > target if self.params.ascending else column < target
 
-    def get_data(self) -> Sequence[Row[Any] | RowMapping | Any]:
+        if self.sort_column is None:
+            return query.where(after(self.id_column, last_id))
+
+        return query.where(
+            or_(after(self.sort_column, value), and_(self.sort_column == value, after(self.id_column, last_id)))
+        )
+
+    async def count(self) -> int:
+        """Count the entries matched by the query.
+
+        :return: Number of entries.
+        """
+        count_query: Any = select(func.count()).select_from(self.query.order_by(None).subquery())
+        self.entry_count = (await self.session.exec(count_query)).one()
+        self.page_count = 1 if self.params.limit < 1 else math.ceil(self.entry_count / self.params.limit)
+
+        return self.entry_count
+
+    async def get_data(self) -> Sequence[Row[Any] | RowMapping | Any]:
         """Get the data from the given query according to the pagination parameters.
 
         :return: Data from the given query.
         """
-        return self.session.exec(
-            self.query.offset((self.params.page - 1) * self.params.limit).limit(self.params.limit)
-        ).all()  # type: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+        use_cursor: bool = self.params.cursor is not None
+        with_total: bool = self.params.total if self.params.total is not None else not use_cursor
+
+        if with_total:
+            await self.count()
+
+        query: Any = self._order(self.query)
+
+        if use_cursor:
+            if self.params.cursor:
+                query = self._seek(query, self.params.cursor)
+        else:
+            query = query.offset((self.params.page - 1) * self.params.limit)
+
+        # Fetch one more entry than needed, to know whether there is a next page
+        data: Sequence[Any] = (await self.session.exec(query.limit(self.params.limit + 1))).all()
+
+        if len(data) > self.params.limit:
+            data = data[: self.params.limit]
+            self.next_cursor = self._encode_cursor(data[-1])
+
+        return data
+
+    def get_indexed_data(self, index: Sequence[tuple[Any, Any]]) -> list[Any]:
+        """Get the IDs of the entries of an in-memory index according to the pagination parameters.
+
+        Pages and cursors are the same as the ones of `get_data`, for an index holding the (sort value, ID) key of
+        each entry the query would match, in ascending order. Without a sort column, the keys are (ID, ID).
+
+        :param index: Sorted keys of the entries.
+        :return: IDs of the entries in the page.
+        """
+        limit: int = self.params.limit
+        use_cursor: bool = self.params.cursor is not None
+        with_total: bool = self.params.total if self.params.total is not None else not use_cursor
+
+        if with_total:
+            self.entry_count = len(index)
+            self.page_count = 1 if limit < 1 else math.ceil(self.entry_count / limit)
+
+        # Position of the first entry of the page, going through the index in the requested order
+        start: int = 0
+        if use_cursor:
+            if self.params.cursor:
+                value, last_id = self._decode_cursor(self.params.cursor)
+                after: tuple[Any, Any] = (value, last_id) if self.sort_column is not None else (last_id, last_id)
+
+                try:
+                    start = (
+                        bisect_right(index, after) if self.params.ascending else len(index) - bisect_left(index, after)
+                    )
+
+                except TypeError:
+                    raise HTTPException(status_code=400, detail="Invalid cursor.") from None
+        else:
+            start = (self.params.page - 1) * limit
+
+        if self.params.ascending:
+            keys: Sequence[tuple[Any, Any]] = index[start : start + limit + 1]
+        else:
+            stop: int = max(len(index) - start, 0)
+            keys = index[max(stop - limit - 1, 0) : stop][::-1]
+
+        if len(keys) > limit:
+            keys = keys[:limit]
+            value, last_id = keys[-1]
+            self.next_cursor = self._make_cursor(value if self.sort_column is not None else None, last_id)
+
+        return [entry_id for _, entry_id in keys]
 
     def add_data(self, data: dict[str, Any]) -> None:
         """Add data to the Page.
@@ -111,6 +289,7 @@ class Paginate:
         res: dict[str, Any] = self.params.as_dict()
         res["page_count"] = self.page_count
         res["entry_count"] = self.entry_count
+        res["next_cursor"] = self.next_cursor
 
         # Adding results
         for d in self.data:
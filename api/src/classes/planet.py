@@ -1,22 +1,24 @@
 from typing import Self
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
-from src.models import PlanetModel, PlanetPublic
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import NO_RELATIONSHIPS, LoadingPlan
+from src.models import PlanetModel, PlanetPublic, PlanetResourcesModel, ResourceModel
 
 
 class PlanetRepresentation:
     """Class representing a Planet from the database."""
 
-    def __init__(self, session: Session, planet: PlanetModel) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, planet: PlanetModel) -> None:
+        self.session: AsyncSession = session
         self.planet: PlanetModel = planet
 
     @classmethod
-    def fetch_planet(cls, session: Session, name: str) -> Self:
+    async def fetch_planet(cls, session: AsyncSession, name: str, plan: LoadingPlan = NO_RELATIONSHIPS) -> Self:
         """Fetch a planet from the database. Return class with fetched planet."""
-        fetched_planet: PlanetModel | None = session.exec(
-            select(PlanetModel).where(PlanetModel.planet_id == name)
+        fetched_planet: PlanetModel | None = (
+            await session.exec(select(PlanetModel).where(PlanetModel.planet_id == name).options(*plan))
         ).first()
 
         if fetched_planet is None:
@@ -28,8 +30,11 @@ class PlanetRepresentation:
         """Get the Planet model bound to the instance."""
         return self.planet
 
-    def get_details(self) -> PlanetPublic:
+    async def get_details(self) -> PlanetPublic:
         """Get the details of the Planet."""
         data = dict(self.planet)
-        data["available_resources"] = [r.resource.resource_id for r in self.planet.resources]
+        planet_resources: list[PlanetResourcesModel] = await self.planet.awaitable_attrs.resources
+
+        resources: list[ResourceModel] = [await r.awaitable_attrs.resource for r in planet_resources]
+        data["available_resources"] = [r.resource_id for r in resources]
         return PlanetPublic.model_validate(data)
@@ -1,22 +1,24 @@
 from typing import Self
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
-from src.models import ResourceModel, ResourcePublic
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import NO_RELATIONSHIPS, LoadingPlan
+from src.models import PlanetModel, PlanetResourcesModel, ResourceModel, ResourcePublic
 
 
 class ResourceRepresentation:
     """Class representing a Resource from the database."""
 
-    def __init__(self, session: Session, resource: ResourceModel) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, resource: ResourceModel) -> None:
+        self.session: AsyncSession = session
         self.resource: ResourceModel = resource
 
     @classmethod
-    def fetch_resource(cls, session: Session, name: str) -> Self:
+    async def fetch_resource(cls, session: AsyncSession, name: str, plan: LoadingPlan = NO_RELATIONSHIPS) -> Self:
         """Fetch a planet from the database. Return class with fetched planet."""
-        fetched_resource: ResourceModel | None = session.exec(
-            select(ResourceModel).where(ResourceModel.resource_id == name)
+        fetched_resource: ResourceModel | None = (
+            await session.exec(select(ResourceModel).where(ResourceModel.resource_id == name).options(*plan))
         ).first()
 
         if fetched_resource is None:
@@ -28,8 +30,11 @@ class ResourceRepresentation:
         """Get the Resource model bound to the instance."""
         return self.resource
 
-    def get_details(self) -> ResourcePublic:
+    async def get_details(self) -> ResourcePublic:
         """Get the details of the Planet."""
         data = dict(self.resource)
-        data["found_on"] = [p.planet.planet_id for p in self.resource.on_planets]
+        on_planets: list[PlanetResourcesModel] = await self.resource.awaitable_attrs.on_planets
+
+        planets: list[PlanetModel] = [await p.awaitable_attrs.planet for p in on_planets]
+        data["found_on"] = [p.planet_id for p in planets]
         return ResourcePublic.model_validate(data)
@@ -1,19 +1,41 @@
+import csv
+import io
+import logging
+from collections.abc import Sequence
 from typing import Any, Self
 
+import orjson
 from fastapi import HTTPException
-from sqlalchemy.exc import SQLAlchemyError
-from sqlmodel import Session, desc, not_, select
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import insert, not_, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.achievement_engine import achievement_engine
 from src.classes.pagination import Paginate, ShopPagination
+from src.leaderboard import leaderboard
+from src.metrics import items_purchased, purchases
 from src.models import (
     Company,
     Inventory,
     ShopItem,
     ShopItemCreate,
+    ShopItemImportErrorPublic,
+    ShopItemImportPublic,
     ShopItemPublic,
     ShopItemPurchase,
     ShopItemPurchasedPublic,
     ShopItemUpdate,
 )
+from src.shop_catalog import ShopCatalog, shop_catalog
+
+shop_logger = logging.getLogger(__name__)
+
+# Attempts at a purchase, while other purchases keep changing the Shop Item or the Company, before giving up
+PURCHASE_ATTEMPTS: int = 5
+# Most Shop Items a single import can hold, and Shop Items inserted per statement by an import
+IMPORT_MAX_ITEMS: int = 10000
+IMPORT_CHUNK_SIZE: int = 500
 
 
 class ShopRepresentation:
@@ -22,12 +44,12 @@ class ShopRepresentation:
     class ShopItemRepresentation:
         """Class that represents a single `item` found in the Shop."""
 
-        def __init__(self, session: Session, shop_item: ShopItem) -> None:
-            self.session: Session = session
+        def __init__(self, session: AsyncSession, shop_item: ShopItem) -> None:
+            self.session: AsyncSession = session
             self.shop_item: ShopItem = shop_item
 
         @classmethod
-        def create_shop_item(cls, session: Session, data: ShopItemCreate) -> Self:
+        async def create_shop_item(cls, session: AsyncSession, data: ShopItemCreate) -> Self:
             """Create a new Item to be added to the Shop.
 
             :param session: Database session.
@@ -36,8 +58,8 @@ class ShopRepresentation:
             """
             # Checking that an Item with the same name does not exist.
             # If so, raise exception.
-            fetched_shop_item: ShopItem | None = session.exec(
-                select(ShopItem).where(ShopItem.name == data.name)
+            fetched_shop_item: ShopItem | None = (
+                await session.exec(select(ShopItem).where(ShopItem.name == data.name))
             ).first()
 
             if fetched_shop_item is not None:
@@ -52,26 +74,85 @@ class ShopRepresentation:
             session.add(new_shop_item)
 
             try:
-                session.commit()
-                session.refresh(new_shop_item)
+                await session.commit()
+                await session.refresh(new_shop_item)
 
             except SQLAlchemyError as ex:
                 print(ex)
-                session.rollback()
+                await session.rollback()
                 raise HTTPException(status_code=400, detail="Unable to create new Shop Item.") from None
 
+            shop_catalog.put(new_shop_item)
             return cls(session=session, shop_item=new_shop_item)
 
         @classmethod
-        def fetch_shop_item(cls, session: Session, shop_item_id: int) -> Self:
+        async def create_shop_items(
+            cls, session: AsyncSession, items: Sequence[tuple[int, ShopItemCreate]]
+        ) -> tuple[list[ShopItem], list[ShopItemImportErrorPublic]]:
+            """Create many new Items to be added to the Shop at once.
+
+            The names are checked against the existing Shop Items with a single query, and the new Items are inserted
+            `IMPORT_CHUNK_SIZE` at a time, in a single transaction.
+
+            :param session: Database session.
+            :param items: Line of the import and data of each Shop Item, with unique names.
+            :return: Newly created Shop Items, and the lines that were not created as their Item already exists.
+            """
+            existing: set[str] = set(
+                (
+                    await session.exec(
+                        select(ShopItem.name).where(ShopItem.name.in_([data.name for _, data in items]))  # type: ignore[reportAttributeAccessIssue]
+                    )
+                ).all()
+            )
+            errors: list[ShopItemImportErrorPublic] = [
+                ShopItemImportErrorPublic(line=line, name=data.name, detail="Shop Item already exists.")
+                for line, data in items
+                if data.name in existing
+            ]
+            # If the quantity is 0, then it is not purchasable
+            rows: list[dict[str, Any]] = [
+                data.model_dump() | {"is_disabled": data.available_quantity == 0}
+                for _, data in items
+                if data.name not in existing
+            ]
+
+            new_shop_items: list[ShopItem] = []
+            try:
+                for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+                    new_shop_items.extend(
+                        await session.scalars(
+                            insert(ShopItem).returning(ShopItem),  # type: ignore[reportArgumentType]
+                            rows[start : start + IMPORT_CHUNK_SIZE],
+                        )
+                    )
+                await session.commit()
+
+            except IntegrityError:
+                await session.rollback()
+                raise HTTPException(
+                    status_code=409, detail="Shop Items with the same names were created meanwhile."
+                ) from None
+
+            except SQLAlchemyError:
+                shop_logger.exception("cannot create the imported shop items")
+                await session.rollback()
+                raise HTTPException(status_code=400, detail="Unable to create new Shop Items.") from None
+
+            for new_shop_item in new_shop_items:
+                shop_catalog.put(new_shop_item)
+            return new_shop_items, errors
+
+        @classmethod
+        async def fetch_shop_item(cls, session: AsyncSession, shop_item_id: int) -> Self:
             """Fetch the target Shop Item from the database.
 
             :param session: Database session.
             :param shop_item_id: ID of Shop Item to fetch.
             :return: Instance with fetched Shop Item.
             """
-            fetched_shop_item: ShopItem | None = session.exec(
-                select(ShopItem).where(ShopItem.id == shop_item_id)
+            fetched_shop_item: ShopItem | None = (
+                await session.exec(select(ShopItem).where(ShopItem.id == shop_item_id))
             ).first()
 
             if fetched_shop_item is None:
@@ -80,40 +161,41 @@ class ShopRepresentation:
             return cls(session=session, shop_item=fetched_shop_item)
 
         @classmethod
-        def fetch_shop_items(cls, session: Session, params: ShopPagination) -> dict[str, Any]:
+        async def fetch_shop_items(cls, session: AsyncSession, params: ShopPagination) -> dict[str, Any]:
             """Get the Items from the Shop, with pagination.
 
+            The Items are read from the Shop catalog, already sorted by each of the sort types.
+
             :param session: Database session.
             :param params: Pagination parameters.
             :return: Fetched Shop Items.
             """
-            q: Any = select(ShopItem)
-
-            # Get by status
-            if params.is_disabled is not None:
-                q = q.where(ShopItem.is_disabled) if params.is_disabled else q.where(not_(ShopItem.is_disabled))
+            catalog: ShopCatalog = await ShopRepresentation.get_catalog(session)
 
             # Sort by given type
+            sort_column: Any = None
             match params.sort_by:
                 case "price":
-                    q = q.order_by(desc(ShopItem.price)) if not params.ascending else q.order_by(ShopItem.price)
+                    sort_column = ShopItem.price
 
                 case "quantity":
-                    q = (
-                        q.order_by(desc(ShopItem.available_quantity))
-                        if not params.ascending
-                        else q.order_by(ShopItem.available_quantity)
-                    )
+                    sort_column = ShopItem.available_quantity
 
                 case "name":
-                    q = q.order_by(desc(ShopItem.name)) if not params.ascending else q.order_by(ShopItem.name)
+                    sort_column = ShopItem.name
 
                 case _:
                     pass
 
-            paginator: Paginate = Paginate(query=q, session=session, params=params)
+            paginator: Paginate = Paginate(
+                query=None, session=session, params=params, sort_column=sort_column, id_column=ShopItem.id
+            )
 
-            res: list[ShopItemPublic] = [ShopItemPublic.model_validate(x) for x in paginator.get_data()]
+            res: list[ShopItemPublic] = [
+                item
+                for item_id in paginator.get_indexed_data(catalog.index(params.sort_by, params.is_disabled))
+                if (item := catalog.get(item_id)) is not None
+            ]
 
             if not res:
                 raise HTTPException(status_code=404, detail="Shop Items not found.")
@@ -121,12 +203,12 @@ class ShopRepresentation:
             paginator.add_data({"shop_items": res})
             return paginator.get_page()
 
-        def purchase_item(self, company: Company, data: ShopItemPurchase) -> ShopItemPurchasedPublic:
-            """Add purchased Item to the Company's inventory.
+        def _check_purchase(self, company: Company, data: ShopItemPurchase) -> float:
+            """Check that the Company can purchase the Shop Item, as they were last read.
 
-            :param data: Data on Shop Item purchase.
             :param company: Target company purchasing the Shop Item.
-            :return: None
+            :param data: Data on Shop Item purchase.
+            :return: Cost of the purchase.
             """
             # Check if the item is not disabled.
             if self.shop_item.is_disabled:
@@ -149,65 +231,139 @@ class ShopRepresentation:
             if purchase_cost > company.networth:
                 raise HTTPException(status_code=400, detail="Cannot purchase; insufficient funds.")
 
-            # Purchase the item(s)
-            company_inventory: list[Inventory] = company.inventory
+            return purchase_cost
+
+        async def _try_purchase(self, company: Company, data: ShopItemPurchase, purchase_cost: float) -> bool:
+            """Apply the purchase, if neither the Shop Item nor the Company have changed since they were read.
 
-            if len(company_inventory) == 0:
-                # Add Item to Company Inventory
-                if company.id is not None and self.shop_item.id is not None:
-                    new_inventory_item: Inventory = Inventory(
+            :param company: Target company purchasing the Shop Item.
+            :param data: Data on Shop Item purchase.
+            :param purchase_cost: Cost of the purchase.
+            :return: Whether the purchase was applied. If not, the caller has to roll back.
+            """
+            quantity: int = data.purchase_quantity
+
+            # Take the Items out of the Shop, disabling the Item once it runs out. The stock is checked by the UPDATE
+            # itself, so purchases of the same Item do not conflict with each other, only with changes to the Item.
+            item_row: Any = (
+                await self.session.exec(
+                    update(ShopItem)
+                    .where(
+                        ShopItem.id == self.shop_item.id,  # type: ignore[reportArgumentType]
+                        ShopItem.version == self.shop_item.version,  # type: ignore[reportArgumentType]
+                        not_(ShopItem.is_disabled),
+                        ShopItem.available_quantity >= quantity,  # type: ignore[reportArgumentType]
+                    )
+                    .values(
+                        available_quantity=ShopItem.available_quantity - quantity,
+                        is_disabled=ShopItem.available_quantity - quantity < 1,
+                    )
+                    .returning(ShopItem.available_quantity, ShopItem.is_disabled)
+                    .execution_options(synchronize_session=False)
+                )  # type: ignore[reportCallIssue, reportArgumentType]
+            ).first()
+            if item_row is None:
+                return False
+
+            # Charge the Company, which goes bankrupt once it runs out of money
+            company_row: Any = (
+                await self.session.exec(
+                    update(Company)
+                    .where(
+                        Company.id == company.id,  # type: ignore[reportArgumentType]
+                        Company.version == company.version,  # type: ignore[reportArgumentType]
+                        not_(Company.is_bankrupt),
+                        Company.networth >= purchase_cost,  # type: ignore[reportArgumentType]
+                    )
+                    .values(
+                        networth=Company.networth - purchase_cost,
+                        is_bankrupt=Company.networth - purchase_cost < 1,
+                        version=Company.version + 1,
+                    )
+                    .returning(Company.networth, Company.is_bankrupt, Company.version)
+                    .execution_options(synchronize_session=False)
+                )  # type: ignore[reportCallIssue, reportArgumentType]
+            ).first()
+            if company_row is None:
+                return False
+
+            # Add the Items to the Company's inventory. No other purchase by the Company can run at the same time,
+            # since it would have changed the Company's version.
+            inventory_row: Any = (
+                await self.session.exec(
+                    update(Inventory)
+                    .where(
+                        Inventory.item_id == self.shop_item.id,  # type: ignore[reportArgumentType]
+                        Inventory.company_id == company.id,  # type: ignore[reportArgumentType]
+                    )
+                    .values(
+                        stock=Inventory.stock + quantity,
+                        total_amount_spent=Inventory.total_amount_spent + purchase_cost,
+                    )
+                    .returning(Inventory.stock)
+                    .execution_options(synchronize_session=False)
+                )  # type: ignore[reportCallIssue, reportArgumentType]
+            ).first()
+            if inventory_row is None and company.id is not None and self.shop_item.id is not None:
+                self.session.add(
+                    Inventory(
                         item_id=self.shop_item.id,
                         company_id=company.id,
-                        stock=data.purchase_quantity,
+                        stock=quantity,
                         total_amount_spent=purchase_cost,
                     )
-                    self.session.add(new_inventory_item)
-
-            else:
-                # Check if the items is present, if not, add it.
-                target_item: Inventory | None = next(
-                    filter(lambda x: x.item_id == self.shop_item.id, company_inventory), None
                 )
 
-                if target_item is None:
-                    # Create Inventory entry
-                    if company.id is not None and self.shop_item.id is not None:
-                        new_inventory_item: Inventory = Inventory(
-                            item_id=self.shop_item.id,
-                            company_id=company.id,
-                            stock=data.purchase_quantity,
-                            total_amount_spent=purchase_cost,
-                        )
-                        self.session.add(new_inventory_item)
+            # Bring the instances in line with the database, without marking them as modified
+            for attribute, value in zip(("available_quantity", "is_disabled"), item_row, strict=True):
+                set_committed_value(self.shop_item, attribute, value)
+            for attribute, value in zip(("networth", "is_bankrupt", "version"), company_row, strict=True):
+                set_committed_value(company, attribute, value)
 
-                else:
-                    # Update inventory
-                    target_item.stock += data.purchase_quantity
-                    target_item.total_amount_spent += self.shop_item.price
-                    self.session.add(target_item)
+            return True
 
-            # Update the Shop Item that was purchased
-            self.shop_item.available_quantity -= data.purchase_quantity
-            if self.shop_item.available_quantity < 1:
-                self.shop_item.is_disabled = True
-            self.session.add(self.shop_item)
+        async def purchase_item(self, company: Company, data: ShopItemPurchase) -> ShopItemPurchasedPublic:
+            """Add purchased Item to the Company's inventory.
 
-            # Update the Company
-            company.networth -= purchase_cost
-            if company.networth < 1:
-                company.is_bankrupt = True
-                self.session.add(company)
+            The stock and the funds are taken with conditional UPDATEs, which only apply if there is enough of both,
+            and if neither the Shop Item nor the Company have changed since they were read (going by their `version`).
+            If something got there first, both are read again, checked again, and the purchase is retried.
 
-            # Save changes
-            try:
-                self.session.commit()
+            :param data: Data on Shop Item purchase.
+            :param company: Target company purchasing the Shop Item.
+            :return: None
+            """
+            for _ in range(PURCHASE_ATTEMPTS):
+                purchase_cost: float = self._check_purchase(company, data)
 
-            except SQLAlchemyError:
-                self.session.rollback()
-                raise HTTPException(status_code=400, detail="Unable to purchase Shop Item.") from None
+                try:
+                    if await self._try_purchase(company, data, purchase_cost):
+                        await self.session.commit()
+                        shop_catalog.put(self.shop_item)
+                        break
+
+                except OperationalError:
+                    # The database is busy, e.g. locked by other purchases
+                    pass
+
+                except SQLAlchemyError:
+                    await self.session.rollback()
+                    raise HTTPException(status_code=400, detail="Unable to purchase Shop Item.") from None
+
+                await self.session.rollback()
+                await self.session.refresh(self.shop_item)
+                await self.session.refresh(company)
+
+            else:
+                raise HTTPException(status_code=409, detail="Cannot purchase; too many concurrent purchases.")
+
+            leaderboard.update(company)
+            achievement_engine.leaderboard_changed()
+            purchases.inc()
+            items_purchased.inc(amount=data.purchase_quantity)
 
             return ShopItemPurchasedPublic(
-                user_id=company.user.user_id,
+                user_id=company.owner_id,
                 company_id=company.id,
                 item_id=self.shop_item.id,
                 quantity=data.purchase_quantity,
@@ -229,7 +385,7 @@ class ShopRepresentation:
             """
             return ShopItemPublic.model_validate(self.shop_item)
 
-        def update(self, data: ShopItemUpdate) -> None:
+        async def update(self, data: ShopItemUpdate) -> None:
             """Update the details of the Shop Item.
 
             :param data: Data to update.
@@ -237,7 +393,15 @@ class ShopRepresentation:
             """
             has_changed: bool = False
 
-            if data.name is not None:
+            if data.name is not None and data.name != self.shop_item.name:
+                # Names are unique, cannot rename to the name of another Item.
+                fetched_shop_item: ShopItem | None = (
+                    await self.session.exec(select(ShopItem).where(ShopItem.name == data.name))
+                ).first()
+
+                if fetched_shop_item is not None:
+                    raise HTTPException(status_code=409, detail="Shop Item already exists.")
+
                 self.shop_item.name = data.name
                 has_changed = True
 
@@ -254,39 +418,104 @@ class ShopRepresentation:
                 has_changed = True
 
             if has_changed:
+                self.shop_item.version += 1
+
                 try:
                     self.session.add(self.shop_item)
-                    self.session.commit()
-                    self.session.refresh(self.shop_item)
+                    await self.session.commit()
+                    await self.session.refresh(self.shop_item)
 
                 except SQLAlchemyError:
                     raise HTTPException(status_code=500, detail="Unable to update Shop Item.") from None
 
-    def __init__(self, session: Session) -> None:
-        self.session: Session = session
+                shop_catalog.put(self.shop_item)
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session: AsyncSession = session
+
+    @staticmethod
+    async def get_catalog(session: AsyncSession) -> ShopCatalog:
+        """Get the Shop catalog, loading it from the database if it has not been loaded yet.
+
+        :param session: Database session.
+        :return: Shop catalog.
+        """
+        if not shop_catalog.loaded:
+            shop_catalog.rebuild((await session.exec(select(ShopItem))).all())
+        return shop_catalog
+
+    @classmethod
+    async def get_item_details(cls, session: AsyncSession, item_id: int) -> ShopItemPublic:
+        """Get the details of a Shop Item from the Shop catalog.
+
+        :param session: Database session.
+        :param item_id: ID of Shop Item to get.
+        :return: Shop Item details.
+        """
+        item: ShopItemPublic | None = (await cls.get_catalog(session)).get(item_id)
+
+        if item is None:
+            raise HTTPException(status_code=404, detail="Shop Item not found.")
+        return item
+
+    @classmethod
+    async def get_item_details_by_name(cls, session: AsyncSession, name: str) -> ShopItemPublic:
+        """Get the details of a Shop Item from the Shop catalog, by its name.
+
+        :param session: Database session.
+        :param name: Name of Shop Item to get.
+        :return: Shop Item details.
+        """
+        item: ShopItemPublic | None = (await cls.get_catalog(session)).get_by_name(name)
+
+        if item is None:
+            raise HTTPException(status_code=404, detail="Shop Item not found.")
+        return item
 
     @classmethod
-    def fetch_shop(cls, session: Session, params: ShopPagination) -> dict[str, Any]:
+    async def fetch_shop(cls, session: AsyncSession, params: ShopPagination) -> dict[str, Any]:
         """Get the current Shop.
 
         :param session: Database session.
         :param params: Pagination parameters.
         :return: Fetch Shop Items
         """
-        return ShopRepresentation.ShopItemRepresentation.fetch_shop_items(session=session, params=params)
+        return await ShopRepresentation.ShopItemRepresentation.fetch_shop_items(session=session, params=params)
 
     @classmethod
-    def create_item(cls, session: Session, data: ShopItemCreate) -> None:
+    async def create_item(cls, session: AsyncSession, data: ShopItemCreate) -> None:
         """Create a new Item in the Shop.
 
         :param session: Database session.
         :param data: Shop Item data.
         :return: None
         """
-        ShopRepresentation.ShopItemRepresentation.create_shop_item(session=session, data=data)
+        await ShopRepresentation.ShopItemRepresentation.create_shop_item(session=session, data=data)
 
     @classmethod
-    def update_item(cls, session: Session, data: ShopItemUpdate, item_id: int) -> None:
+    async def import_items(cls, session: AsyncSession, body: bytes, import_format: str) -> ShopItemImportPublic:
+        """Create many new Items in the Shop at once, from an import.
+
+        The lines that cannot be imported are reported, and do not prevent the other ones from being imported.
+
+        :param session: Database session.
+        :param body: Shop Items, as JSON lines or as CSV with a header line.
+        :param import_format: Format of the Shop Items: `ndjson` or `csv`.
+        :return: Number of Shop Items created, and the lines that could not be imported.
+        """
+        items, errors = _read_import(body, import_format)
+
+        created: list[ShopItem] = []
+        if items:
+            created, conflicts = await ShopRepresentation.ShopItemRepresentation.create_shop_items(
+                session=session, items=items
+            )
+            errors.extend(conflicts)
+
+        return ShopItemImportPublic(created=len(created), errors=sorted(errors, key=lambda error: error.line))
+
+    @classmethod
+    async def update_item(cls, session: AsyncSession, data: ShopItemUpdate, item_id: int) -> None:
         """Update the details of a Shop Item.
 
         :param session: Database session.
@@ -295,16 +524,89 @@ class ShopRepresentation:
         :return: None
         """
         target_item: ShopRepresentation.ShopItemRepresentation = (
-            ShopRepresentation.ShopItemRepresentation.fetch_shop_item(session=session, shop_item_id=item_id)
+            await ShopRepresentation.ShopItemRepresentation.fetch_shop_item(session=session, shop_item_id=item_id)
         )
-        target_item.update(data=data)
+        await target_item.update(data=data)
 
     @classmethod
-    def get_item(cls, session: Session, item_id: int) -> "ShopRepresentation.ShopItemRepresentation":
+    async def get_item(cls, session: AsyncSession, item_id: int) -> "ShopRepresentation.ShopItemRepresentation":
         """Get the Shop Item from the database.
 
         :param session: Database session.
         :param item_id: ID of Shop Item to get.
         :return: Fetched Shop Item.
         """
-        return ShopRepresentation.ShopItemRepresentation.fetch_shop_item(session=session, shop_item_id=item_id)
+        return await ShopRepresentation.ShopItemRepresentation.fetch_shop_item(session=session, shop_item_id=item_id)
+
+
+def _validation_detail(error: ValidationError) -> str:
+    """Describe why data could not be validated.
+
+    :param error: Validation error.
+    :return: What is wrong with each invalid field.
+    """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in details['loc'])}: {details['msg']}" if details["loc"] else details["msg"]
+        for details in error.errors()
+    )
+
+
+def _read_import(
+    body: bytes, import_format: str
+) -> tuple[list[tuple[int, ShopItemCreate]], list[ShopItemImportErrorPublic]]:
+    """Read and validate the Shop Items of an import.
+
+    :param body: Shop Items, as JSON lines or as CSV with a header line.
+    :param import_format: Format of the Shop Items: `ndjson` or `csv`.
+    :return: Line and data of each valid Shop Item, and the lines that are not valid.
+    """
+    try:
+        text: str = body.decode()
+
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import is not valid UTF-8.") from None
+
+    rows: list[tuple[int, Any]] = []
+    errors: list[ShopItemImportErrorPublic] = []
+
+    if import_format == "csv":
+        reader: csv.DictReader[str] = csv.DictReader(io.StringIO(text))
+        if missing := set(ShopItemCreate.model_fields) - set(reader.fieldnames or ()):
+            raise HTTPException(status_code=400, detail=f"Missing CSV columns: {', '.join(sorted(missing))}.")
+        rows = [(reader.line_num, row) for row in reader]
+
+    else:
+        for line, raw in enumerate(text.splitlines(), start=1):
+            if not raw.strip():
+                continue
+            try:
+                rows.append((line, orjson.loads(raw)))
+
+            except orjson.JSONDecodeError:
+                errors.append(ShopItemImportErrorPublic(line=line, name=None, detail="Invalid JSON."))
+
+    if len(rows) > IMPORT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Cannot import more than {IMPORT_MAX_ITEMS} Shop Items at once.")
+
+    items: list[tuple[int, ShopItemCreate]] = []
+    names: set[str] = set()
+
+    for line, row in rows:
+        raw_name: Any = row.get("name") if isinstance(row, dict) else None
+        name: str | None = raw_name if isinstance(raw_name, str) else None
+
+        try:
+            data: ShopItemCreate = ShopItemCreate.model_validate(row)
+
+        except ValidationError as ex:
+            errors.append(ShopItemImportErrorPublic(line=line, name=name, detail=_validation_detail(ex)))
+            continue
+
+        if data.name in names:
+            errors.append(ShopItemImportErrorPublic(line=line, name=name, detail="Duplicate Shop Item in the import."))
+            continue
+
+        names.add(data.name)
+        items.append((line, data))
+
+    return items, errors
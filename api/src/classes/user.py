@@ -1,26 +1,28 @@
 from typing import Self
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.experience import experience_buffer
 from src.models import Experience, User, UserPublic
 
 
 class UserRepresentation:
     """Class representing a `user` in the database."""
 
-    def __init__(self, session: Session, user: User) -> None:
-        self.session: Session = session
+    def __init__(self, session: AsyncSession, user: User) -> None:
+        self.session: AsyncSession = session
         self.user: User = user
 
     @classmethod
-    def fetch_user(cls, session: Session, user_id: str) -> Self:
+    async def fetch_user(cls, session: AsyncSession, user_id: str) -> Self:
         """Fetch the given User from the database.
 
         :param session: Database session.
         :param user_id: ID of the User to fetch.
         :return: Instance bound with the fetched User.
         """
-        fetched_user: User | None = session.exec(select(User).where(User.user_id == user_id)).first()
+        fetched_user: User | None = (await session.exec(select(User).where(User.user_id == user_id))).first()
 
         if fetched_user is None:
             raise HTTPException(status_code=404, detail="User not found.")
@@ -36,11 +38,10 @@ class UserRepresentation:
     def get_details(self) -> UserPublic:
         """Get the details of the User.
 
-        :return: User details.
+        :return: User details, including the experience that has not been written yet.
         """
+        experience: int = self.user.experience + experience_buffer.pending(self.user.user_id)
         return UserPublic(
             user_id=self.user.user_id,
-            experience=Experience(
-                level=Experience.level_from_experience(self.user.experience), experience=self.user.experience
-            ),
+            experience=Experience(level=Experience.level_from_experience(experience), experience=experience),
         )
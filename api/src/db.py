@@ -1,20 +1,193 @@
 import os
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator
+from contextvars import ContextVar
 from typing import Any
 
 from dotenv import find_dotenv, load_dotenv
-from sqlmodel import Session, create_engine
+from sqlalchemy import Engine, event
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .metrics import CollectedGauge, metrics_registry
+from .query_profiler import PROFILER_ENABLED, query_profiler
 
 load_dotenv(find_dotenv())
 
+
+def _to_async_url(url: str) -> str:
+    """Convert a synchronous database URL to its async driver equivalent.
+
+    :param url: Database URL, e.g. `sqlite:///data.sqlite`.
+    :return: Database URL using an async driver, e.g. `sqlite+aiosqlite:///data.sqlite`.
+    """
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+
+    return url
+
+
+def _is_file_sqlite(url: str) -> bool:
+    """Check if the given URL points to an on-disk SQLite database.
+
+    :param url: Database URL.
+    :return: Whether the URL is a file-backed SQLite database.
+    """
+    return url.startswith("sqlite") and ":memory:" not in url and not url.rstrip("/").endswith(":")
+
+
 DATABASE_URL: str = os.environ["DATABASE"]
+ASYNC_DATABASE_URL: str = os.environ.get("ASYNC_DATABASE", _to_async_url(DATABASE_URL))
+
+# Connection pool configuration
+POOL_SIZE: int = int(os.environ.get("DATABASE_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW: int = int(os.environ.get("DATABASE_POOL_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT: float = float(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+
+# SQLite pragmas, applied to every new connection
+SQLITE_PRAGMAS: dict[str, str] = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", str(-64 * 1024)),
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"),
+}
+
+
+class PoolMetrics:
+    """Running totals describing how long requests wait to get a database connection."""
+
+    def __init__(self) -> None:
+        self.checkouts: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+
+    def record_wait(self, wait: float) -> None:
+        """Record the time spent waiting for a connection.
+
+        :param wait: Seconds waited.
+        :return: None
+        """
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the metrics, along with the current state of the pool, as a dict."""
+        pool: Any = async_engine.pool
+
+        return {
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if isinstance(pool, QueuePool) else None,
+            "checked_out": pool.checkedout() if isinstance(pool, QueuePool) else None,
+            "overflow": pool.overflow() if isinstance(pool, QueuePool) else None,
+            "checkouts": self.checkouts,
+            "avg_wait_ms": (self.total_wait / self.checkouts) * 1000 if self.checkouts else 0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class QueryCounter:
+    """Number of SQL statements executed while handling a single request, and the time spent executing them."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.duration: float = 0
+        # When the statement being executed started
+        self.started: float = 0
+
+
+# Set for the duration of each request by `QueryCountMiddleware`.
+query_counter: ContextVar[QueryCounter | None] = ContextVar("query_counter", default=None)
+
+
+def _pool_options(url: str) -> dict[str, Any]:
+    """Get the pool options for the async engine.
+
+    The aiosqlite dialect defaults to `NullPool` for on-disk databases, opening a new connection
+    (and worker thread) per session. Use a bounded queue pool instead.
+    """
+    if url.startswith("sqlite") and not _is_file_sqlite(url):
+        return {}
+
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection: DBAPIConnection, connection_record: ConnectionPoolEntry) -> None:  # noqa: ARG001
+    """Apply the configured pragmas to a newly opened SQLite connection."""
+    cursor: Any = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _count_query(*_: object) -> None:
+    """Count a statement against the request being handled, if any."""
+    counter: QueryCounter | None = query_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.started = time.perf_counter()
+
+
+def _time_query(*_: object) -> None:
+    """Add the time spent executing a statement to the request being handled, if any.
+
+    The statements of a request are executed one after the other, so the statement that just completed is the one
+    `_count_query` last started.
+    """
+    counter: QueryCounter | None = query_counter.get()
+    if counter is not None:
+        counter.duration += time.perf_counter() - counter.started
+
+
+def _register_pragmas(bind: Engine, url: str) -> None:
+    """Register the pragma listener on the engine, if it is a SQLite engine."""
+    if url.startswith("sqlite"):
+        event.listen(bind, "connect", _set_sqlite_pragmas)
+
+
+# Synchronous engine, used for creating the tables and populating the game config at startup, and by the
+# harvest scheduler thread.
 engine = create_engine(DATABASE_URL, echo=False)
-session = Session(bind=engine, autoflush=True)
+async_engine: AsyncEngine = create_async_engine(ASYNC_DATABASE_URL, echo=False, **_pool_options(ASYNC_DATABASE_URL))
+
+_register_pragmas(engine, DATABASE_URL)
+_register_pragmas(async_engine.sync_engine, ASYNC_DATABASE_URL)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+event.listen(async_engine.sync_engine, "after_cursor_execute", _time_query)
+
+if PROFILER_ENABLED:
+    query_profiler.instrument(engine)
+    query_profiler.instrument(async_engine.sync_engine)
+
+SessionFactory: async_sessionmaker[AsyncSession] = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=True, expire_on_commit=False
+)
+pool_metrics: PoolMetrics = PoolMetrics()
+
+metrics_registry.register(
+    CollectedGauge(
+        "db_connections_checked_out",
+        "Database connections checked out of the pool.",
+        lambda: async_engine.pool.checkedout() if isinstance(async_engine.pool, QueuePool) else None,
+    )
+)
+
 
+async def get_session() -> AsyncGenerator[AsyncSession, Any]:
+    """Get a database session for the duration of a request."""
+    async with SessionFactory() as session:
+        # Acquire the connection up front, so the time spent waiting on the pool can be measured.
+        start: float = time.perf_counter()
+        await session.connection()
+        pool_metrics.record_wait(time.perf_counter() - start)
 
-def get_session() -> Generator[Session, Any, Any]:
-    """Get a database session."""
-    try:
         yield session
-    finally:
-        session.close()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+from contextlib import suppress
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .achievement_engine import achievement_engine
+from .db import async_engine
+from .models import User
+
+experience_logger = logging.getLogger(__name__)
+
+# Experience buffer configuration
+FLUSH_INTERVAL: float = float(os.environ.get("XP_FLUSH_INTERVAL", "5"))
+FLUSH_SIZE: int = int(os.environ.get("XP_FLUSH_SIZE", "500"))
+
+
+class ExperienceBuffer:
+    """In-memory buffer of the experience awarded to Users, written to the database in bulk.
+
+    The experience awarded to each User is added up, and written with a single executemany every `flush_interval`
+    seconds, or as soon as `flush_size` Users have experience pending, and when the app shuts down.
+
+    To work out level ups without reading the User every time, the experience of each User awarded experience is
+    read once per flush, and the experience awarded since is added to it. Changes made to the experience in the
+    meantime by other means (e.g. by the harvest scheduler) are only seen after the next flush.
+
+    Each flush reads back the experience it wrote, and hands the change to the achievement engine.
+    """
+
+    def __init__(self, flush_interval: float, flush_size: int) -> None:
+        self.flush_interval: float = flush_interval
+        self.flush_size: int = flush_size
+
+        # Experience awarded to each User, not written yet
+        self._pending: dict[str, int] = {}
+        # Experience being written by the flush in progress
+        self._flushing: dict[str, int] = {}
+        # Experience of each User in the database, as read since the last flush
+        self._stored: dict[str, int] = {}
+        # Number of flushes completed
+        self._generation: int = 0
+
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._flushes: set[asyncio.Task[int]] = set()
+
+    def pending(self, user_id: str) -> int:
+        """Get the experience awarded to the User that is not in the database yet.
+
+        :param user_id: ID of the User.
+        :return: Pending experience.
+        """
+        return self._pending.get(user_id, 0) + self._flushing.get(user_id, 0)
+
+    def add(self, user_id: str, experience: int) -> None:
+        """Award experience to the User, without checking that the User exists.
+
+        :param user_id: ID of the User.
+        :param experience: Experience to add.
+        :return: None
+        """
+        if experience == 0:
+            return
+
+        self._pending[user_id] = self._pending.get(user_id, 0) + experience
+
+        if len(self._pending) >= self.flush_size and not self._flushes:
+            flush: asyncio.Task[int] = asyncio.get_running_loop().create_task(self.flush())
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def add_to_user(self, session: AsyncSession, user_id: str, experience: int) -> tuple[int, int] | None:
+        """Award experience to the User.
+
+        :param session: Database session, used to read the User's experience if it is not known yet.
+        :param user_id: ID of the User.
+        :param experience: Experience to add.
+        :return: Experience of the User before and after, or None if the User does not exist.
+        """
+        while (stored := self._stored.get(user_id)) is None:
+            generation: int = self._generation
+            read: int | None = (await session.exec(select(User.experience).where(User.user_id == user_id))).first()
+            if read is None:
+                return None
+
+            if generation == self._generation and not self._flushing:
+                self._stored[user_id] = read
+            else:
+                # A flush overlapped the read, which may or may not include the experience it wrote. Read again
+                # once it is done.
+                async with self._lock:
+                    pass
+
+        before: int = stored + self.pending(user_id)
+        self.add(user_id, experience)
+        return before, before + experience
+
+    def forget(self, user_id: str) -> None:
+        """Forget the experience of the User read from the database, e.g. after it has been set.
+
+        :param user_id: ID of the User.
+        :return: None
+        """
+        self._stored.pop(user_id, None)
+
+    async def flush(self) -> int:
+        """Write the pending experience to the database.
+
+        If the write fails, the experience is kept pending and written by the next flush.
+
+        :return: Number of Users whose experience was written.
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+
+            self._flushing, self._pending = self._pending, {}
+
+            try:
+                async with async_engine.begin() as connection:
+                    await connection.execute(
+                        update(User)
+                        .where(User.user_id == bindparam("b_id"))  # type: ignore[reportArgumentType]
+                        .values(experience=User.experience + bindparam("b_xp")),
+                        [{"b_id": user_id, "b_xp": experience} for user_id, experience in self._flushing.items()],
+                    )
+                    written: list[tuple[str, int]] = list(
+                        (
+                            await connection.execute(
+                                select(User.user_id, User.experience).where(User.user_id.in_(self._flushing))  # type: ignore[reportAttributeAccessIssue]
+                            )
+                        ).all()  # type: ignore[reportArgumentType]
+                    )
+
+            except SQLAlchemyError:
+                experience_logger.exception("cannot write the pending experience, keeping it for the next flush")
+                for user_id, experience in self._flushing.items():
+                    self._pending[user_id] = self._pending.get(user_id, 0) + experience
+                self._flushing = {}
+                return 0
+
+            for user_id, experience in written:
+                achievement_engine.experience_changed(user_id, experience - self._flushing[user_id], experience)
+
+            flushed: int = len(self._flushing)
+            self._flushing = {}
+            self._stored = {}
+            self._generation += 1
+
+        experience_logger.debug(f"wrote the pending experience of {flushed} users")
+        return flushed
+
+    async def _run(self) -> None:
+        """Flush the buffer every `flush_interval` seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start flushing the buffer periodically. Must be called from the event loop serving the requests.
+
+        :return: None
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop flushing the buffer periodically, and write what is still pending.
+
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await self.flush()
+
+
+experience_buffer: ExperienceBuffer = ExperienceBuffer(FLUSH_INTERVAL, FLUSH_SIZE)
@@ -0,0 +1,126 @@
+import csv
+import io
+import logging
+import os
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import datetime
+from typing import Any
+
+import orjson
+from sqlalchemy import Boolean, DateTime, Row, select
+from sqlalchemy.types import TypeEngine
+
+from .db import async_engine
+from .models import Company, Inventory, User
+
+export_logger = logging.getLogger(__name__)
+
+# Rows read from the database and encoded at a time, which bounds the memory used by an export
+CHUNK_SIZE: int = int(os.environ.get("EXPORT_CHUNK_SIZE", "1000"))
+
+# Columns of each table that can be exported. The rows are exported in order of their primary key.
+EXPORT_COLUMNS: dict[str, tuple[Any, ...]] = {
+    "companies": (
+        Company.id,
+        Company.created,
+        Company.is_bankrupt,
+        Company.networth,
+        Company.name,
+        Company.owner_id,
+        Company.current_planet,
+        Company.last_resource_collect,
+    ),
+    "inventories": (Inventory.company_id, Inventory.item_id, Inventory.stock, Inventory.total_amount_spent),
+    "users": (User.user_id, User.registered, User.experience),
+}
+# Media type of each format, which is also the extension of the exported file
+EXPORT_FORMATS: dict[str, str] = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+# Conversions of the values `csv` would not write the same way as NDJSON, by column type
+_CSV_CONVERSIONS: dict[type[TypeEngine[Any]], Callable[[Any], str]] = {
+    Boolean: lambda value: "true" if value else "false",
+    DateTime: datetime.isoformat,
+}
+
+type CSVConversion = tuple[int, Callable[[Any], str]]
+
+
+def _csv_conversions(columns: Sequence[Any]) -> list[CSVConversion]:
+    """Get the conversions to apply to the values of the columns before writing them as CSV.
+
+    :param columns: Exported columns.
+    :return: Position of each column to convert, and its conversion.
+    """
+    return [
+        (position, conversion)
+        for position, column in enumerate(columns)
+        for column_type, conversion in _CSV_CONVERSIONS.items()
+        if isinstance(column.type, column_type)
+    ]
+
+
+def _convert(row: Sequence[Any], conversions: Sequence[CSVConversion]) -> list[Any]:
+    """Convert the values of a row to be written as CSV.
+
+    :param row: Row read from the database.
+    :param conversions: Conversions of the columns.
+    :return: Values to write.
+    """
+    values: list[Any] = list(row)
+    for position, conversion in conversions:
+        if values[position] is not None:
+            values[position] = conversion(values[position])
+    return values
+
+
+def _encode_ndjson(rows: Sequence[Row[Any]]) -> bytes:
+    """Encode rows as one JSON object per line.
+
+    :param rows: Rows to encode.
+    :return: Encoded rows.
+    """
+    return b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: Sequence[Sequence[Any]], conversions: Sequence[CSVConversion]) -> bytes:
+    """Encode rows as CSV lines.
+
+    :param rows: Rows to encode.
+    :param conversions: Conversions of the columns.
+    :return: Encoded rows.
+    """
+    buffer: io.StringIO = io.StringIO()
+    csv.writer(buffer).writerows((_convert(row, conversions) for row in rows) if conversions else rows)
+    return buffer.getvalue().encode()
+
+
+async def export_rows(table: str, export_format: str) -> AsyncIterator[bytes]:
+    """Read every row of a table from a server-side cursor, and encode them as they are read.
+
+    Only `CHUNK_SIZE` rows are held in memory at a time, however large the table is. The rows are read in a single
+    transaction, so the export is a consistent snapshot of the table.
+
+    :param table: Table to export, one of `EXPORT_COLUMNS`.
+    :param export_format: Format to export the rows in, one of `EXPORT_FORMATS`.
+    :return: Chunks of the export.
+    """
+    columns: tuple[Any, ...] = EXPORT_COLUMNS[table]
+    conversions: list[CSVConversion] = _csv_conversions(columns)
+
+    if export_format == "csv":
+        yield _encode_csv([[column.key for column in columns]], [])
+
+    exported: int = 0
+    async with async_engine.connect() as connection:
+        result = await connection.stream(
+            select(*columns)
+            .order_by(*(column for column in columns if column.primary_key))
+            .execution_options(yield_per=CHUNK_SIZE)
+        )
+
+        async for rows in result.partitions():
+            yield _encode_csv(rows, conversions) if export_format == "csv" else _encode_ndjson(rows)
+            exported += len(rows)
+
+    export_logger.debug(f"exported {exported} {table} as {export_format}")
@@ -0,0 +1,505 @@
+import logging
+from datetime import datetime
+from typing import Any, Self
+
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import (
+    ColumnElement,
+    Compiled,
+    Connection,
+    Executable,
+    String,
+    bindparam,
+    insert,
+    select,
+    type_coerce,
+    update,
+)
+from sqlmodel import not_
+
+from .metrics import experience_awarded, units_harvested
+from .models import Company, CompanyResource, PlanetModel, PlanetResourcesModel, ResourceModel, User
+from .resource_collector import ResourceCollector
+
+harvest_logger = logging.getLogger(__name__)
+
+# Codes of the decay functions in `HarvestState.kind`
+LINEAR: int = 0
+GEOMETRIC: int = 1
+EXPONENTIAL: int = 2
+DECAY_KINDS: dict[str, int] = {"linear": LINEAR, "geometric": GEOMETRIC, "exponential": EXPONENTIAL}
+
+type FloatArray = NDArray[np.float64]
+type IntArray = NDArray[np.int64]
+type DatetimeArray = NDArray[np.datetime64]
+
+# Timestamps are stored as naive local times, kept to the microsecond like the database does
+DATETIME: np.dtype[np.datetime64] = np.dtype("datetime64[us]")
+EPOCH: np.timedelta64 = np.timedelta64(ResourceCollector.epoch_definition, "us")
+
+
+def units_left(kind: NDArray[np.int8], factor: FloatArray, init_units: FloatArray, epoch: FloatArray) -> FloatArray:
+    """Vectorized version of `DecayFunction`: the units left of each resource at the given epoch.
+
+    :param kind: Decay function of each resource, see `DECAY_KINDS`.
+    :param factor: Decay factor of each resource.
+    :param init_units: Initial amount of units of each resource.
+    :param epoch: Epoch of each resource.
+    :return: Units left, rounded.
+    """
+    # Every decay function is evaluated for every resource, so silence the warnings of the ones that do not apply
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        linear: FloatArray = init_units - epoch * factor
+        geometric: FloatArray = init_units * factor**epoch
+        exponential: FloatArray = init_units * np.exp(-epoch / factor)
+
+    # Like `round`, `np.round` rounds halves to even
+    return np.round(np.select([kind == LINEAR, kind == GEOMETRIC], [linear, geometric], exponential))
+
+
+def last_epoch(kind: NDArray[np.int8], factor: FloatArray, init_units: FloatArray) -> FloatArray:
+    """Vectorized version of `DecayFunction.last_epoch`: the last epoch at which the units left are not negative.
+
+    :param kind: Decay function of each resource, see `DECAY_KINDS`.
+    :param factor: Decay factor of each resource.
+    :param init_units: Initial amount of units of each resource.
+    :return: Last epoch, or infinity for the resources whose units left are never negative.
+    """
+    is_linear: NDArray[np.bool_] = kind == LINEAR
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        last: FloatArray = np.where(is_linear, np.floor((init_units + 0.5) / factor), np.inf)
+
+    # Absorb any floating point error around the boundary
+    last = np.where(is_linear & (units_left(kind, factor, init_units, last + 1) >= 0), last + 1, last)
+    return np.where(is_linear & (units_left(kind, factor, init_units, last) < 0), last - 1, last)
+
+
+def _executemany(connection: Connection, statement: Executable, params: dict[str, list[Any]]) -> None:
+    """Execute the statement once for each set of parameters, handing them straight to the driver.
+
+    SQLAlchemy would otherwise process each set of parameters in Python, which is most of the time spent when
+    updating 100k rows. Only the parameters whose type needs converting for the driver (e.g. datetimes on SQLite)
+    are processed.
+
+    :param connection: Database connection.
+    :param statement: Statement to execute.
+    :param params: Values of each parameter, all of the same length.
+    :return: None
+    """
+    compiled: Compiled = statement.compile(dialect=connection.dialect)
+
+    for name in params:
+        processor: Any = compiled.binds[name].type.dialect_impl(connection.dialect).bind_processor(connection.dialect)
+        if processor is not None:
+            params[name] = [processor(value) for value in params[name]]
+
+    if compiled.positiontup is not None:
+        rows: list[Any] = list(zip(*(params[name] for name in compiled.positiontup), strict=True))
+    else:
+        rows = [dict(zip(params, values, strict=True)) for values in zip(*params.values(), strict=True)]
+
+    connection.exec_driver_sql(str(compiled), rows)
+
+
+class HarvestResult:
+    """Result of a harvesting tick.
+
+    The money, XP and networth are summed up per Company, while the harvested units and the new state of each
+    Resource are kept per Resource.
+    """
+
+    def __init__(self, state: "HarvestState", units: FloatArray, accrued: NDArray[np.bool_]) -> None:
+        companies: int = len(state.company_ids)
+
+        # One entry per Resource
+        self.company_index: IntArray = state.company_index
+        self.resource_ids: IntArray = state.resource_ids
+        self.units: FloatArray = units
+        self.resource_money: FloatArray = units * state.unit_price
+        self.resource_xp: FloatArray = units * state.unit_xp
+
+        # One entry per Company
+        self.company_ids: IntArray = state.company_ids
+        self.owner_ids: list[str] = state.owner_ids
+        self.money: FloatArray = np.bincount(self.company_index, weights=self.resource_money, minlength=companies)
+        self.xp: FloatArray = np.bincount(self.company_index, weights=self.resource_xp, minlength=companies)
+        self.networth: FloatArray = state.networth + self.money
+
+        # New state of each Resource
+        self.init_units: FloatArray = state.init_units
+        self.units_left: FloatArray = units_left(state.kind, state.factor, state.init_units, state.epoch)
+        self.epoch: FloatArray = state.epoch
+        self.last_accrual: DatetimeArray = state.last_accrual
+        self.is_new: NDArray[np.bool_] = state.is_new
+        self.accrued: NDArray[np.bool_] = accrued
+
+        # Owner, experience before and experience after of each User awarded experience, once written
+        self.experience_changes: list[tuple[str, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.company_ids)
+
+    def record_metrics(self, source: str) -> None:
+        """Add the units harvested and the experience earned to the game engine metrics, once they are committed.
+
+        :param source: What harvested the Resources, e.g. `scheduler`.
+        :return: None
+        """
+        units_harvested.inc(source, amount=float(self.units.sum()))
+        # Experience is written as a whole number
+        experience_awarded.inc(source, amount=int(np.floor(self.xp).sum()))
+
+    def _write_resources(self, connection: Connection) -> None:
+        """Save the state of the Resources that are new or have been harvested."""
+        company_ids: IntArray = self.company_ids[self.company_index]
+
+        new: NDArray[np.bool_] = self.is_new
+        if new.any():
+            _executemany(
+                connection,
+                insert(CompanyResource),
+                {
+                    "company_id": company_ids[new].tolist(),
+                    "resource_id": self.resource_ids[new].tolist(),
+                    "init_units": self.init_units[new].tolist(),
+                    "units_left": self.units_left[new].tolist(),
+                    "epoch": self.epoch[new].astype(np.int64).tolist(),
+                    "last_accrual": self.last_accrual[new].tolist(),
+                },
+            )
+
+        changed: NDArray[np.bool_] = self.accrued & ~new
+        if changed.any():
+            _executemany(
+                connection,
+                update(CompanyResource)
+                .where(CompanyResource.company_id == bindparam("b_company_id"))  # type: ignore[reportArgumentType]
+                .where(CompanyResource.resource_id == bindparam("b_resource_id"))  # type: ignore[reportArgumentType]
+                .values(
+                    units_left=bindparam("b_units_left"),
+                    epoch=bindparam("b_epoch"),
+                    last_accrual=bindparam("b_last_accrual"),
+                ),
+                {
+                    "b_company_id": company_ids[changed].tolist(),
+                    "b_resource_id": self.resource_ids[changed].tolist(),
+                    "b_units_left": self.units_left[changed].tolist(),
+                    "b_epoch": self.epoch[changed].astype(np.int64).tolist(),
+                    "b_last_accrual": self.last_accrual[changed].tolist(),
+                },
+            )
+
+    def write(self, connection: Connection, collected_at: datetime | None = None) -> list[tuple[str, int, int]]:
+        """Save the state of the Resources, and add the money and XP earned to the Companies and their owners.
+
+        Each table is updated with a single executemany. The money and XP are added to the current values rather
+        than overwriting them, so changes made since the state was loaded are kept. The experience of the owners is
+        read back in the same transaction, for the caller to hand the changes to the achievement engine once
+        committed.
+
+        :param connection: Database connection.
+        :param collected_at: Time of collection to record on every Company, if the tick was a collection.
+        :return: Owner, experience before and experience after of each User awarded experience.
+        """
+        self._write_resources(connection)
+
+        if collected_at is not None and len(self):
+            connection.execute(
+                update(Company)
+                .where(Company.id.in_(self.company_ids.tolist()))  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+                .values(last_resource_collect=collected_at)
+            )
+
+        earned: NDArray[np.bool_] = (self.money > 0) | (self.xp >= 1)
+        if not earned.any():
+            return self.experience_changes
+
+        company_ids: list[int] = self.company_ids[earned].tolist()
+        owner_ids: list[str] = [owner_id for owner_id, e in zip(self.owner_ids, earned, strict=True) if e]
+
+        _executemany(
+            connection,
+            update(Company)
+            .where(Company.id == bindparam("b_id"))  # type: ignore[reportArgumentType]
+            .values(networth=Company.networth + bindparam("b_money")),
+            {"b_id": company_ids, "b_money": self.money[earned].tolist()},
+        )
+
+        # Experience is stored as a whole number
+        experience: list[int] = np.floor(self.xp[earned]).astype(np.int64).tolist()
+        _executemany(
+            connection,
+            update(User)
+            .where(User.user_id == bindparam("b_id"))  # type: ignore[reportArgumentType]
+            .values(experience=User.experience + bindparam("b_xp")),
+            {"b_id": owner_ids, "b_xp": experience},
+        )
+
+        # The updated rows stay locked until committed, so the experience read back is the one just written
+        awarded: dict[str, int] = {}
+        for owner_id, xp in zip(owner_ids, experience, strict=True):
+            awarded[owner_id] = awarded.get(owner_id, 0) + xp
+
+        self.experience_changes = [
+            (owner_id, after - awarded[owner_id], after)
+            for owner_id, after in connection.execute(
+                select(User.user_id, User.experience).where(User.user_id.in_(awarded))  # type: ignore[reportAttributeAccessIssue]
+            ).all()
+            if awarded[owner_id] > 0
+        ]
+        return self.experience_changes
+
+
+class HarvestState:
+    """Resource state of a set of active Companies, as arrays with one entry per Resource on the Company's Planet."""
+
+    def __init__(
+        self,
+        company_ids: IntArray,
+        owner_ids: list[str],
+        networth: FloatArray,
+        company_index: IntArray,
+        resource_ids: IntArray,
+        kind: NDArray[np.int8],
+        factor: FloatArray,
+        init_units: FloatArray,
+        epoch: FloatArray,
+        last_accrual: DatetimeArray,
+        is_new: NDArray[np.bool_],
+        unit_price: FloatArray,
+        unit_xp: FloatArray,
+    ) -> None:
+        # One entry per Company
+        self.company_ids: IntArray = company_ids
+        self.owner_ids: list[str] = owner_ids
+        self.networth: FloatArray = networth
+
+        # One entry per Resource, `company_index` being the position of its Company in the arrays above
+        self.company_index: IntArray = company_index
+        self.resource_ids: IntArray = resource_ids
+        self.kind: NDArray[np.int8] = kind
+        self.factor: FloatArray = factor
+        self.init_units: FloatArray = init_units
+        self.epoch: FloatArray = epoch
+        self.last_accrual: DatetimeArray = last_accrual
+        # Resources that have no stored state yet
+        self.is_new: NDArray[np.bool_] = is_new
+        self.unit_price: FloatArray = unit_price
+        self.unit_xp: FloatArray = unit_xp
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @classmethod
+    def _empty(cls) -> Self:
+        ints: IntArray = np.empty(0, np.int64)
+        floats: FloatArray = np.empty(0)
+        return cls(
+            ints,
+            [],
+            floats,
+            ints,
+            ints,
+            np.empty(0, np.int8),
+            floats,
+            floats,
+            floats,
+            np.empty(0, DATETIME),
+            np.empty(0, np.bool_),
+            floats,
+            floats,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        connection: Connection,
+        where: ColumnElement[bool] | None = None,
+        limit: int | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> Self:
+        """Load the Resources found on the Planet of the active Companies, in order of Company ID.
+
+        Resources carry on from their stored state. Those that have none yet start at epoch 0 with a random amount
+        of units, like a new `Resource` does, and have been harvested up to the last collection of their Company.
+
+        :param connection: Database connection.
+        :param where: Filter on the Companies to load, all of them if not given.
+        :param limit: Maximum number of Companies to load.
+        :param rng: Random generator used for the initial amount of units.
+        :return: Loaded state.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+
+        q: Any = (
+            select(
+                Company.id,
+                Company.owner_id,
+                Company.networth,
+                Company.current_planet,
+                _raw_datetime(Company.last_resource_collect),
+            )
+            .where(not_(Company.is_bankrupt))
+            .order_by(Company.id)  # type: ignore[reportArgumentType]
+        )
+        if where is not None:
+            q = q.where(where)
+        if limit is not None:
+            q = q.limit(limit)
+
+        companies: list[Any] = list(connection.execute(q).all())
+        # There are far fewer Planets than Companies, so the Resources are loaded per Planet and then spread out
+        resources: list[Any] = list(
+            connection.execute(
+                select(
+                    PlanetModel.planet_id,
+                    ResourceModel.id,
+                    ResourceModel.decay_function,
+                    ResourceModel.decay_factor,
+                    ResourceModel.init_units,
+                    ResourceModel.unit_price,
+                    ResourceModel.unit_xp,
+                )
+                .join(PlanetResourcesModel, PlanetResourcesModel.planet_id == PlanetModel.id)  # type: ignore[reportArgumentType]
+                .join(ResourceModel, ResourceModel.id == PlanetResourcesModel.resource_id)  # type: ignore[reportArgumentType]
+                .order_by(PlanetModel.planet_id)
+            ).all()
+        )
+
+        if not companies or not resources:
+            return cls._empty()
+
+        ids, owners, networths, current_planets, last_collects = zip(*companies, strict=True)
+        planets, resource_ids, kinds, factors, inits, prices, xps = zip(*resources, strict=True)
+        company_ids: IntArray = np.array(ids, np.int64)
+
+        # Find the Resources of each Company's Planet, which are contiguous as they are sorted by Planet
+        resource_planets: NDArray[np.str_] = np.array(planets)
+        company_planets: NDArray[np.str_] = np.array(current_planets)
+        first: IntArray = np.searchsorted(resource_planets, company_planets, side="left")
+        counts: IntArray = np.searchsorted(resource_planets, company_planets, side="right") - first
+
+        company_index: IntArray = np.repeat(np.arange(len(companies)), counts)
+        rows: IntArray = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(len(company_index))
+        row_resource_ids: IntArray = np.array(resource_ids, np.int64)[rows]
+
+        # Match each Resource with its stored state, if any
+        states: list[Any] = list(
+            connection.execute(
+                select(
+                    CompanyResource.company_id,
+                    CompanyResource.resource_id,
+                    CompanyResource.init_units,
+                    CompanyResource.epoch,
+                    _raw_datetime(CompanyResource.last_accrual),
+                ).where(CompanyResource.company_id.between(int(company_ids[0]), int(company_ids[-1])))  # type: ignore[reportAttributeAccessIssue]
+            ).all()
+        )
+        # Resources without one are new, and have been mined since the last collection of their Company
+        found: NDArray[np.bool_] = np.zeros(len(rows), np.bool_)
+        init_units: FloatArray = np.array(inits, np.float64)[rows] * rng.normal(1, 1 / 30, len(rows))
+        epoch: FloatArray = np.zeros(len(rows))
+        last_accrual: DatetimeArray = np.array(last_collects, DATETIME)[company_index]
+
+        if states:
+            state_companies, state_resources, state_inits, state_epochs, state_accruals = zip(*states, strict=True)
+            state_keys: IntArray = _state_key(np.array(state_companies, np.int64), np.array(state_resources, np.int64))
+            order: IntArray = np.argsort(state_keys)
+            state_keys = state_keys[order]
+
+            row_keys: IntArray = _state_key(company_ids[company_index], row_resource_ids)
+            position: IntArray = np.minimum(np.searchsorted(state_keys, row_keys), len(state_keys) - 1)
+            found = state_keys[position] == row_keys
+
+            init_units = np.where(found, np.array(state_inits, np.float64)[order][position], init_units)
+            epoch = np.where(found, np.array(state_epochs, np.float64)[order][position], epoch)
+            last_accrual = np.where(found, np.array(state_accruals, DATETIME)[order][position], last_accrual)
+
+        kind_codes: NDArray[np.int8] = np.array([DECAY_KINDS[kind] for kind in kinds], np.int8)
+
+        return cls(
+            company_ids=company_ids,
+            owner_ids=list(owners),
+            networth=np.array(networths, np.float64),
+            company_index=company_index,
+            resource_ids=row_resource_ids,
+            kind=kind_codes[rows],
+            factor=np.array(factors, np.float64)[rows],
+            init_units=init_units,
+            epoch=epoch,
+            last_accrual=last_accrual,
+            is_new=~found,
+            unit_price=np.array(prices, np.float64)[rows],
+            unit_xp=np.array(xps, np.float64)[rows],
+        )
+
+    def tick(self, now: datetime) -> HarvestResult:
+        """Harvest every Resource for each full epoch elapsed since it was last harvested, like collecting does.
+
+        The rest of the time carries over to the next tick.
+
+        :param now: Time up to which to harvest.
+        :return: Units harvested, money and XP earned, and the new state of the Resources.
+        """
+        epochs: IntArray = np.maximum((np.datetime64(now, "us") - self.last_accrual) // EPOCH, 0)
+        accrued: NDArray[np.bool_] = epochs > 0
+
+        target: FloatArray = np.minimum(self.epoch + epochs, last_epoch(self.kind, self.factor, self.init_units))
+        new_epoch: FloatArray = np.where(target - self.epoch >= 1, target, self.epoch)
+
+        units: FloatArray = units_left(self.kind, self.factor, self.init_units, self.epoch) - units_left(
+            self.kind, self.factor, self.init_units, new_epoch
+        )
+        self.epoch = new_epoch
+        self.last_accrual = self.last_accrual + epochs * EPOCH
+
+        result: HarvestResult = HarvestResult(self, units, accrued)
+
+        # The state now matches the one in the result, which is saved by `HarvestResult.write`
+        self.networth = result.networth
+        self.is_new = np.zeros(len(self), np.bool_)
+        return result
+
+
+def lock_for_harvest(connection: Connection) -> None:
+    """Start a transaction in which to load, harvest and write a state.
+
+    On SQLite, the write lock is taken up front, so the state cannot be changed by another connection between loading
+    and writing it. Must be called before anything else is executed in the transaction.
+
+    :param connection: Database connection.
+    :return: None
+    """
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _raw_datetime(column: Any) -> Any:  # noqa: ANN401
+    """Select a datetime column as returned by the driver, to be parsed by NumPy.
+
+    NumPy parses the strings stored by SQLite much faster than SQLAlchemy does, and also takes the datetimes returned
+    by other drivers.
+    """
+    return type_coerce(column, String)
+
+
+def _state_key(company_ids: IntArray, resource_ids: IntArray) -> IntArray:
+    """Combine Company and Resource IDs into a single sortable key."""
+    return company_ids << 32 | resource_ids
+
+
+def run_tick(connection: Connection, now: datetime | None = None) -> HarvestResult:
+    """Harvest the Resources of every active Company, and save the money and XP they earned.
+
+    :param connection: Database connection, the caller is responsible for committing.
+    :param now: Time up to which to harvest, the current time if not given.
+    :return: Units harvested, money and XP earned, and the new state of the Resources.
+    """
+    state: HarvestState = HarvestState.load(connection)
+    result: HarvestResult = state.tick(now if now is not None else datetime.now())  # noqa: DTZ005
+    result.write(connection)
+
+    harvest_logger.debug(f"harvested {len(state)} resources for {len(result)} companies")
+    return result
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from src.models import Company
+
+leaderboard_logger = logging.getLogger(__name__)
+
+type LeaderboardKey = tuple[float, int]
+
+
+class _Node:
+    """Node of an `IndexableSkipList`."""
+
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, level: int) -> None:  # noqa: ANN401
+        self.key: Any = key
+        self.next: list[_Node | None] = [None] * level
+        # Number of level-0 steps that each link skips over
+        self.width: list[int] = [1] * level
+
+
+class IndexableSkipList:
+    """Sorted collection of unique keys that supports lookups by position.
+
+    Insertion, removal, finding the position of a key and finding the key at a position all run in
+    O(log n) expected time.
+    """
+
+    MAX_LEVEL: int = 32
+
+    def __init__(self) -> None:
+        self._head: _Node = _Node(None, self.MAX_LEVEL)
+        self._size: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def _random_level(cls) -> int:
+        """Get the number of levels of a new node."""
+        level: int = 1
+        while level < cls.MAX_LEVEL and random.random() < 0.5:  # noqa: S311, PLR2004
+            level += 1
+        return level
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[Any]) -> Self:
+        """Build a skip list from keys that are already sorted, in O(n) time.
+
+        :param keys: Unique keys, in ascending order.
+        :return: Skip list holding the keys.
+        """
+        skip_list: Self = cls()
+
+        # Last node linked at each level, and its position
+        last: list[_Node] = [skip_list._head] * cls.MAX_LEVEL  # noqa: SLF001
+        last_position: list[int] = [0] * cls.MAX_LEVEL
+
+        position: int = 0
+        for key in keys:
+            position += 1
+            node: _Node = _Node(key, cls._random_level())
+
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+
+        # The last link of each level runs past the end of the list
+        for level in range(cls.MAX_LEVEL):
+            last[level].width[level] = position + 1 - last_position[level]
+
+        skip_list._size = position  # noqa: SLF001
+        return skip_list
+
+    def insert(self, key: Any) -> None:  # noqa: ANN401
+        """Insert a key.
+
+        :param key: Key to insert. Must not already be present.
+        :return: None
+        """
+        chain: list[_Node] = [self._head] * self.MAX_LEVEL
+        steps_at_level: list[int] = [0] * self.MAX_LEVEL
+
+        node: _Node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while (nxt := node.next[level]) is not None and nxt.key <= key:
+                steps_at_level[level] += node.width[level]
+                node = nxt
+            chain[level] = node
+
+        new_level: int = self._random_level()
+        new_node: _Node = _Node(key, new_level)
+
+        steps: int = 0
+        for level in range(new_level):
+            prev: _Node = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+
+        for level in range(new_level, self.MAX_LEVEL):
+            chain[level].width[level] += 1
+
+        self._size += 1
+
+    def remove(self, key: Any) -> None:  # noqa: ANN401
+        """Remove a key.
+
+        :param key: Key to remove.
+        :return: None
+        """
+        chain: list[_Node] = [self._head] * self.MAX_LEVEL
+
+        node: _Node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while (nxt := node.next[level]) is not None and nxt.key < key:
+                node = nxt
+            chain[level] = node
+
+        target: _Node | None = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev: _Node = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+
+        for level in range(len(target.next), self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+
+    def index(self, key: Any) -> int:  # noqa: ANN401
+        """Get the position of a key.
+
+        :param key: Key to find.
+        :return: 0-based position of the key.
+        """
+        position: int = 0
+
+        node: _Node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while (nxt := node.next[level]) is not None and nxt.key <= key:
+                position += node.width[level]
+                node = nxt
+
+        if node is self._head or node.key != key:
+            raise KeyError(key)
+
+        return position - 1
+
+    def slice(self, start: int, stop: int) -> list[Any]:
+        """Get the keys between two positions.
+
+        :param start: 0-based position of the first key.
+        :param stop: 0-based position after the last key.
+        :return: Keys in order.
+        """
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+
+        # Walk down to the node at `start`
+        remaining: int = start + 1
+        node: _Node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]  # type: ignore[reportAssignmentType]
+
+        res: list[Any] = []
+        current: _Node | None = node
+        while current is not None and len(res) < stop - start:
+            res.append(current.key)
+            current = current.next[0]
+
+        return res
+
+
+class Leaderboard:
+    """In-memory ranking of the active Companies by networth.
+
+    The richest Company is ranked first, ties are ranked by which Company was created first.
+    Each worker process keeps its own copy, which is rebuilt from the database at startup and then periodically
+    by the harvest scheduler. The changes made while a rebuild is being read are carried over to it when it is
+    swapped in, so they are not lost until the next rebuild.
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[int, LeaderboardKey] = {}
+        self._ranking: IndexableSkipList = IndexableSkipList()
+        # When each Company was last moved, since the last rebuild, going by `time.monotonic`
+        self._changed_at: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _key(company_id: int, networth: float) -> LeaderboardKey:
+        return -networth, company_id
+
+    def rebuild(self, entries: Iterable[tuple[int, float]]) -> None:
+        """Replace the leaderboard with the given entries.
+
+        :param entries: Company IDs and networths.
+        :return: None
+        """
+        self._keys = {company_id: self._key(company_id, networth) for company_id, networth in entries}
+        self._ranking = IndexableSkipList.from_sorted(sorted(self._keys.values()))
+        self._changed_at = {}
+
+        leaderboard_logger.debug(f"leaderboard rebuilt with {len(self._keys)} companies")
+
+    def replace(self, other: Leaderboard, since: float) -> None:
+        """Take over the contents of another leaderboard, e.g. one rebuilt in the background.
+
+        The Companies moved on this leaderboard since the other one started being read are moved on it too, as it
+        may not include their changes.
+
+        :param other: Leaderboard to take the contents of.
+        :param since: When the other leaderboard started being read, going by `time.monotonic`.
+        :return: None
+        """
+        for company_id, changed_at in self._changed_at.items():
+            if changed_at < since:
+                continue
+
+            key: LeaderboardKey | None = self._keys.get(company_id)
+            if key is None:
+                other.discard(company_id)
+            else:
+                other.set(company_id, -key[0])
+
+        self._keys, self._ranking = other._keys, other._ranking  # noqa: SLF001
+        self._changed_at = {}
+
+    def set(self, company_id: int, networth: float) -> None:
+        """Add the Company to the leaderboard, or move it to its new position.
+
+        :param company_id: ID of the Company.
+        :param networth: Current networth of the Company.
+        :return: None
+        """
+        key: LeaderboardKey = self._key(company_id, networth)
+        old_key: LeaderboardKey | None = self._keys.get(company_id)
+
+        if old_key == key:
+            return
+
+        if old_key is not None:
+            self._ranking.remove(old_key)
+
+        self._ranking.insert(key)
+        self._keys[company_id] = key
+        self._changed_at[company_id] = time.monotonic()
+
+    def discard(self, company_id: int) -> None:
+        """Remove the Company from the leaderboard, if it is on it.
+
+        :param company_id: ID of the Company.
+        :return: None
+        """
+        old_key: LeaderboardKey | None = self._keys.pop(company_id, None)
+
+        if old_key is not None:
+            self._ranking.remove(old_key)
+            self._changed_at[company_id] = time.monotonic()
+
+    def update(self, company: Company) -> None:
+        """Bring the leaderboard in line with the given Company.
+
+        :param company: Company that has changed.
+        :return: None
+        """
+        if company.id is None:
+            return
+
+        if company.is_bankrupt:
+            self.discard(company.id)
+        else:
+            self.set(company.id, company.networth)
+
+    def rank(self, company_id: int) -> int | None:
+        """Get the rank of the Company.
+
+        :param company_id: ID of the Company.
+        :return: 1-based rank, or None if the Company is not on the leaderboard.
+        """
+        key: LeaderboardKey | None = self._keys.get(company_id)
+
+        if key is None:
+            return None
+
+        return self._ranking.index(key) + 1
+
+    def top(self, limit: int, offset: int = 0) -> list[tuple[int, int, float]]:
+        """Get the Companies at the top of the leaderboard.
+
+        :param limit: Number of Companies to get.
+        :param offset: Number of Companies to skip.
+        :return: Rank, Company ID and networth of each Company.
+        """
+        return [
+            (offset + i + 1, company_id, -negative_networth)
+            for i, (negative_networth, company_id) in enumerate(self._ranking.slice(offset, offset + limit))
+        ]
+
+
+leaderboard: Leaderboard = Leaderboard()
@@ -2,10 +2,21 @@ import logging
 import sys
 from pathlib import Path
 
+from src.achievement_engine import achievement_logger
+from src.classes.shop import shop_logger
 from src.company import company_logger
+from src.experience import experience_logger
+from src.export import export_logger
+from src.harvest import harvest_logger
+from src.leaderboard import leaderboard_logger
+from src.middleware import query_logger
+from src.migrations import migration_logger
 from src.planet import planet_logger
+from src.query_profiler import profiler_logger
 from src.resource import resource_logger
 from src.resource_collector import collector_logger
+from src.scheduler import scheduler_logger
+from src.shop_catalog import catalog_logger
 from src.yaml_reader import yaml_logger
 
 root = Path()  # application root
@@ -21,10 +32,21 @@ cmd_handler.setLevel(logging.INFO)
 cmd_handler.setFormatter(formatter)
 
 for logger in [
+    achievement_logger,
     company_logger,
+    experience_logger,
+    export_logger,
+    harvest_logger,
+    leaderboard_logger,
+    migration_logger,
+    query_logger,
     planet_logger,
+    profiler_logger,
     resource_logger,
     collector_logger,
+    scheduler_logger,
+    shop_logger,
+    catalog_logger,
     yaml_logger,
 ]:
     logger.addHandler(debug_handler)
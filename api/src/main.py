@@ -1,29 +1,93 @@
 import sys
+from collections.abc import Sequence
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any
+from typing import Any
 
 from fastapi import FastAPI
 from sqlalchemy.exc import SQLAlchemyError
-from sqlmodel import Session, SQLModel, select
-from src.db import engine
+from sqlmodel import Session, SQLModel, insert, not_, select
+from src.achievement_engine import achievement_engine
+from src.autocomplete import collector_index, planet_index, resource_index
+from src.db import async_engine, engine
+from src.experience import experience_buffer
+from src.leaderboard import leaderboard
+from src.middleware import MetricsMiddleware, QueryCountMiddleware, QueryProfilerMiddleware
+from src.migrations import run_migrations
+from src.query_profiler import PROFILER_ENABLED
+from src.scheduler import SCHEDULER_ENABLED, harvest_scheduler
+from src.shop_catalog import shop_catalog
 from src.yaml_reader import YamlReader
 from uvicorn import run
 
 from .models import (
+    Company,
+    ConfigFingerprint,
     PlanetModel,
     PlanetResourcesModel,
     ResourceCollectorMineableResourcesModel,
     ResourceCollectorModel,
     ResourceModel,
+    ShopItem,
 )
 from .planet import Planet
-from .routers import achievement, collector, company, planet, resource, shop, user
-
-if TYPE_CHECKING:
-    from collections.abc import Sequence
+from .routers import (
+    achievement,
+    autocomplete,
+    collector,
+    company,
+    database,
+    export,
+    harvest,
+    metrics,
+    planet,
+    resource,
+    shop,
+    user,
+)
 
 SQLModel.metadata.create_all(bind=engine)
 
+try:
+    run_migrations(engine)
+
+except SQLAlchemyError as ex:
+    print(f"Cannot apply database migrations: {ex}")
+    sys.exit(1)
+
+
+def _config_unchanged(session: Session, filename: str, fingerprint: str) -> bool:
+    """Check if the config file has already been loaded, unchanged, into the database.
+
+    :param session: Database session.
+    :param filename: Name of the config file.
+    :param fingerprint: Hash of the current config file.
+    :return: Whether the stored hash matches the current one.
+    """
+    stored: ConfigFingerprint | None = session.get(ConfigFingerprint, filename)
+    return stored is not None and stored.sha256 == fingerprint
+
+
+def _record_config(session: Session, filename: str, fingerprint: str) -> None:
+    """Store the hash of a config file that has been loaded, to be committed with the loaded rows.
+
+    :param session: Database session.
+    :param filename: Name of the config file.
+    :param fingerprint: Hash of the config file.
+    :return: None
+    """
+    session.merge(ConfigFingerprint(filename=filename, sha256=fingerprint))
+
+
+def _bulk_insert(session: Session, rows: Sequence[SQLModel]) -> None:
+    """Insert rows of the same model with a single executemany, rather than one INSERT per row.
+
+    :param session: Database session.
+    :param rows: Rows to insert.
+    :return: None
+    """
+    if rows:
+        session.exec(insert(type(rows[0])), params=[row.model_dump(exclude={"id"}) for row in rows])  # type: ignore[reportCallIssue, reportArgumentType]
+
 
 def _populate_achievements() -> None:
     """Populate the Achievements table."""
@@ -54,13 +118,8 @@ def _populate_achievements() -> None:
     ]
 
     with Session(engine) as session:
-        for ach in all_achievements:
-            found: AchievementModel | None = session.exec(
-                select(AchievementModel).where(AchievementModel.name == ach.name)
-            ).first()
-
-            if found is None:
-                session.add(ach)
+        existing: set[str] = set(session.exec(select(AchievementModel.name)).all())
+        _bulk_insert(session, [ach for ach in all_achievements if ach.name not in existing])
 
         try:
             session.commit()
@@ -73,37 +132,37 @@ def _populate_achievements() -> None:
 
 def _populate_planets() -> None:
     """Populate the Planets table with what is in the config."""
-    # Default starting planet
-    starting_planet: dict[str, Any] = {
-        "planet_id": "EA0000",
-        "name": "Earth",
-        "tier": 0,
-        "description": "This empty husk used to be the most magnificent green world, believe it or not",
-    }
-
-    planets: dict[str, Any] = YamlReader("Planet.yaml").contents
+    fingerprint: str = YamlReader.fingerprint("Planet.yaml")
 
     with Session(engine) as session:
-        # insert default starting planet
-        fetched_starting_planet: PlanetModel | None = session.exec(
-            select(PlanetModel).where(PlanetModel.planet_id == starting_planet["planet_id"])
-        ).first()
-
-        if not fetched_starting_planet:
-            session.add(PlanetModel.model_validate(starting_planet))
-
-        for planet_id, data in planets.items():
-            # Check if the Planet exists.
-            # Only store if it does not exists
-            fetched_planet: PlanetModel | None = session.exec(
-                select(PlanetModel).where(PlanetModel.planet_id == planet_id)
-            ).first()
-
-            if fetched_planet is None:
-                # Add new planet to the
-                data["planet_id"] = planet_id
-                new_planet: PlanetModel = PlanetModel.model_validate(data)
-                session.add(new_planet)
+        if _config_unchanged(session, "Planet.yaml", fingerprint):
+            return
+
+        # Default starting planet
+        starting_planet: dict[str, Any] = {
+            "planet_id": "EA0000",
+            "name": "Earth",
+            "tier": 0,
+            "description": "This empty husk used to be the most magnificent green world, believe it or not",
+        }
+
+        # The default starting planet takes precedence over its entry in the config
+        planets: dict[str, Any] = YamlReader("Planet.yaml").contents
+        planets = {starting_planet["planet_id"]: starting_planet} | {
+            planet_id: data for planet_id, data in planets.items() if planet_id != starting_planet["planet_id"]
+        }
+
+        # Only store the Planets that do not exist yet
+        existing: set[str] = set(session.exec(select(PlanetModel.planet_id)).all())
+        _bulk_insert(
+            session,
+            [
+                PlanetModel.model_validate(data | {"planet_id": planet_id})
+                for planet_id, data in planets.items()
+                if planet_id not in existing
+            ],
+        )
+        _record_config(session, "Planet.yaml", fingerprint)
 
         try:
             session.commit()
@@ -116,21 +175,25 @@ def _populate_planets() -> None:
 
 def _populate_resources() -> None:
     """Populate the Resources table with what is in the config."""
-    resource_contents: dict[str, Any] = YamlReader("Resource.yaml").contents
+    fingerprint: str = YamlReader.fingerprint("Resource.yaml")
 
     with Session(engine) as session:
-        for resource_id, data in resource_contents.items():
-            # Check if the resource exists.
-            # Only store if it does not exists
-            fetched_resource: ResourceModel | None = session.exec(
-                select(ResourceModel).where(ResourceModel.resource_id == resource_id)
-            ).first()
-
-            if fetched_resource is None:
-                # Add new resource to the
-                data["resource_id"] = resource_id
-                new_resource: ResourceModel = ResourceModel.model_validate(data)
-                session.add(new_resource)
+        if _config_unchanged(session, "Resource.yaml", fingerprint):
+            return
+
+        resource_contents: dict[str, Any] = YamlReader("Resource.yaml").contents
+
+        # Only store the Resources that do not exist yet
+        existing: set[str] = set(session.exec(select(ResourceModel.resource_id)).all())
+        _bulk_insert(
+            session,
+            [
+                ResourceModel.model_validate(data | {"resource_id": resource_id})
+                for resource_id, data in resource_contents.items()
+                if resource_id not in existing
+            ],
+        )
+        _record_config(session, "Resource.yaml", fingerprint)
 
         try:
             session.commit()
@@ -143,39 +206,46 @@ def _populate_resources() -> None:
 
 def _populate_resource_collectors() -> None:
     """Populate the Resource Collectors table with what is in the config."""
-    resource_collectors: dict[str, Any] = YamlReader("ResourceCollector.yaml").contents
+    fingerprint: str = YamlReader.fingerprint("ResourceCollector.yaml")
 
     with Session(engine) as session:
-        for collector_id, data in resource_collectors.items():
-            # Check if the resource exists.
-            # Only store if it exists
-            fetched_collector: ResourceCollectorModel | None = session.exec(
-                select(ResourceCollectorModel).where(ResourceCollectorModel.collector_id == collector_id)
-            ).first()
-
-            if fetched_collector is None:
-                # Add new collector to the
-                data["collector_id"] = collector_id
-                new_collector: ResourceCollectorModel = ResourceCollectorModel.model_validate(data)
-                session.add(new_collector)
-                session.flush()
-                session.refresh(new_collector)
-
-                # Adding the items
-                for item in data["resources"]:
-                    # Check that the item exists, if not, ignore
-                    fetched_item: ResourceModel | None = session.exec(
-                        select(ResourceModel).where(ResourceModel.resource_id == item)
-                    ).first()
-
-                    if fetched_item is not None:
-                        new_collector_item: ResourceCollectorMineableResourcesModel = (
-                            ResourceCollectorMineableResourcesModel.model_validate(
-                                {"resource_collector_id": new_collector.id, "resource_id": fetched_item.id}
-                            )
-                        )
-
-                        session.add(new_collector_item)
+        if _config_unchanged(session, "ResourceCollector.yaml", fingerprint):
+            return
+
+        resource_collectors: dict[str, Any] = YamlReader("ResourceCollector.yaml").contents
+
+        # Only store the Collectors that do not exist yet
+        existing: set[str] = set(session.exec(select(ResourceCollectorModel.collector_id)).all())
+        new_collectors: list[str] = [
+            collector_id for collector_id in resource_collectors if collector_id not in existing
+        ]
+        _bulk_insert(
+            session,
+            [
+                ResourceCollectorModel.model_validate(
+                    resource_collectors[collector_id] | {"collector_id": collector_id}
+                )
+                for collector_id in new_collectors
+            ],
+        )
+
+        # Adding the items, ignoring the Resources that do not exist
+        collector_ids: dict[str, int] = dict(
+            session.exec(select(ResourceCollectorModel.collector_id, ResourceCollectorModel.id)).all()  # type: ignore[reportArgumentType]
+        )
+        resource_ids: dict[str, int] = dict(session.exec(select(ResourceModel.resource_id, ResourceModel.id)).all())  # type: ignore[reportArgumentType]
+        _bulk_insert(
+            session,
+            [
+                ResourceCollectorMineableResourcesModel(
+                    resource_collector_id=collector_ids[collector_id], resource_id=resource_ids[item]
+                )
+                for collector_id in new_collectors
+                for item in dict.fromkeys(resource_collectors[collector_id]["resources"])
+                if item in resource_ids
+            ],
+        )
+        _record_config(session, "ResourceCollector.yaml", fingerprint)
 
         try:
             session.commit()
@@ -189,29 +259,32 @@ def _populate_resource_collectors() -> None:
 def _populate_resources_on_planet() -> None:
     """Populate the Planet Resources tables with Resources found on the planet."""
     with Session(engine) as session:
-        fetched_planets: Sequence[PlanetModel] = session.exec(select(PlanetModel)).all()
+        # Only the Planets that have no Resources yet
+        fetched_planets: Sequence[PlanetModel] = session.exec(
+            select(PlanetModel).where(PlanetModel.id.not_in(select(PlanetResourcesModel.planet_id)))  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+        ).all()
+
+        if not fetched_planets:
+            return
+
+        fetched_resources: Sequence[ResourceModel] = session.exec(select(ResourceModel)).all()
+
+        new_planet_resources: list[PlanetResourcesModel] = []
 
         for pp in fetched_planets:
-            if len(pp.resources) == 0:
-                p: Planet = Planet(tier=pp.tier)
-                p.spawn_resources()
-
-                for r in p.resources:
-                    # Add the resource to the planet.
-                    # If not exists
-                    planet_resource: PlanetResourcesModel | None = session.exec(
-                        select(PlanetResourcesModel).where(
-                            PlanetResourcesModel.planet_id == pp.id,
-                            PlanetResourcesModel.resource_id == r.id,
-                        )
-                    ).first()
-                    if planet_resource is None:
-                        new_planet_resource: PlanetResourcesModel = PlanetResourcesModel(
-                            planet_id=pp.id,  # type: ignore[reportArgumentType]
-                            resource_id=r.id,  # type: ignore[reportArgumentType]
-                        )
-                        session.add(new_planet_resource)
-                        session.flush()
+            if pp.id is None:
+                continue
+
+            p: Planet = Planet(tier=pp.tier, available_resources=fetched_resources)
+            p.spawn_resources(fetched_resources)
+
+            # Add each spawned Resource to the Planet once
+            new_planet_resources.extend(
+                PlanetResourcesModel(planet_id=pp.id, resource_id=resource_id)
+                for resource_id in dict.fromkeys(r.id for r in p.resources if r.id is not None)
+            )
+
+        _bulk_insert(session, new_planet_resources)
 
         try:
             session.commit()
@@ -222,6 +295,44 @@ def _populate_resources_on_planet() -> None:
             sys.exit(0)
 
 
+def _populate_leaderboard() -> None:
+    """Build the leaderboard from the active Companies."""
+    with Session(engine) as session:
+        leaderboard.rebuild(session.exec(select(Company.id, Company.networth).where(not_(Company.is_bankrupt))).all())  # type: ignore[reportArgumentType]
+
+
+def _populate_shop_catalog() -> None:
+    """Load the Shop catalog from the Shop Items."""
+    with Session(engine) as session:
+        shop_catalog.rebuild(session.exec(select(ShopItem)).all())
+
+
+def _populate_autocomplete() -> None:
+    """Index the names and IDs of the Planets, Resources and Resource Collectors, to find them by prefix."""
+    with Session(engine) as session:
+        planet_index.rebuild(
+            ((planet_id, name), name, planet_id)
+            for planet_id, name in session.exec(select(PlanetModel.planet_id, PlanetModel.name)).all()
+        )
+        resource_index.rebuild(
+            ((resource_id, name), name, resource_id)
+            for resource_id, name in session.exec(select(ResourceModel.resource_id, ResourceModel.name)).all()
+        )
+        collector_index.rebuild(
+            ((collector_id, name), name, collector_id)
+            for collector_id, name in session.exec(
+                select(ResourceCollectorModel.collector_id, ResourceCollectorModel.name)
+            ).all()
+        )
+
+
+def _populate_achievement_engine() -> None:
+    """Load the rules of the achievement engine, and check the Companies already at the top of the leaderboard."""
+    with Session(engine) as session:
+        achievement_engine.load(session)
+    achievement_engine.leaderboard_changed()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001, ANN201
     _populate_achievements()
@@ -232,10 +343,30 @@ async def lifespan(app: FastAPI):  # noqa: ARG001, ANN201
     _populate_resource_collectors()
     _populate_resources_on_planet()
 
+    _populate_leaderboard()
+    _populate_shop_catalog()
+    _populate_autocomplete()
+    _populate_achievement_engine()
+
+    if SCHEDULER_ENABLED:
+        harvest_scheduler.start()
+    experience_buffer.start()
+    achievement_engine.start()
+
     yield
 
+    harvest_scheduler.stop()
+    await experience_buffer.stop()
+    await achievement_engine.stop()
+    await async_engine.dispose()
+
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+# Added after `MetricsMiddleware`, so it wraps it and counts the statements of the requests it records
+app.add_middleware(QueryCountMiddleware)
+if PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
 app.include_router(company.router)
 app.include_router(user.router)
 app.include_router(shop.router)
@@ -243,6 +374,11 @@ app.include_router(achievement.router)
 app.include_router(planet.router)
 app.include_router(resource.router)
 app.include_router(collector.router)
+app.include_router(database.router)
+app.include_router(harvest.router)
+app.include_router(autocomplete.router)
+app.include_router(export.router)
+app.include_router(metrics.router)
 
 
 def main() -> None:
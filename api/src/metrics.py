@@ -0,0 +1,276 @@
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+# Media type of the Prometheus text exposition format
+CONTENT_TYPE: str = "text/plain; version=0.0.4"
+
+# Buckets of the histograms, in seconds or number of statements
+LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+DB_TIME_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+DB_QUERY_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Route label of the requests that did not match any route
+UNMATCHED_ROUTE: str = "<unmatched>"
+
+type Labels = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value as the exposition format expects it.
+
+    :param value: Value of the sample.
+    :return: Formatted value.
+    """
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format the labels of a sample, escaping their values.
+
+    :param names: Names of the labels.
+    :param values: Values of the labels.
+    :return: Formatted labels, empty if there are none.
+    """
+    if not names:
+        return ""
+
+    escaped: Iterator[str] = (value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped, strict=True)) + "}"
+
+
+class Metric:
+    """Metric kept without locks, for the event loop and the harvest scheduler thread to update it concurrently.
+
+    Each thread updates its own shard of the values, by label values, and nothing else, so no update is ever lost.
+    The shards are only added up when the metrics are exposed.
+    """
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labels: tuple[str, ...] = tuple(labels)
+
+        # Values of each thread, by label values
+        self._shards: dict[int, dict[Labels, Any]] = {}
+
+    def _shard(self) -> dict[Labels, Any]:
+        """Get the shard of the current thread, which only the thread ever modifies.
+
+        :return: Values of the thread, by label values.
+        """
+        shard: dict[Labels, Any] | None = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards[threading.get_ident()] = {}
+        return shard
+
+    def _snapshots(self) -> list[dict[Labels, Any]]:
+        """Copy the shards of every thread, as they are being modified.
+
+        :return: Values of each thread, by label values.
+        """
+        return [shard.copy() for shard in list(self._shards.values())]
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        """Get the samples of the metric.
+
+        :return: Suffix of the name, label names, label values and value of each sample.
+        """
+        totals: dict[Labels, float] = {}
+        for snapshot in self._snapshots():
+            for labels, value in snapshot.items():
+                totals[labels] = totals.get(labels, 0) + value
+
+        for labels, value in sorted(totals.items()):
+            yield "", self.labels, labels, value
+
+    def render(self) -> str:
+        """Get the metric in the text exposition format.
+
+        :return: Help and type lines, followed by one line per sample.
+        """
+        lines: list[str] = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(
+            f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}"
+            for suffix, names, values, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Total that only ever goes up, e.g. the number of requests served."""
+
+    kind: str = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add to the total.
+
+        :param labels: Value of each label.
+        :param amount: Amount to add, not negative.
+        :return: None
+        """
+        shard: dict[Labels, float] = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, e.g. the number of requests in progress."""
+
+    kind: str = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add to the value.
+
+        :param labels: Value of each label.
+        :param amount: Amount to add.
+        :return: None
+        """
+        shard: dict[Labels, float] = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        """Take away from the value.
+
+        :param labels: Value of each label.
+        :param amount: Amount to take away.
+        :return: None
+        """
+        shard: dict[Labels, float] = self._shard()
+        shard[labels] = shard.get(labels, 0) - amount
+
+
+class CollectedGauge(Metric):
+    """Value read only when the metrics are exposed, e.g. from the state of the connection pool."""
+
+    kind: str = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], float | None]) -> None:
+        super().__init__(name, documentation)
+        self.collect: Callable[[], float | None] = collect
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        """Get the current value, if there is one.
+
+        :return: Suffix of the name, label names, label values and value of the sample.
+        """
+        if (value := self.collect()) is not None:
+            yield "", (), (), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values, counted into buckets, e.g. the latency of the requests."""
+
+    kind: str = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Count a value into its bucket.
+
+        :param value: Observed value.
+        :param labels: Value of each label.
+        :return: None
+        """
+        shard: dict[Labels, list[float]] = self._shard()
+        cells: list[float] | None = shard.get(labels)
+        if cells is None:
+            # Count of each bucket, then of the values above the last bucket, then the sum of the values
+            cells = shard[labels] = [0] * (len(self.buckets) + 2)
+
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        """Get the cumulative count of each bucket, and the sum and count of the values.
+
+        :return: Suffix of the name, label names, label values and value of each sample.
+        """
+        totals: dict[Labels, list[float]] = {}
+        for snapshot in self._snapshots():
+            for labels, cells in snapshot.items():
+                total: list[float] = totals.setdefault(labels, [0] * len(cells))
+                for position, cell in enumerate(list(cells)):
+                    total[position] += cell
+
+        bucket_labels: tuple[str, ...] = (*self.labels, "le")
+        for labels, cells in sorted(totals.items()):
+            cumulative: float = 0
+            for bound, cell in zip((*self.buckets, math.inf), cells, strict=False):
+                cumulative += cell
+                yield "_bucket", bucket_labels, (*labels, _format_value(bound)), cumulative
+            yield "_sum", self.labels, labels, cells[-1]
+            yield "_count", self.labels, labels, cumulative
+
+
+class MetricsRegistry:
+    """Metrics of the API, exposed together in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register[T: Metric](self, metric: T) -> T:
+        """Add a metric to the exposed ones.
+
+        :param metric: Metric to add, with a name no other metric has.
+        :return: The metric.
+        """
+        if metric.name in self._metrics:
+            msg = f"A metric named {metric.name} is already registered"
+            raise ValueError(msg)
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Get every metric in the text exposition format.
+
+        :return: Exposed metrics.
+        """
+        return "".join(f"{metric.render()}\n" for metric in self._metrics.values())
+
+
+metrics_registry: MetricsRegistry = MetricsRegistry()
+
+# Requests
+http_requests: Counter = metrics_registry.register(
+    Counter("http_requests_total", "Requests served.", ("method", "route", "status"))
+)
+http_request_duration: Histogram = metrics_registry.register(
+    Histogram("http_request_duration_seconds", "Time spent serving requests.", ("method", "route"), LATENCY_BUCKETS)
+)
+http_requests_in_progress: Gauge = metrics_registry.register(
+    Gauge("http_requests_in_progress", "Requests being served.", ("method",))
+)
+http_request_db_queries: Histogram = metrics_registry.register(
+    Histogram("http_request_db_queries", "SQL statements executed per request.", ("method", "route"), DB_QUERY_BUCKETS)
+)
+http_request_db_duration: Histogram = metrics_registry.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Time spent executing SQL statements per request.",
+        ("method", "route"),
+        DB_TIME_BUCKETS,
+    )
+)
+
+# Game engine
+units_harvested: Counter = metrics_registry.register(
+    Counter("game_units_harvested_total", "Units of Resources harvested.", ("source",))
+)
+experience_awarded: Counter = metrics_registry.register(
+    Counter("game_experience_awarded_total", "Experience awarded to Users.", ("source",))
+)
+purchases: Counter = metrics_registry.register(Counter("game_purchases_total", "Shop Item purchases."))
+items_purchased: Counter = metrics_registry.register(
+    Counter("game_items_purchased_total", "Shop Items purchased, counting each of the quantity.")
+)
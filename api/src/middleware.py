@@ -0,0 +1,139 @@
+import logging
+import time
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .db import QueryCounter, query_counter
+from .metrics import (
+    UNMATCHED_ROUTE,
+    http_request_db_duration,
+    http_request_db_queries,
+    http_request_duration,
+    http_requests,
+    http_requests_in_progress,
+)
+from .query_profiler import RequestProfile, query_profiler, request_profile
+
+query_logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """Count the SQL statements executed by each request.
+
+    The count is returned in the `X-Query-Count` response header, and logged at debug level.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle the request, keeping count of the statements it executes."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter: QueryCounter = QueryCounter()
+        token = query_counter.set(counter)
+
+        async def send_with_count(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Query-Count", str(counter.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+
+        finally:
+            query_counter.reset(token)
+            query_logger.debug(f"{scope['method']} {scope['path']} ran {counter.count} queries")
+
+
+def _route_template(scope: Scope) -> str:
+    """Get the template of the route that served the request, e.g. `/company/{company_id}/collect`.
+
+    :param scope: Scope of the request, once it has been served.
+    :return: Path of the matched route, or `UNMATCHED_ROUTE` if none matched.
+    """
+    route: Any = scope.get("route")
+    if route is not None:
+        return route.path
+
+    # Routes added by the app itself, e.g. the docs, have no parameters and do not record themselves
+    if "endpoint" in scope:
+        return scope["path"]
+
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record the number, latency and database usage of the requests, by route.
+
+    The requests are labelled with the template of the route they matched rather than their path, so each route is
+    a single series whatever its parameters. Must be inside `QueryCountMiddleware`, which counts the statements.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle the request, recording its metrics once it has been served."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method: str = scope["method"]
+        # Requests failing before a response is started are answered with an error
+        status: int = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method)
+        start: float = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+
+        finally:
+            duration: float = time.perf_counter() - start
+            http_requests_in_progress.dec(method)
+
+            route: str = _route_template(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(duration, method, route)
+
+            counter: QueryCounter | None = query_counter.get()
+            if counter is not None:
+                http_request_db_queries.observe(counter.count, method, route)
+                http_request_db_duration.observe(counter.duration, method, route)
+
+
+class QueryProfilerMiddleware:
+    """Record the statements executed by each request with the query profiler, to report the ones it repeated.
+
+    Only added when the query profiler is enabled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle the request, recording the statements it executes."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile: RequestProfile = RequestProfile(f"{scope['method']} {scope['path']}")
+        token = request_profile.set(profile)
+
+        try:
+            await self.app(scope, receive, send)
+
+        finally:
+            request_profile.reset(token)
+            query_profiler.finish(profile, f"{scope['method']} {_route_template(scope)}")
@@ -0,0 +1,128 @@
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Column, Connection, Engine, bindparam, insert, inspect, select, text, update
+from sqlmodel import SQLModel
+
+from .models import Achievement, Company, EarnedAchievements, SchemaMigration, ShopItem
+
+migration_logger = logging.getLogger(__name__)
+
+type Migration = Callable[[Connection], None]
+
+
+def _rename_duplicate_shop_items(connection: Connection) -> None:
+    """Rename the Shop Items whose name an older Shop Item already has, so the names can be made unique.
+
+    The oldest Shop Item keeps the name, the others get their ID added to it, e.g. `Drill (12)`.
+    """
+    max_length: int = ShopItem.__table__.c.name.type.length  # type: ignore[reportAttributeAccessIssue]
+    names: set[str] = set()
+    renames: list[dict[str, Any]] = []
+
+    for item_id, name in connection.execute(select(ShopItem.id, ShopItem.name).order_by(ShopItem.id)):  # type: ignore[reportArgumentType]
+        new_name: str = name
+        suffix: int = item_id
+        while new_name in names:
+            new_name = f"{name[: max_length - len(f' ({suffix})')]} ({suffix})"
+            suffix += 1
+
+        names.add(new_name)
+        if new_name != name:
+            migration_logger.warning(f"Renaming Shop Item {item_id} from {name!r} to {new_name!r}")
+            renames.append({"b_id": item_id, "name": new_name})
+
+    if renames:
+        connection.execute(update(ShopItem).where(ShopItem.id == bindparam("b_id")), renames)  # type: ignore[reportArgumentType]
+
+
+def _create_declared_indexes(connection: Connection) -> None:
+    """Create the indexes declared on the models that are missing from the database.
+
+    `SQLModel.metadata.create_all` only creates missing tables, so indexes added to existing
+    tables have to be created separately. Shop Item names are made unique first, as their index is unique.
+    """
+    _rename_duplicate_shop_items(connection)
+
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def _add_column(connection: Connection, column: Column[Any]) -> None:
+    """Add the column declared on a model to its table, if missing.
+
+    `SQLModel.metadata.create_all` only creates missing tables, so columns added to existing tables have to be
+    added separately. Columns that cannot be null need a server default, to fill in the existing rows.
+    """
+    if column.name in {existing["name"] for existing in inspect(connection).get_columns(column.table.name)}:
+        return
+
+    definition: str = f"{column.name} {column.type.compile(connection.dialect)}"
+    if not column.nullable:
+        definition += f" NOT NULL DEFAULT {column.server_default.arg}"  # type: ignore[reportOptionalMemberAccess, reportAttributeAccessIssue]
+
+    connection.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {definition}"))
+
+
+def _add_version_columns(connection: Connection) -> None:
+    """Add the `version` column to the tables that use optimistic concurrency control, if missing."""
+    for table in (Company.__table__, ShopItem.__table__):  # type: ignore[reportAttributeAccessIssue]
+        _add_column(connection, table.c.version)
+
+
+def _add_achievement_stats(connection: Connection) -> None:
+    """Add the statistics columns to the Achievements, if missing, and work them out from the earned Achievements."""
+    table: Any = Achievement.__table__  # type: ignore[reportAttributeAccessIssue]
+    for name in ("earned_count", "first_owner_id", "first_achieved", "latest_owner_id", "latest_achieved"):
+        _add_column(connection, table.c[name])
+
+    stats: dict[int, dict[str, Any]] = {}
+    for achievement_id, owner_id, achieved in connection.execute(
+        select(EarnedAchievements.achievement_id, Company.owner_id, EarnedAchievements.achieved)
+        .join(Company, Company.id == EarnedAchievements.company_id)  # type: ignore[reportArgumentType]
+        .order_by(EarnedAchievements.achieved)  # type: ignore[reportArgumentType]
+    ):
+        entry: dict[str, Any] = stats.setdefault(
+            achievement_id,
+            {"b_id": achievement_id, "earned_count": 0, "first_owner_id": owner_id, "first_achieved": achieved},
+        )
+        entry["earned_count"] += 1
+        entry["latest_owner_id"] = owner_id
+        entry["latest_achieved"] = achieved
+
+    if stats:
+        connection.execute(update(table).where(table.c.id == bindparam("b_id")), list(stats.values()))
+
+
+# Migrations are applied in order, and each version is only ever applied once.
+# Never edit or remove an existing migration; add a new version instead.
+MIGRATIONS: list[tuple[int, str, Migration]] = [
+    (1, "Index hot lookup columns", _create_declared_indexes),
+    (2, "Add version columns", _add_version_columns),
+    (3, "Add achievement statistics", _add_achievement_stats),
+]
+
+
+def run_migrations(bind: Engine) -> list[int]:
+    """Apply the migrations that have not yet been applied to the database.
+
+    :param bind: Database engine.
+    :return: Versions of the migrations that were applied.
+    """
+    applied: list[int] = []
+
+    with bind.begin() as connection:
+        existing: set[int] = set(connection.execute(select(SchemaMigration.version)).scalars())  # type: ignore[reportArgumentType]
+
+        for version, description, migration in MIGRATIONS:
+            if version in existing:
+                continue
+
+            migration_logger.info(f"Applying migration {version}: {description}")
+            migration(connection)
+            connection.execute(insert(SchemaMigration).values(version=version, description=description))
+            applied.append(version)
+
+    return applied
@@ -3,6 +3,8 @@ from datetime import datetime
 from typing import Any
 
 from pydantic import field_validator
+from sqlalchemy import Index
+from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlmodel import (
     Field,  # type: ignore[reportUnknownVariableType]
     Relationship,
@@ -13,17 +15,21 @@ from sqlmodel import (
 #################
 # COMPANY SCHEMA
 #################
-class Company(SQLModel, table=True):
+class Company(SQLModel, AsyncAttrs, table=True):
     """Model representing a Company in the database."""
 
+    __table_args__ = (Index("ix_company_owner_id_is_bankrupt", "owner_id", "is_bankrupt"),)
+
     id: int | None = Field(primary_key=True, default=None)
     created: datetime = Field(nullable=False, default_factory=datetime.now)
     is_bankrupt: bool = Field(nullable=False, default=False)
-    networth: float = Field(nullable=False, default=0)
-    name: str = Field(nullable=False)
+    networth: float = Field(nullable=False, default=0, index=True)
+    name: str = Field(nullable=False, index=True)
     owner_id: str = Field(nullable=False, foreign_key="user.user_id")
     current_planet: str = Field(foreign_key="planet.planet_id", nullable=False)
     last_resource_collect: datetime = Field(nullable=False, default_factory=datetime.now)
+    # Incremented on every purchase, for optimistic concurrency control
+    version: int = Field(nullable=False, default=0, sa_column_kwargs={"server_default": "0"})
 
     @field_validator("name")
     @classmethod
@@ -39,6 +45,7 @@ class Company(SQLModel, table=True):
     achievements: list["EarnedAchievements"] = Relationship(back_populates="company")
     user: "User" = Relationship(back_populates="companies")
     planet: "PlanetModel" = Relationship(back_populates="companies_on")
+    resource_states: list["CompanyResource"] = Relationship(back_populates="company")
 
 
 class CompanyCreate(SQLModel):
@@ -77,14 +84,31 @@ class CompanyPublic(SQLModel):
     current_planet: str
 
 
+class CompanyRankPublic(SQLModel):
+    """Model representing the position of a Company on the leaderboard."""
+
+    company_id: int
+    owner_id: str
+    networth: float
+    rank: int
+    out_of: int
+
+
+class LeaderboardEntryPublic(SQLModel):
+    """Model representing a single Company on the leaderboard."""
+
+    rank: int
+    company: CompanyPublic
+
+
 ###########################
 # COMPANY INVENTORY SCHEMA
 ###########################
-class Inventory(SQLModel, table=True):
+class Inventory(SQLModel, AsyncAttrs, table=True):
     """Model representing a Company's inventory."""
 
     item_id: int = Field(foreign_key="shopitem.id", primary_key=True, nullable=False)
-    company_id: int = Field(foreign_key="company.id", primary_key=True, nullable=False)
+    company_id: int = Field(foreign_key="company.id", primary_key=True, nullable=False, index=True)
     stock: int = Field(ge=0, nullable=False)
     total_amount_spent: float = Field(ge=0, nullable=False)
 
@@ -102,6 +126,30 @@ class InventoryPublic(SQLModel):
     total_amount_spent: float
 
 
+##########################
+# COMPANY RESOURCES SCHEMA
+##########################
+class CompanyResource(SQLModel, AsyncAttrs, table=True):
+    """Model representing the state of a Resource being harvested by a Company.
+
+    Created the first time the Company collects the Resource, and then carried between collections.
+    """
+
+    __tablename__ = "company_resource"  # type: ignore[reportUnknownVariableType]
+
+    company_id: int = Field(foreign_key="company.id", primary_key=True)
+    resource_id: int = Field(foreign_key="resource.id", primary_key=True)
+    init_units: float = Field(nullable=False)
+    units_left: float = Field(nullable=False)
+    epoch: int = Field(nullable=False, default=0)
+    # Harvesting has been accounted for up to this time
+    last_accrual: datetime = Field(nullable=False, default_factory=datetime.now)
+
+    # Relationships
+    company: "Company" = Relationship(back_populates="resource_states")
+    resource: "ResourceModel" = Relationship()
+
+
 #################
 # USER SCHEMA
 #################
@@ -117,7 +165,7 @@ class Experience(SQLModel):
         return experience // 200
 
 
-class User(SQLModel, table=True):
+class User(SQLModel, AsyncAttrs, table=True):
     """Model representing a User in the database."""
 
     user_id: str = Field(primary_key=True)
@@ -164,14 +212,16 @@ class UserSetExperience(SQLModel):
 ##############
 # SHOP SCHEMA
 ##############
-class ShopItem(SQLModel, table=True):
+class ShopItem(SQLModel, AsyncAttrs, table=True):
     """Model representing a Shop Item."""
 
     id: int | None = Field(default=None, primary_key=True)
-    name: str = Field(nullable=False, max_length=32)
+    name: str = Field(nullable=False, max_length=32, index=True, unique=True)
     price: float = Field(nullable=False, gt=0)
     available_quantity: int = Field(nullable=False, ge=0)
     is_disabled: bool = Field(nullable=False, default=False)
+    # Incremented on every update of the Item (but not of its stock), for optimistic concurrency control
+    version: int = Field(nullable=False, default=0, sa_column_kwargs={"server_default": "0"})
 
     # Relationships
     inventories: "Inventory" = Relationship(back_populates="item")
@@ -249,15 +299,36 @@ class ShopItemPurchasedPublic(SQLModel):
     new_balance: float
 
 
+class ShopItemImportErrorPublic(SQLModel):
+    """Model representing a line of a Shop Item import that could not be imported."""
+
+    line: int
+    name: str | None
+    detail: str
+
+
+class ShopItemImportPublic(SQLModel):
+    """Model representing the outcome of a Shop Item import."""
+
+    created: int
+    errors: list[ShopItemImportErrorPublic]
+
+
 ####################
 # ACHIEVEMENT SCHEMA
 ####################
-class Achievement(SQLModel, table=True):
+class Achievement(SQLModel, AsyncAttrs, table=True):
     """Model representing the details of an Achievement."""
 
     id: int | None = Field(default=None, primary_key=True)
-    name: str = Field(nullable=False)
+    name: str = Field(nullable=False, index=True, unique=True)
     description: str = Field(nullable=False)
+    # Companies that have earned the Achievement, kept up to date whenever it is awarded
+    earned_count: int = Field(nullable=False, default=0, sa_column_kwargs={"server_default": "0"})
+    first_owner_id: str | None = Field(default=None)
+    first_achieved: datetime | None = Field(default=None)
+    latest_owner_id: str | None = Field(default=None)
+    latest_achieved: datetime | None = Field(default=None)
 
     # Relationships
     companies_earned: list["EarnedAchievements"] = Relationship(back_populates="achievement")
@@ -297,11 +368,11 @@ class AchievementsCompanyPublic(SQLModel):
     latest_achievement: str
 
 
-class EarnedAchievements(SQLModel, table=True):
+class EarnedAchievements(SQLModel, AsyncAttrs, table=True):
     """Model representing a single Achievement earned by a Company."""
 
     achievement_id: int = Field(foreign_key="achievement.id", primary_key=True)
-    company_id: int = Field(foreign_key="company.id", primary_key=True)
+    company_id: int = Field(foreign_key="company.id", primary_key=True, index=True)
     achieved: datetime = Field(nullable=False, default_factory=datetime.now)
 
     # Relationships
@@ -312,13 +383,13 @@ class EarnedAchievements(SQLModel, table=True):
 ######################
 # GAME ENGINE SCHEMAS
 ######################
-class PlanetModel(SQLModel, table=True):
+class PlanetModel(SQLModel, AsyncAttrs, table=True):
     """Model representing a single Planet."""
 
     __tablename__ = "planet"  # type: ignore[reportUnknownVariableType]
 
     id: int | None = Field(primary_key=True, default=None)
-    planet_id: str = Field(nullable=False)
+    planet_id: str = Field(nullable=False, index=True, unique=True)
     name: str = Field(nullable=False)
     description: str = Field(nullable=False)
     tier: int = Field(nullable=False)
@@ -338,13 +409,13 @@ class PlanetPublic(SQLModel):
     available_resources: list[str]
 
 
-class ResourceModel(SQLModel, table=True):
+class ResourceModel(SQLModel, AsyncAttrs, table=True):
     """Model representing a single Resource."""
 
     __tablename__ = "resource"  # type: ignore[reportUnknownVariableType]
 
     id: int | None = Field(primary_key=True, default=None)
-    resource_id: str = Field(nullable=False)
+    resource_id: str = Field(nullable=False, index=True, unique=True)
     name: str = Field(nullable=False)
     min_tier: int = Field(nullable=False)
     unit_price: float = Field(nullable=False)
@@ -371,26 +442,26 @@ class ResourcePublic(SQLModel):
     found_on: list[str]
 
 
-class PlanetResourcesModel(SQLModel, table=True):
+class PlanetResourcesModel(SQLModel, AsyncAttrs, table=True):
     """Model representing all the Resources found on a Planet."""
 
     __tablename__ = "planet_resources"  # type: ignore[reportUnknownVariableType]
 
     planet_id: int = Field(primary_key=True, foreign_key="planet.id")
-    resource_id: int = Field(primary_key=True, foreign_key="resource.id")
+    resource_id: int = Field(primary_key=True, foreign_key="resource.id", index=True)
 
     # Relationships
     planet: "PlanetModel" = Relationship(back_populates="resources")
     resource: "ResourceModel" = Relationship(back_populates="on_planets")
 
 
-class ResourceCollectorModel(SQLModel, table=True):
+class ResourceCollectorModel(SQLModel, AsyncAttrs, table=True):
     """Model representing a single Resource Collector."""
 
     __tablename__ = "resource_collector"  # type: ignore[reportUnknownVariableType]
 
     id: int | None = Field(primary_key=True, default=None)
-    collector_id: str = Field(nullable=False)
+    collector_id: str = Field(nullable=False, index=True, unique=True)
     name: str = Field(nullable=False)
     tier: int = Field(nullable=False)
     init_price: float = Field(nullable=False)
@@ -418,13 +489,13 @@ class ResourceCollectorPublic(SQLModel):
     mineable_resources: list[str]
 
 
-class ResourceCollectorMineableResourcesModel(SQLModel, table=True):
+class ResourceCollectorMineableResourcesModel(SQLModel, AsyncAttrs, table=True):
     """Model representing the Resources that a Resource Collector can harvest."""
 
     __tablename__ = "collector_resources"  # type: ignore[reportUnknownVariableType]
 
     resource_collector_id: int = Field(primary_key=True, foreign_key="resource_collector.id")
-    resource_id: int = Field(primary_key=True, foreign_key="resource.id")
+    resource_id: int = Field(primary_key=True, foreign_key="resource.id", index=True)
 
     # Relationships
     resource_collector: "ResourceCollectorModel" = Relationship(back_populates="mineable_resources")
@@ -435,3 +506,63 @@ class ResourceCollectionPublic(SQLModel):
     """Model representing the details of the materials collected."""
 
     resources: list[dict[str, Any]]
+
+
+class BulkCollection(SQLModel):
+    """Model representing the Companies to collect the materials of, by owner."""
+
+    owner_ids: list[str] | None = Field(default=None)
+    all_active: bool = Field(default=False)
+
+
+class CompanyCollectionPublic(SQLModel):
+    """Model representing the details of the materials collected by a Company, in a bulk collection."""
+
+    owner_id: str
+    company_id: int | None = None
+    networth: float | None = None
+    resources: list[dict[str, Any]] = Field(default_factory=list)
+    # Why nothing was collected, if the Company could not be found
+    detail: str | None = None
+
+
+#####################
+# AUTOCOMPLETE SCHEMA
+#####################
+class AutocompleteSuggestionPublic(SQLModel):
+    """Model representing an entry found by its prefix."""
+
+    name: str
+    # What the endpoints take to address the entry, e.g. the Planet ID
+    value: str
+
+
+class AutocompletePublic(SQLModel):
+    """Model representing the entries found by their prefix."""
+
+    kind: str
+    prefix: str
+    suggestions: list[AutocompleteSuggestionPublic]
+
+
+###################
+# MIGRATION SCHEMA
+###################
+class SchemaMigration(SQLModel, table=True):
+    """Model representing a schema migration that has been applied to the database."""
+
+    __tablename__ = "schema_migration"  # type: ignore[reportUnknownVariableType]
+
+    version: int = Field(primary_key=True)
+    description: str = Field(nullable=False)
+    applied: datetime = Field(nullable=False, default_factory=datetime.now)
+
+
+class ConfigFingerprint(SQLModel, table=True):
+    """Model representing the hash of a game config file that has been loaded into the database."""
+
+    __tablename__ = "config_fingerprint"  # type: ignore[reportUnknownVariableType]
+
+    filename: str = Field(primary_key=True)
+    sha256: str = Field(nullable=False)
+    loaded: datetime = Field(nullable=False, default_factory=datetime.now)
@@ -3,12 +3,13 @@ from __future__ import annotations
 import itertools
 import logging
 import random
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING
+
 from sqlmodel import Session, select
-from src.main import engine
+from src.db import engine
 from src.models import ResourceModel
 
-from .yaml_reader import YamlReader
+from .yaml_reader import LazyConfig
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
@@ -19,36 +20,40 @@ planet_logger = logging.getLogger(__name__)
 class Planet:
     """Class representing an in game planet."""
 
-    _config: dict[str, Any] = YamlReader("PlanetOld.yaml").contents
+    _config = LazyConfig("PlanetOld.yaml")
     _name_generator = None
 
-    def __init__(self, tier: int = 0) -> None:
+    def __init__(self, tier: int = 0, available_resources: Sequence[ResourceModel] | None = None) -> None:
         self.tier: int = tier
         self.resources: list[ResourceModel] = []
-        self.spawn_resources()
+        self.spawn_resources(available_resources)
         self.name: str = self.generate_random_name()
         self.id: str = ""
 
-    def spawn_resources(self) -> None:
-        """Spawn resources on the planet."""
-        with Session(engine) as session:
-            resources: Sequence[ResourceModel] = session.exec(select(ResourceModel)).all()
+    def spawn_resources(self, available_resources: Sequence[ResourceModel] | None = None) -> None:
+        """Spawn resources on the planet.
 
-            for resource in resources:
-                match resource.min_tier:
-                    case _ if resource.min_tier < self.tier:  # if tier is inferior
-                        tier_diff = self.tier - resource.min_tier
+        :param available_resources: Resources that can spawn. Fetched from the database if not given.
+        """
+        if available_resources is None:
+            with Session(engine) as session:
+                available_resources = session.exec(select(ResourceModel)).all()
 
-                        if random.random() < 1 / (  # noqa: S311
-                            3 * tier_diff
-                        ):  # the chance of spawning is (1/3) * (1/tier difference)
-                            self.resources.append(resource)
+        for resource in available_resources:
+            match resource.min_tier:
+                case _ if resource.min_tier < self.tier:  # if tier is inferior
+                    tier_diff = self.tier - resource.min_tier
 
-                    case _ if resource.min_tier == self.tier:  # if tier is equal there is 100% chance of spawning
+                    if random.random() < 1 / (  # noqa: S311
+                        3 * tier_diff
+                    ):  # the chance of spawning is (1/3) * (1/tier difference)
                         self.resources.append(resource)
 
-                    case _:
-                        pass
+                case _ if resource.min_tier == self.tier:  # if tier is equal there is 100% chance of spawning
+                    self.resources.append(resource)
+
+                case _:
+                    pass
 
     @classmethod
     def generate_random_name(cls) -> str:
@@ -0,0 +1,308 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event
+
+profiler_logger = logging.getLogger(__name__)
+# Statements slower than the threshold, along with their query plan, are logged on their own
+slow_query_logger = logging.getLogger(f"{__name__}.slow")
+
+# Query profiler configuration, the profiler is off unless enabled
+PROFILER_ENABLED: bool = os.environ.get("QUERY_PROFILER", "false").lower() in {"1", "true", "yes"}
+SLOW_QUERY_MS: float = float(os.environ.get("SLOW_QUERY_MS", "100"))
+REPEATED_QUERY_THRESHOLD: int = int(os.environ.get("REPEATED_QUERY_THRESHOLD", "5"))
+SLOW_QUERY_LOG: Path = Path(os.environ.get("SLOW_QUERY_LOG", Path("logs", "slow_queries.log")))
+
+# Lists of parameters, e.g. of `IN` or of the rows of a multi-row `INSERT`, whose length varies between executions
+_PARAMETER_LIST: re.Pattern[str] = re.compile(r"\(\?(?:, \?)+\)")
+_REPEATED_ROWS: re.Pattern[str] = re.compile(r"(\(\?, \.\.\.\))(?:, \(\?, \.\.\.\))+")
+# Statements that have a query plan, unlike e.g. `CREATE TABLE`, which cannot be explained once executed
+_EXPLAINABLE: tuple[str, ...] = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@lru_cache(maxsize=1024)
+def statement_template(statement: str) -> str:
+    """Get the template of a statement, which is the same for every execution of the same query.
+
+    The statements are already parametrized, so only the lists of parameters are collapsed, e.g. `IN (?, ?, ?)` to
+    `IN (?, ...)`.
+
+    :param statement: SQL statement, as sent to the database.
+    :return: Template of the statement.
+    """
+    return _REPEATED_ROWS.sub(r"\1, ...", _PARAMETER_LIST.sub("(?, ...)", statement))
+
+
+class RequestProfile:
+    """Statements executed while handling a single request."""
+
+    def __init__(self, request: str) -> None:
+        self.request: str = request
+        # Template and duration of each statement, in order of execution
+        self.statements: list[tuple[str, float]] = []
+
+
+# Set for the duration of each request by `QueryProfilerMiddleware`.
+request_profile: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+class SlowQuery:
+    """Executions of a statement template slower than the threshold."""
+
+    def __init__(self, template: str) -> None:
+        self.template: str = template
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+        # Query plan and request of the slowest execution
+        self.plan: list[str] = []
+        self.request: str | None = None
+
+    def record(self, duration: float, plan: list[str], request: str | None) -> None:
+        """Record a slow execution.
+
+        :param duration: Seconds the execution took.
+        :param plan: Query plan of the statement.
+        :param request: Request that executed the statement, if any.
+        :return: None
+        """
+        self.count += 1
+        self.total += duration
+        if duration >= self.max:
+            self.max = duration
+            self.plan = plan
+            self.request = request
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the executions as a dict."""
+        return {
+            "statement": self.template,
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "max_ms": self.max * 1000,
+            "slowest_request": self.request,
+            "plan": self.plan,
+        }
+
+
+class RepeatedQuery:
+    """Requests of a route that executed the same statement template over and over (N+1 queries).
+
+    Typically a relationship loaded lazily for each row of a list, one query at a time.
+    """
+
+    def __init__(self, route: str, template: str) -> None:
+        self.route: str = route
+        self.template: str = template
+        self.requests: int = 0
+        self.executions: int = 0
+        self.max: int = 0
+
+    def record(self, executions: int) -> None:
+        """Record a request that repeated the statement.
+
+        :param executions: Number of times the request executed the statement.
+        :return: None
+        """
+        self.requests += 1
+        self.executions += executions
+        self.max = max(self.max, executions)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the requests as a dict."""
+        return {
+            "route": self.route,
+            "statement": self.template,
+            "requests": self.requests,
+            "executions": self.executions,
+            "max_per_request": self.max,
+        }
+
+
+class QueryProfiler:
+    """Record the statements executed by each request, to find the slow statements and the N+1 queries.
+
+    Every statement slower than `slow_query_ms` is logged to the slow query log along with its query plan, which is
+    read on the same connection right after the statement. Every statement template a request executes at least
+    `repeat_threshold` times is reported as a repeated query of its route.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,  # noqa: FBT001
+        slow_query_ms: float,
+        repeat_threshold: int,
+        slow_query_log: Path,
+    ) -> None:
+        self.enabled: bool = enabled
+        self.slow_query_ms: float = slow_query_ms
+        self.repeat_threshold: int = repeat_threshold
+        self.slow_query_log: Path = slow_query_log
+        self.requests: int = 0
+        # Writes the slow query log, once an engine is instrumented
+        self.slow_query_handler: logging.Handler | None = None
+
+        # Worst offenders, by statement template, and by route and statement template
+        self._slow: dict[str, SlowQuery] = {}
+        self._repeated: dict[tuple[str, str], RepeatedQuery] = {}
+
+        # The statements of the harvest scheduler thread are profiled too
+        self._lock: threading.Lock = threading.Lock()
+
+    def instrument(self, bind: Engine) -> None:
+        """Time every statement executed by the engine.
+
+        :param bind: Engine to profile, the sync engine of an async engine.
+        :return: None
+        """
+        self._open_slow_query_log()
+        event.listen(bind, "before_cursor_execute", _start_timer)
+        event.listen(bind, "after_cursor_execute", self._record_statement)
+
+    def _open_slow_query_log(self) -> None:
+        """Send the slow queries to their own log file, and only there, creating its directory if needed."""
+        if self.slow_query_handler is not None:
+            return
+
+        self.slow_query_log.parent.mkdir(parents=True, exist_ok=True)
+        self.slow_query_handler = logging.FileHandler(self.slow_query_log)
+        self.slow_query_handler.setLevel(logging.WARNING)
+        self.slow_query_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+        slow_query_logger.addHandler(self.slow_query_handler)
+        slow_query_logger.propagate = False
+
+    def _record_statement(
+        self,
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401, ARG002
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401, ARG002
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        """Record a statement that has just been executed, against the request being handled, if any."""
+        duration: float = time.perf_counter() - conn.info.pop("profiler_started", time.perf_counter())
+        template: str = statement_template(statement)
+
+        profile: RequestProfile | None = request_profile.get()
+        if profile is not None:
+            profile.statements.append((template, duration))
+
+        if duration * 1000 < self.slow_query_ms:
+            return
+
+        plan: list[str] = _explain(conn, statement, parameters[0] if executemany and parameters else parameters)
+        request: str | None = profile.request if profile is not None else None
+
+        with self._lock:
+            if (slow := self._slow.get(template)) is None:
+                slow = self._slow[template] = SlowQuery(template)
+            slow.record(duration, plan, request)
+
+        indented_plan: str = "".join(f"\n    {line}" for line in plan)
+        slow_query_logger.warning(
+            f"{request or 'outside of a request'} ran a statement in {duration * 1000:.1f}ms: "
+            f"{statement}{indented_plan}"
+        )
+
+    def finish(self, profile: RequestProfile, route: str) -> None:
+        """Report the statements a request repeated, once it has been served.
+
+        :param profile: Statements of the request.
+        :param route: Route that served the request, with its method.
+        :return: None
+        """
+        executions: Counter[str] = Counter(template for template, _ in profile.statements)
+
+        with self._lock:
+            self.requests += 1
+            repeated: list[tuple[str, int]] = [
+                (template, count) for template, count in executions.items() if count >= self.repeat_threshold
+            ]
+
+            for template, count in repeated:
+                if (stats := self._repeated.get((route, template))) is None:
+                    stats = self._repeated[route, template] = RepeatedQuery(route, template)
+                stats.record(count)
+
+        for template, count in repeated:
+            profiler_logger.warning(f"{profile.request} ran the same statement {count} times: {template}")
+
+    def as_dict(self, limit: int) -> dict[str, Any]:
+        """Get the worst offenders.
+
+        :param limit: Number of slow statements, and of repeated statements, to get.
+        :return: Slow statements by total time, and repeated statements by total executions.
+        """
+        with self._lock:
+            slow: list[SlowQuery] = sorted(self._slow.values(), key=lambda stats: stats.total, reverse=True)
+            repeated: list[RepeatedQuery] = sorted(
+                self._repeated.values(), key=lambda stats: stats.executions, reverse=True
+            )
+
+            return {
+                "enabled": self.enabled,
+                "slow_query_ms": self.slow_query_ms,
+                "repeat_threshold": self.repeat_threshold,
+                "requests": self.requests,
+                "slow_queries": [stats.as_dict() for stats in slow[:limit]],
+                "repeated_queries": [stats.as_dict() for stats in repeated[:limit]],
+            }
+
+
+def _start_timer(conn: Connection, *_: object) -> None:
+    """Note when the statement about to be executed started. The statements of a connection run one at a time."""
+    conn.info["profiler_started"] = time.perf_counter()
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> list[str]:  # noqa: ANN401
+    """Get the query plan of a statement.
+
+    The plan is read with a cursor of the driver, so it is not executed as a statement of its own, and in the same
+    transaction as the statement.
+
+    :param conn: Connection that executed the statement.
+    :param statement: SQL statement.
+    :param parameters: Parameters the statement was executed with.
+    :return: Lines of the plan, with the nested steps indented on SQLite, none if the statement has no plan.
+    """
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+
+    is_sqlite: bool = conn.dialect.name == "sqlite"
+    cursor: Any = conn.connection.cursor()
+
+    try:
+        cursor.execute(f"{'EXPLAIN QUERY PLAN' if is_sqlite else 'EXPLAIN'} {statement}", parameters)
+        rows: list[Any] = cursor.fetchall()
+
+    except conn.dialect.loaded_dbapi.Error as ex:
+        return [f"cannot explain the statement: {ex}"]
+
+    finally:
+        cursor.close()
+
+    if not is_sqlite:
+        return [" ".join(str(column) for column in row) for row in rows]
+
+    # Each step of a SQLite plan is given with the step it is nested in
+    depth: dict[int, int] = {0: 0}
+    lines: list[str] = []
+    for step, parent, _, detail in rows:
+        depth[step] = depth.get(parent, 0) + 1
+        lines.append(f"{'  ' * (depth[step] - 1)}{detail}")
+    return lines
+
+
+query_profiler: QueryProfiler = QueryProfiler(
+    PROFILER_ENABLED, SLOW_QUERY_MS, REPEATED_QUERY_THRESHOLD, SLOW_QUERY_LOG
+)
@@ -2,16 +2,11 @@ from __future__ import annotations
 
 import logging
 import random
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING
 
-from src import Planet
-from src.resource_collector import ResourceCollector
-
-from .yaml_reader import YamlReader
+from .yaml_reader import DecayFunction, LazyConfig, YamlReader
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
-
     from src import Planet
     from src.resource_collector import ResourceCollector
 
@@ -21,9 +16,9 @@ resource_logger = logging.getLogger(__name__)
 class Resource:
     """Class representing an in game resource."""
 
-    config: dict[str, Any] = YamlReader("Resource.yaml").contents
+    config = LazyConfig("Resource.yaml")
 
-    def __init__(self, r_id: str, tier: int = 0) -> None:
+    def __init__(self, r_id: str, tier: int = 0, init_units: float | None = None, epoch: int = 0) -> None:
         self._matconf = self.config[r_id]
         self.r_id = r_id
         self.name = self._matconf["name"]
@@ -39,17 +34,20 @@ class Resource:
 
         # Having values of mu = 1 and sigma = 1/30 means you have a normal distribution centered on
         # 1 that can go as far as ]0.9, 1.1[
+        # A Resource that is already being harvested keeps the amount of units it started with
         self.init_units = (
-            self._matconf["init_units"]
+            init_units
+            if init_units is not None
+            else self._matconf["init_units"]
             * self._matconf["tier_units_upscale"] ** tier_upscaling
             * random.normalvariate(1, 1 / 30)
         )
         # the decay function has the signature
         # (init_units:int, epoch:int) -> units left rounded:int
-        self.decay_function: Callable[[int, int], float] = YamlReader.str_to_decay_function(
+        self.decay_function: DecayFunction = YamlReader.str_to_decay_function(
             self._matconf["decay_function"], self._matconf["decay_factor"]
         )
-        self.epoch = 0
+        self.epoch = epoch
 
         self.balancing_delay = self._matconf["balancing_delay"]
 
@@ -86,15 +84,17 @@ class Resource:
             error = "n must be strictly positive"
             raise ValueError(error)
 
-        # find max epoch allowed
-        for i in range(n, 0, -1):
-            # check if the resource collection is possible
-            if self.decay_function(self.init_units, self.epoch + i) >= 0:
-                before_collection = self.get_units_collected()
-                self.epoch += i
-                return self.get_units_collected() - before_collection
+        # find max epoch allowed: the units left never increase, so it is the furthest epoch,
+        # up to `n` epochs away, before the units left become negative
+        epochs = min(n, self.decay_function.last_epoch(self.init_units) - self.epoch)
+
+        # check if the resource collection is possible
+        if epochs < 1:
+            return None
 
-        return None
+        before_collection = self.get_units_collected()
+        self.epoch += int(epochs)
+        return self.get_units_collected() - before_collection
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 import logging
 from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
 
-from src import Resource
+from .yaml_reader import LazyConfig
 
-from .yaml_reader import YamlReader
+if TYPE_CHECKING:
+    from src import Resource
 
 collector_logger = logging.getLogger(__name__)
 
@@ -14,7 +18,7 @@ class ResourceCollector:
     Each instance is bound to one material only
     """
 
-    config = YamlReader("ResourceCollector.yaml").contents
+    config = LazyConfig("ResourceCollector.yaml")
     epoch_definition = timedelta(hours=1)
 
     def __init__(self, collector_id: str, tier: int = 0) -> None:
@@ -36,7 +40,7 @@ class ResourceCollector:
         self.last_collection: tuple[float, float] | None = None
         self.epochs = 0
 
-    def install(self, resource: "Resource") -> None:
+    def install(self, resource: Resource) -> None:
         """Attaches a collector to an instance of resource."""
         if resource.r_id not in self._resources_allowed:
             error = f"Cannot extract {resource.name} with {self.name}"
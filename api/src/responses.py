@@ -0,0 +1,53 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def construct_public[T: BaseModel](model: type[T], values: dict[str, Any]) -> T:
+    """Build a public model from trusted values, e.g. a row read from the database, without validating them.
+
+    The values must be of the right type for every field of the model, as the columns of the database are for the
+    public models matching them. Unlike `model_construct`, defaults are not filled in and the values are not copied,
+    so the dict must hold exactly the fields of the model and not be used afterwards.
+
+    :param model: Public model to build, without private attributes.
+    :param values: Value of each field of the model.
+    :return: Public model.
+    """
+    public: T = model.__new__(model)
+    object.__setattr__(public, "__dict__", values)
+    object.__setattr__(public, "__pydantic_fields_set__", set(values))
+    object.__setattr__(public, "__pydantic_extra__", None)
+    object.__setattr__(public, "__pydantic_private__", None)
+    return public
+
+
+def _encode_model(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    """Get the fields of a model, for orjson to encode.
+
+    :param value: Value orjson cannot encode by itself.
+    :return: Fields of the model.
+    """
+    if isinstance(value, BaseModel):
+        return value.__dict__
+
+    msg = f"Object of type {type(value).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
+class TrustedJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, for content made of trusted models, dicts, lists and plain values.
+
+    Endpoints returning it are not validated and serialized again by FastAPI against their response model: the
+    models are encoded as they are, so they must have been built from trusted values, e.g. with `construct_public`.
+    """
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401
+        """Encode the content.
+
+        :param content: Content of the response.
+        :return: Encoded content.
+        """
+        return orjson.dumps(content, default=_encode_model, option=orjson.OPT_NON_STR_KEYS)
@@ -1,31 +1,33 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.classes.achievements import AchievementRepresentation
 from src.db import get_session
 from src.models import AchievementPublic
+from src.responses import TrustedJSONResponse
 
 router = APIRouter()
 
 
-@router.get("/achievements")
-async def get_achievements(session: Session = Depends(get_session)) -> dict[str, list[AchievementPublic]]:
+@router.get("/achievements", response_model=dict[str, list[AchievementPublic]], response_class=TrustedJSONResponse)
+async def get_achievements(session: AsyncSession = Depends(get_session)) -> TrustedJSONResponse:
     """Get all the Achievements available to collect.
 
     :param session: Database session.
     :return: All Achievements
     """
-    achievements: list[AchievementPublic] = [
-        x.get_details() for x in AchievementRepresentation.fetch_achievements(session=session)
-    ]
-    return {"achievements": achievements}
+    achievements: list[AchievementPublic] = await AchievementRepresentation.fetch_achievement_details(session=session)
+    return TrustedJSONResponse({"achievements": achievements})
 
 
 @router.get("/achievement/{achievement_id}")
-async def get_achievement(achievement_id: int, session: Session = Depends(get_session)) -> AchievementPublic:
+async def get_achievement(achievement_id: int, session: AsyncSession = Depends(get_session)) -> AchievementPublic:
     """Get the details of the given Achievement.
 
     :param achievement_id: ID of the Achievement to get.
     :param session: Database session.
     :return: Achievement details.
     """
-    return AchievementRepresentation.fetch_achievement(session=session, achievement_id=achievement_id).get_details()
+    fetched_achievement: AchievementRepresentation = await AchievementRepresentation.fetch_achievement(
+        session=session, achievement_id=achievement_id
+    )
+    return fetched_achievement.get_details()
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.autocomplete import PrefixIndex, collector_index, planet_index, resource_index
+from src.classes.shop import ShopRepresentation
+from src.db import get_session
+from src.models import AutocompletePublic, AutocompleteSuggestionPublic
+
+router = APIRouter()
+
+
+@router.get("/autocomplete/{kind}")
+async def autocomplete(
+    kind: str,
+    prefix: str = "",
+    limit: int = Query(default=25, ge=1, le=100),
+    session: AsyncSession = Depends(get_session),
+) -> AutocompletePublic:
+    """Find the Shop Items, Planets, Resources or Resource Collectors by the start of their name.
+
+    Planets, Resources and Resource Collectors are also found by the start of their ID. The search ignores case.
+
+    :param kind: What to search: `shop`, `planet`, `resource` or `collector`.
+    :param prefix: Start of the names.
+    :param limit: Maximum number of suggestions.
+    :param session: Database session.
+    :return: Names and values (what the other endpoints take) of the entries found, in alphabetical order
+    """
+    index: PrefixIndex
+    match kind:
+        case "shop":
+            index = (await ShopRepresentation.get_catalog(session)).names
+
+        case "planet":
+            index = planet_index
+
+        case "resource":
+            index = resource_index
+
+        case "collector":
+            index = collector_index
+
+        case _:
+            raise HTTPException(404, "Unknown kind of autocomplete.")
+
+    return AutocompletePublic(
+        kind=kind,
+        prefix=prefix,
+        suggestions=[
+            AutocompleteSuggestionPublic(name=name, value=value) for name, value in index.search(prefix, limit)
+        ],
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.classes.collector import ResourceCollectorRepresentation
+from src.classes.loading import COLLECTOR_DETAILS
 from src.db import get_session
 from src.models import ResourceCollectorPublic
 
@@ -8,6 +9,9 @@ router = APIRouter()
 
 
 @router.get("/collector/{collector_id}")
-async def get_collector(collector_id: str, session: Session = Depends(get_session)) -> ResourceCollectorPublic:
+async def get_collector(collector_id: str, session: AsyncSession = Depends(get_session)) -> ResourceCollectorPublic:
     """Get the details of the given Planet."""
-    return ResourceCollectorRepresentation.fetch_collector(session=session, name=collector_id).get_details()
+    fetched_collector: ResourceCollectorRepresentation = await ResourceCollectorRepresentation.fetch_collector(
+        session=session, name=collector_id, plan=COLLECTOR_DETAILS
+    )
+    return await fetched_collector.get_details()
@@ -1,17 +1,32 @@
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.classes.company import CompanyRepresentation
+from src.classes.loading import COMPANY_ACHIEVEMENTS, COMPANY_INVENTORY
 from src.classes.pagination import CompanyPagination
 from src.db import get_session
-from src.models import AchievementsCompanyPublic, CompanyCreate, CompanyPublic, CompanyUpdate, ResourceCollectionPublic
+from src.models import (
+    AchievementsCompanyPublic,
+    BulkCollection,
+    CompanyCollectionPublic,
+    CompanyCreate,
+    CompanyPublic,
+    CompanyRankPublic,
+    CompanyUpdate,
+    ResourceCollectionPublic,
+)
+from src.responses import TrustedJSONResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 router = APIRouter()
 
 
 @router.post("/company", status_code=201)
-async def create_company(data: CompanyCreate, session: Session = Depends(get_session)) -> CompanyPublic:
+async def create_company(data: CompanyCreate, session: AsyncSession = Depends(get_session)) -> CompanyPublic:
     """Endpoint to create a new Company.
 
     :param data: Company data.
@@ -19,40 +34,72 @@ async def create_company(data: CompanyCreate, session: Session = Depends(get_ses
     :return: Success or not.
     """
     # Creating the company
-    return CompanyRepresentation.create_company(session=session, data=data).get_details()
+    return (await CompanyRepresentation.create_company(session=session, data=data)).get_details()
 
 
 @router.get("/company/{company_id}")
-async def get_company(company_id: str, session: Session = Depends(get_session)) -> CompanyPublic | None:
+async def get_company(company_id: str, session: AsyncSession = Depends(get_session)) -> CompanyPublic | None:
     """Endpoint to get the target Company.
 
     :param company_id: ID of Company to get.
     :param session: Database session.
     :return: Fetched Company.
     """
-    fetched_company: CompanyRepresentation = CompanyRepresentation.fetch_company(
+    fetched_company: CompanyRepresentation = await CompanyRepresentation.fetch_company(
         session=session, company_id=company_id
     )
     return fetched_company.get_details()
 
 
-@router.get("/companies")
+@router.get("/companies", response_model=dict[str, Any], response_class=TrustedJSONResponse)
 async def get_companies(
     params: CompanyPagination = Depends(),
-    session: Session = Depends(get_session),
-) -> dict[str, Any]:
+    session: AsyncSession = Depends(get_session),
+) -> TrustedJSONResponse:
     """Endpoint to get all Companies, with pagination.
 
     :param params: Endpoint parameters.
     :param session: Database session.
     :return: Fetched, paginated Companies
     """
-    return CompanyRepresentation.fetch_companies(session=session, params=params)
+    return TrustedJSONResponse(await CompanyRepresentation.fetch_companies(session=session, params=params))
+
+
+@router.get("/leaderboard", response_model=dict[str, Any], response_class=TrustedJSONResponse)
+async def get_leaderboard(
+    limit: int = Query(default=10, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+) -> TrustedJSONResponse:
+    """Endpoint to get the richest active Companies.
+
+    :param limit: Number of Companies to get.
+    :param offset: Number of Companies to skip.
+    :param session: Database session.
+    :return: Ranked Companies.
+    """
+    return TrustedJSONResponse(
+        await CompanyRepresentation.fetch_leaderboard(session=session, limit=limit, offset=offset)
+    )
+
+
+@router.get("/company/{company_id}/rank")
+async def get_company_rank(company_id: str, session: AsyncSession = Depends(get_session)) -> CompanyRankPublic:
+    """Endpoint to get the position of the given Company on the leaderboard.
+
+    :param company_id: ID of the Company.
+    :param session: Database session.
+    :return: Company rank.
+    """
+    fetched_company: CompanyRepresentation = await CompanyRepresentation.fetch_company(
+        session=session, company_id=company_id
+    )
+    return fetched_company.get_rank()
 
 
 @router.patch("/company/{company_id}", status_code=200)
 async def update_company(
-    company_id: str, data: CompanyUpdate, session: Session = Depends(get_session)
+    company_id: str, data: CompanyUpdate, session: AsyncSession = Depends(get_session)
 ) -> dict[str, str]:
     """Endpoint to update the given Company's details.
 
@@ -61,36 +108,38 @@ async def update_company(
     :param session: Database session.
     :return: None
     """
-    fetched_company: CompanyRepresentation = CompanyRepresentation.fetch_company(
+    fetched_company: CompanyRepresentation = await CompanyRepresentation.fetch_company(
         session=session, company_id=company_id
     )
-    fetched_company.update(data=data)
+    await fetched_company.update(data=data)
     return {"message": "Company successfully updated."}
 
 
 @router.delete("/company/{company_id}")
-async def delete_company(company_id: str, session: Session = Depends(get_session)) -> dict[str, str]:
+async def delete_company(company_id: str, session: AsyncSession = Depends(get_session)) -> dict[str, str]:
     """Endpoint to delete the given Company. Marks them as `bankrupt`.
 
     :param company_id: ID of the Company to delete.
     :param session: Database session.
     :return: None
     """
-    fetched_company: CompanyRepresentation = CompanyRepresentation.fetch_company(
+    fetched_company: CompanyRepresentation = await CompanyRepresentation.fetch_company(
         session=session, company_id=company_id
     )
-    fetched_company.delete()
+    await fetched_company.delete()
     return {"message": "Company successfully deleted."}
 
 
 @router.get("/company/{company_id}/inventory")
-async def get_inventory(company_id: str, session: Session = Depends(get_session)) -> dict[str, Any]:
-    return CompanyRepresentation.fetch_company(session=session, company_id=company_id).get_inventory()
+async def get_inventory(company_id: str, session: AsyncSession = Depends(get_session)) -> dict[str, Any]:
+    return await (
+        await CompanyRepresentation.fetch_company(session=session, company_id=company_id, plan=COMPANY_INVENTORY)
+    ).get_inventory()
 
 
 @router.get("/company/{company_id}/achievements")
 async def get_company_achievements(
-    company_id: str, session: Session = Depends(get_session)
+    company_id: str, session: AsyncSession = Depends(get_session)
 ) -> AchievementsCompanyPublic:
     """Get the Achievements for the given Company.
 
@@ -98,10 +147,32 @@ async def get_company_achievements(
     :param session: Database session.
     :return: Company's achievements.
     """
-    return CompanyRepresentation.fetch_company(session=session, company_id=company_id).get_achievements()
+    return await (
+        await CompanyRepresentation.fetch_company(session=session, company_id=company_id, plan=COMPANY_ACHIEVEMENTS)
+    ).get_achievements()
 
 
 @router.get("/company/{company_id}/collect")
-def collect_resources(company_id: str, session: Session = Depends(get_session)) -> ResourceCollectionPublic:
+async def collect_resources(company_id: str, session: AsyncSession = Depends(get_session)) -> ResourceCollectionPublic:
     """Collect the resources on the Planet."""
-    return CompanyRepresentation.fetch_company(session=session, company_id=company_id).collect_resources()
+    return await (
+        await CompanyRepresentation.fetch_company(session=session, company_id=company_id)
+    ).collect_resources()
+
+
+@router.post("/companies/collect")
+async def collect_resources_bulk(
+    data: BulkCollection, session: AsyncSession = Depends(get_session)
+) -> StreamingResponse:
+    """Collect the resources of many Companies at once.
+
+    :param data: Owners of the Companies to collect the resources of, or all active Companies.
+    :param session: Database session.
+    :return: Collection of each Company, streamed as one JSON object per line.
+    """
+    collections: Iterator[CompanyCollectionPublic] = await CompanyRepresentation.collect_resources_bulk(
+        session=session, data=data
+    )
+    return StreamingResponse(
+        (collection.model_dump_json() + "\n" for collection in collections), media_type="application/x-ndjson"
+    )
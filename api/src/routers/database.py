@@ -0,0 +1,27 @@
+from typing import Any
+
+from fastapi import APIRouter, Query
+from src.db import pool_metrics
+from src.query_profiler import query_profiler
+
+router = APIRouter()
+
+
+@router.get("/database/pool")
+async def get_pool_metrics() -> dict[str, Any]:
+    """Get the state of the database connection pool.
+
+    :return: Pool size, checked out and overflow connections, and connection wait times.
+    """
+    return pool_metrics.as_dict()
+
+
+@router.get("/database/queries")
+async def get_query_profile(limit: int = Query(default=10, ge=1, le=100)) -> dict[str, Any]:
+    """Get the worst offenders found by the query profiler, if it is enabled.
+
+    :param limit: Number of slow statements, and of repeated statements, to get.
+    :return: Statements slower than the threshold by total time, and statements repeated by a request of a route by
+        total executions.
+    """
+    return query_profiler.as_dict(limit)
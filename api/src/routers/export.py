@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from src.experience import experience_buffer
+from src.export import EXPORT_COLUMNS, EXPORT_FORMATS, export_rows
+
+router = APIRouter()
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str, format: str = Query(default="ndjson", pattern="^(ndjson|csv)$")
+) -> StreamingResponse:
+    """Export every row of a table, for analytics.
+
+    The rows are streamed as they are read from the database, in order of their primary key, so exports of any size
+    are served without being held in memory.
+
+    :param table: Table to export: `companies`, `inventories` or `users`.
+    :param format: Format of the export: `ndjson` (one JSON object per line) or `csv` (with a header line).
+    :return: Rows of the table.
+    """
+    if table not in EXPORT_COLUMNS:
+        raise HTTPException(404, "Unknown table to export.")
+
+    if table == "users":
+        # Include the experience awarded but not written yet
+        await experience_buffer.flush()
+
+    return StreamingResponse(
+        export_rows(table, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi import APIRouter
+from src.scheduler import harvest_scheduler
+
+router = APIRouter()
+
+
+@router.get("/harvest/scheduler")
+async def get_scheduler_metrics() -> dict[str, Any]:
+    """Get the state of the harvest scheduler.
+
+    :return: Scheduler configuration, whether this worker runs the ticks, and tick timings.
+    """
+    return harvest_scheduler.as_dict()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.metrics import CONTENT_TYPE, metrics_registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Get the metrics of the API, in the Prometheus text exposition format.
+
+    :return: Request counts and latencies by route, database usage per request, and game engine counters.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import PLANET_DETAILS
 from src.classes.planet import PlanetRepresentation
 from src.db import get_session
 from src.models import PlanetPublic
@@ -8,6 +9,9 @@ router = APIRouter()
 
 
 @router.get("/planet/{planet_id}")
-async def get_planet(planet_id: str, session: Session = Depends(get_session)) -> PlanetPublic:
+async def get_planet(planet_id: str, session: AsyncSession = Depends(get_session)) -> PlanetPublic:
     """Get the details of the given Planet."""
-    return PlanetRepresentation.fetch_planet(session=session, name=planet_id).get_details()
+    fetched_planet: PlanetRepresentation = await PlanetRepresentation.fetch_planet(
+        session=session, name=planet_id, plan=PLANET_DETAILS
+    )
+    return await fetched_planet.get_details()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.classes.loading import RESOURCE_DETAILS
 from src.classes.resource import ResourceRepresentation
 from src.db import get_session
 from src.models import ResourcePublic
@@ -8,6 +9,9 @@ router = APIRouter()
 
 
 @router.get("/resource/{resource_id}")
-async def get_resource(resource_id: str, session: Session = Depends(get_session)) -> ResourcePublic:
+async def get_resource(resource_id: str, session: AsyncSession = Depends(get_session)) -> ResourcePublic:
     """Get the details of the given Planet."""
-    return ResourceRepresentation.fetch_resource(session=session, name=resource_id).get_details()
+    fetched_resource: ResourceRepresentation = await ResourceRepresentation.fetch_resource(
+        session=session, name=resource_id, plan=RESOURCE_DETAILS
+    )
+    return await fetched_resource.get_details()
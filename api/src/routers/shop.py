@@ -1,55 +1,95 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.classes.company import CompanyRepresentation
 from src.classes.pagination import ShopPagination
 from src.classes.shop import ShopRepresentation
 from src.db import get_session
-from src.models import ShopItemCreate, ShopItemPublic, ShopItemPurchase, ShopItemPurchasedPublic, ShopItemUpdate
+from src.models import (
+    ShopItemCreate,
+    ShopItemImportPublic,
+    ShopItemPublic,
+    ShopItemPurchase,
+    ShopItemPurchasedPublic,
+    ShopItemUpdate,
+)
+from src.responses import TrustedJSONResponse
 
 router = APIRouter()
 
 
-@router.get("/shop")
-async def get_shop(params: ShopPagination = Depends(), session: Session = Depends(get_session)) -> dict[str, Any]:
+@router.get("/shop", response_model=dict[str, Any], response_class=TrustedJSONResponse)
+async def get_shop(
+    params: ShopPagination = Depends(), session: AsyncSession = Depends(get_session)
+) -> TrustedJSONResponse:
     """Get the items that are currently available in the shop to purchase.
 
     :param params: Pagination parameters.
     :param session: Database session.
     :return: Fetched shop items
     """
-    return ShopRepresentation.fetch_shop(session=session, params=params)
+    return TrustedJSONResponse(await ShopRepresentation.fetch_shop(session=session, params=params))
 
 
 @router.post("/shop", status_code=200)
-async def create_shop_item(data: ShopItemCreate, session: Session = Depends(get_session)) -> dict[str, str]:
+async def create_shop_item(data: ShopItemCreate, session: AsyncSession = Depends(get_session)) -> dict[str, str]:
     """Create a new Item in the Shop.
 
     :param data: Shop Item data.
     :param session: Database session.
     :return: None
     """
-    ShopRepresentation.create_item(session=session, data=data)
+    await ShopRepresentation.create_item(session=session, data=data)
     return {"message": "Shop Item successfully created."}
 
 
+@router.post("/shop/bulk", status_code=200)
+async def import_shop_items(
+    request: Request,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    session: AsyncSession = Depends(get_session),
+) -> ShopItemImportPublic:
+    """Create many Items in the Shop at once, e.g. for a seasonal catalog drop.
+
+    The body holds one Shop Item per line: a JSON object, or a CSV row under a `name,price,available_quantity` header.
+    The lines that cannot be imported are reported, and do not prevent the other ones from being imported.
+
+    :param request: Request, whose body holds the Shop Items.
+    :param format: Format of the body: `ndjson` or `csv`.
+    :param session: Database session.
+    :return: Number of Shop Items created, and the lines that could not be imported.
+    """
+    return await ShopRepresentation.import_items(session=session, body=await request.body(), import_format=format)
+
+
 @router.get("/shop/{item_id}")
-async def get_shop_item(item_id: int, session: Session = Depends(get_session)) -> ShopItemPublic | None:
+async def get_shop_item(item_id: int, session: AsyncSession = Depends(get_session)) -> ShopItemPublic | None:
     """Get the target Shop Item from the database.
 
     :param item_id: ID of the Shop Item to fetch.
     :param session: Database session.
     :return: Fetched Shop Item
     """
-    return ShopRepresentation.get_item(item_id=item_id, session=session).get_details()
+    return await ShopRepresentation.get_item_details(item_id=item_id, session=session)
+
+
+@router.get("/shop/by-name/{name}")
+async def get_shop_item_by_name(name: str, session: AsyncSession = Depends(get_session)) -> ShopItemPublic:
+    """Get the target Shop Item by its name.
+
+    :param name: Name of the Shop Item to fetch.
+    :param session: Database session.
+    :return: Fetched Shop Item
+    """
+    return await ShopRepresentation.get_item_details_by_name(name=name, session=session)
 
 
 @router.patch("/shop/{item_id}", status_code=200)
 async def update_shop_item(
     item_id: int,
     data: ShopItemUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> dict[str, str]:
     """Update the target Shop Item with the given Data.
 
@@ -58,13 +98,13 @@ async def update_shop_item(
     :param session: Database session.
     :return: None
     """
-    ShopRepresentation.update_item(session=session, data=data, item_id=item_id)
+    await ShopRepresentation.update_item(session=session, data=data, item_id=item_id)
     return {"message": "Shop Item successfully updated."}
 
 
 @router.post("/shop/{item_id}/buy", status_code=200)
 async def company_purchase_shop_item(
-    item_id: int, data: ShopItemPurchase, session: Session = Depends(get_session)
+    item_id: int, data: ShopItemPurchase, session: AsyncSession = Depends(get_session)
 ) -> ShopItemPurchasedPublic:
     """Target company purchases the target item.
 
@@ -73,10 +113,10 @@ async def company_purchase_shop_item(
     :param session: Database session.
     :return: None
     """
-    fetched_company: CompanyRepresentation = CompanyRepresentation.fetch_company(
+    fetched_company: CompanyRepresentation = await CompanyRepresentation.fetch_company(
         session=session, company_id=data.company_id
     )
-    target_item: ShopRepresentation.ShopItemRepresentation = ShopRepresentation.get_item(
+    target_item: ShopRepresentation.ShopItemRepresentation = await ShopRepresentation.get_item(
         session=session, item_id=item_id
     )
-    return target_item.purchase_item(company=fetched_company.get_company(), data=data)
+    return await target_item.purchase_item(company=fetched_company.get_company(), data=data)
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.achievement_engine import achievement_engine
 from src.db import get_session
+from src.experience import experience_buffer
+from src.metrics import experience_awarded
 from src.models import (
     Experience,
     User,
@@ -17,7 +21,7 @@ router = APIRouter()
 @router.get("/user/{user_id}")
 async def get_user(
     user_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> UserPublic:
     """Endpoint to retrieve an existing user.
 
@@ -25,20 +29,22 @@ async def get_user(
     :param session: Database session.
     :return: a representation of the user
     """
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
+    user = (await session.exec(select(User).where(User.user_id == user_id))).first()
 
     if user is None:
         raise HTTPException(404, "User not found")
+
+    experience: int = user.experience + experience_buffer.pending(user_id)
     return UserPublic(
         user_id=user_id,
-        experience=Experience(level=Experience.level_from_experience(user.experience), experience=user.experience),
+        experience=Experience(level=Experience.level_from_experience(experience), experience=experience),
     )
 
 
 @router.post("/user/{user_id}")
 async def create_user(
     user_id: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> UserCreatePublic:
     """Endpoint to register a new user.
 
@@ -46,12 +52,12 @@ async def create_user(
     :param session: Database session.
     :return: id of the newly registered user
     """
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
+    user = (await session.exec(select(User).where(User.user_id == user_id))).first()
 
     if user is None:
         user = User(user_id=user_id)
         session.add(user)
-        session.commit()
+        await session.commit()
     else:
         raise HTTPException(409, "User already exists")
     return UserCreatePublic(id=user_id)
@@ -61,36 +67,38 @@ async def create_user(
 async def add_user_experience(
     user_id: str,
     new_experience: UserAddExperience,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> UserExperienceReturn:
     """Endpoint to add to the given User's experience.
 
+    The experience is buffered, and written to the database along with the experience awarded to other Users.
+
     :param user_id: ID of the User to retrieve.
+    :param new_experience: Represents the integer value of the experience to add.
     :param session: Database session.
     :return: Experience (an integer representing the user's experience)
     """
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
+    experience = await experience_buffer.add_to_user(session, user_id, new_experience.experience)
 
-    if user is None:
+    if experience is None:
         raise HTTPException(404, "User not found")
 
-    current_level = Experience.level_from_experience(user.experience)
-
-    user.experience += new_experience.experience
-    session.add(user)
-    session.commit()
+    if new_experience.experience > 0:
+        experience_awarded.inc("user", amount=new_experience.experience)
 
-    new_level = Experience.level_from_experience(user.experience)
+    before, after = experience
+    current_level = Experience.level_from_experience(before)
+    new_level = Experience.level_from_experience(after)
     levelled_up = current_level < new_level
 
-    return UserExperienceReturn(level_up=levelled_up, new_level=new_level, new_experience=user.experience)
+    return UserExperienceReturn(level_up=levelled_up, new_level=new_level, new_experience=after)
 
 
 @router.post("/user/{user_id}/experience/set")
 async def set_user_experience(
     user_id: str,
     new_experience: UserSetExperience,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> UserExperienceReturn:
     """Endpoint to set the given User's experience.
 
@@ -99,16 +107,22 @@ async def set_user_experience(
     :param session: Database session.
     :return: Experience (an integer representing the user's new experience)
     """
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
+    # The experience awarded before is overwritten, rather than added once it is written
+    await experience_buffer.flush()
+
+    user = (await session.exec(select(User).where(User.user_id == user_id))).first()
 
     if user is None:
         raise HTTPException(404, "User not found")
 
-    current_level = Experience.level_from_experience(user.experience)
+    before: int = user.experience
+    current_level = Experience.level_from_experience(before)
 
     user.experience = new_experience.experience
     session.add(user)
-    session.commit()
+    await session.commit()
+    experience_buffer.forget(user_id)
+    achievement_engine.experience_changed(user_id, before, user.experience)
 
     new_level = Experience.level_from_experience(user.experience)
     levelled_up = current_level < new_level
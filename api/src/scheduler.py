@@ -0,0 +1,326 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, not_, select
+
+from .achievement_engine import achievement_engine
+from .db import DATABASE_URL, engine
+from .harvest import HarvestResult, HarvestState, lock_for_harvest
+from .leaderboard import Leaderboard, leaderboard
+from .models import Company, ShopItem
+from .shop_catalog import ShopCatalog, shop_catalog
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+scheduler_logger = logging.getLogger(__name__)
+
+# Harvest scheduler configuration
+SCHEDULER_ENABLED: bool = os.environ.get("HARVEST_SCHEDULER", "true").lower() not in {"0", "false", "no"}
+TICK_INTERVAL: float = float(os.environ.get("HARVEST_TICK_INTERVAL", "300"))
+TICK_BATCH_SIZE: int = int(os.environ.get("HARVEST_BATCH_SIZE", "5000"))
+# Shared by every worker using the same database, the one holding it runs the ticks
+LOCK_PATH: Path = Path(
+    os.environ.get(
+        "HARVEST_SCHEDULER_LOCK",
+        Path(tempfile.gettempdir()).joinpath(
+            f"exoplanets-harvest-{hashlib.sha256(DATABASE_URL.encode()).hexdigest()[:16]}.lock"
+        ),
+    )
+)
+
+
+class TickMetrics:
+    """Running totals describing the harvesting ticks run by this worker."""
+
+    def __init__(self) -> None:
+        self.ticks: int = 0
+        self.failed: int = 0
+        self.skipped: int = 0
+        self.total_duration: float = 0
+        self.max_duration: float = 0
+        self.last_tick: dict[str, Any] | None = None
+
+    def record_tick(
+        self, duration: float, phases: dict[str, float], companies: int, resources: int, batches: int
+    ) -> None:
+        """Record a completed tick.
+
+        :param duration: Seconds taken by the whole tick.
+        :param phases: Seconds spent loading, harvesting and writing, summed over the batches.
+        :param companies: Number of Companies harvested.
+        :param resources: Number of Resources harvested.
+        :param batches: Number of batches the tick was split into.
+        :return: None
+        """
+        self.ticks += 1
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.last_tick = {
+            "finished_at": datetime.now(),  # noqa: DTZ005, timestamps are stored as naive local times
+            "duration_ms": duration * 1000,
+            **{f"{phase}_ms": seconds * 1000 for phase, seconds in phases.items()},
+            "companies": companies,
+            "resources": resources,
+            "batches": batches,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the metrics as a dict."""
+        return {
+            "ticks": self.ticks,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "avg_duration_ms": (self.total_duration / self.ticks) * 1000 if self.ticks else 0,
+            "max_duration_ms": self.max_duration * 1000,
+            "last_tick": self.last_tick,
+        }
+
+
+class HarvestScheduler:
+    """Runs a harvesting tick for every active Company at a fixed interval, on a background thread.
+
+    When several workers are started, they all run a scheduler, but only the one holding the lock file runs the
+    ticks. The others wait to take over should it stop. Every scheduler refreshes its worker's leaderboard and Shop
+    catalog after each interval, so all workers see the networths earned in the ticks and the changes made to the
+    Shop by the other workers.
+
+    Ticks never pile up: if one takes longer than the interval, the ticks that were due in the meantime are skipped
+    rather than run back to back. Each tick is split into batches of Companies, each committed on its own, so that
+    requests only ever wait on the database for the duration of a batch.
+    """
+
+    def __init__(self, interval: float, batch_size: int, lock_path: Path) -> None:
+        self.interval: float = interval
+        self.batch_size: int = batch_size
+        self.lock_path: Path = lock_path
+        self.metrics: TickMetrics = TickMetrics()
+
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock_file: IO[bytes] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this worker holds the lock, and so is the one running the ticks."""
+        return self._lock_file is not None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the state and configuration of the scheduler, along with its tick metrics, as a dict."""
+        return {
+            "running": self._thread is not None,
+            "is_leader": self.is_leader,
+            "interval_s": self.interval,
+            "batch_size": self.batch_size,
+            **self.metrics.as_dict(),
+        }
+
+    def start(self) -> None:
+        """Start the scheduler thread. Must be called from the event loop serving the requests.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="harvest-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread, waiting for the batch being harvested, and release the lock.
+
+        :return: None
+        """
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._release_lock()
+
+    def _acquire_lock(self) -> bool:
+        """Try to take the lock shared by the workers, without waiting for it.
+
+        :return: Whether this worker now holds the lock.
+        """
+        if self._lock_file is not None:
+            return True
+
+        lock_file: IO[bytes] = self.lock_path.open("a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        scheduler_logger.info(f"harvest scheduler is running ticks (pid {os.getpid()})")
+        return True
+
+    def _release_lock(self) -> None:
+        """Release the lock, if held. Closing the file releases it."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _run(self) -> None:
+        """Body of the scheduler thread."""
+        next_tick: float = time.monotonic()
+
+        while not self._stop.wait(max(next_tick - time.monotonic(), 0)):
+            if self._acquire_lock():
+                try:
+                    self.tick()
+
+                except SQLAlchemyError:
+                    self.metrics.failed += 1
+                    scheduler_logger.exception("harvesting tick failed")
+
+            try:
+                self._refresh_leaderboard()
+
+            except SQLAlchemyError:
+                scheduler_logger.exception("leaderboard refresh failed")
+
+            try:
+                self._refresh_shop_catalog()
+
+            except SQLAlchemyError:
+                scheduler_logger.exception("shop catalog refresh failed")
+
+            # Back-pressure: skip the ticks that were due while this one was running
+            next_tick += self.interval
+            if (behind := time.monotonic() - next_tick) > 0:
+                skipped: int = int(behind // self.interval) + 1
+                self.metrics.skipped += skipped
+                next_tick += skipped * self.interval
+                scheduler_logger.warning(f"harvesting is falling behind, skipped {skipped} ticks")
+
+    def tick(self) -> None:
+        """Harvest every active Company up to now, one batch at a time.
+
+        :return: None
+        """
+        now: datetime = datetime.now()  # noqa: DTZ005, timestamps are stored as naive local times
+        start: float = time.perf_counter()
+        phases: dict[str, float] = {"load": 0, "harvest": 0, "write": 0}
+        companies: int = 0
+        resources: int = 0
+        batches: int = 0
+        after: int = 0
+
+        while not self._stop.is_set():
+            with engine.begin() as connection:
+                lock_for_harvest(connection)
+
+                t0: float = time.perf_counter()
+                state: HarvestState = HarvestState.load(
+                    connection,
+                    where=Company.id > after,  # type: ignore[reportOptionalOperand]
+                    limit=self.batch_size,
+                )
+                t1: float = time.perf_counter()
+                result: HarvestResult = state.tick(now)
+                t2: float = time.perf_counter()
+                result.write(connection)
+
+            result.record_metrics("scheduler")
+            self._call_on_loop(achievement_engine.experiences_changed, result.experience_changes)
+            phases["load"] += t1 - t0
+            phases["harvest"] += t2 - t1
+            phases["write"] += time.perf_counter() - t2
+
+            if len(result) == 0:
+                break
+
+            companies += len(result)
+            resources += len(state)
+            batches += 1
+            after = int(state.company_ids[-1])
+
+            if len(result) < self.batch_size:
+                break
+
+        duration: float = time.perf_counter() - start
+        self.metrics.record_tick(duration, phases, companies, resources, batches)
+        scheduler_logger.debug(
+            f"harvested {resources} resources for {companies} companies in {batches} batches, {duration:.3f}s"
+        )
+
+    def _call_on_loop(self, callback: Callable[..., object], *args: object) -> None:
+        """Run a callback on the event loop serving the requests, which owns the in-memory state it modifies.
+
+        :param callback: Function to call.
+        :param args: Arguments to call it with.
+        :return: None
+        """
+        if self._loop is None:
+            return
+
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+        except RuntimeError:
+            # The event loop has already been closed
+            return
+
+    def _refresh_leaderboard(self) -> None:
+        """Rebuild the leaderboard from the database, and hand it over to the event loop serving the requests.
+
+        The leaderboard is only ever modified from the event loop, so it is rebuilt on the side and then swapped in,
+        along with the changes the requests made to it since it started being read.
+        """
+        if self._loop is None:
+            return
+
+        since: float = time.monotonic()
+        with engine.connect() as connection:
+            entries: list[Any] = list(
+                connection.execute(select(Company.id, Company.networth).where(not_(Company.is_bankrupt))).all()
+            )
+
+        fresh: Leaderboard = Leaderboard()
+        fresh.rebuild(entries)
+
+        self._call_on_loop(leaderboard.replace, fresh, since)
+        self._call_on_loop(achievement_engine.leaderboard_changed)
+
+    def _refresh_shop_catalog(self) -> None:
+        """Reload the Shop catalog from the database, and merge it into the catalog of the event loop."""
+        if self._loop is None:
+            return
+
+        with Session(engine) as session:
+            fresh: ShopCatalog = ShopCatalog()
+            fresh.rebuild(session.exec(select(ShopItem)).all())
+
+        try:
+            self._loop.call_soon_threadsafe(shop_catalog.merge, fresh)
+
+        except RuntimeError:
+            # The event loop has already been closed
+            return
+
+
+harvest_scheduler: HarvestScheduler = HarvestScheduler(TICK_INTERVAL, TICK_BATCH_SIZE, LOCK_PATH)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Any
+
+from src.autocomplete import PrefixIndex
+from src.models import ShopItem, ShopItemPublic
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+catalog_logger = logging.getLogger(__name__)
+
+type CatalogKey = tuple[Any, int]
+
+# Attribute of the Shop Items each sort is done by
+SORT_ATTRIBUTES: dict[str, str] = {"id": "id", "price": "price", "quantity": "available_quantity", "name": "name"}
+
+
+class ShopCatalog:
+    """In-memory copy of the Shop, indexed by ID and by name (and its prefix), and sorted by price, quantity and name.
+
+    Each worker process keeps its own copy, which is loaded from the database at startup, patched by the endpoints
+    changing the Shop Items once their changes are committed, and periodically reloaded by the harvest scheduler to
+    pick up the changes made by the other workers.
+
+    As the patches are applied after their commit, they can arrive out of order. Each one is therefore tagged with the
+    `version` of the Shop Item it was read at: newer versions replace older ones, and within a version the stock only
+    ever goes down (through purchases), so the lowest stock is the latest.
+    """
+
+    def __init__(self) -> None:
+        self.loaded: bool = False
+
+        self._items: dict[int, ShopItemPublic] = {}
+        self._versions: dict[int, int] = {}
+        self._by_name: dict[str, int] = {}
+        # (value, ID) keys of all the Shop Items, of the disabled ones and of the enabled ones, in ascending order
+        self._indexes: dict[str, dict[bool | None, list[CatalogKey]]] = {
+            sort: {None: [], True: [], False: []} for sort in SORT_ATTRIBUTES
+        }
+        self.names: PrefixIndex = PrefixIndex()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _key(item: ShopItemPublic, sort: str) -> CatalogKey:
+        return getattr(item, SORT_ATTRIBUTES[sort]), item.id
+
+    def rebuild(self, items: Iterable[ShopItem]) -> None:
+        """Replace the catalog with the given Shop Items.
+
+        :param items: Every Shop Item.
+        :return: None
+        """
+        self._items = {}
+        self._versions = {}
+
+        for item in items:
+            if item.id is not None:
+                self._items[item.id] = ShopItemPublic.model_validate(item)
+                self._versions[item.id] = item.version
+
+        self._by_name = {item.name: item_id for item_id, item in self._items.items()}
+        self._indexes = {
+            sort: {
+                is_disabled: sorted(
+                    self._key(item, sort)
+                    for item in self._items.values()
+                    if is_disabled is None or item.is_disabled == is_disabled
+                )
+                for is_disabled in (None, True, False)
+            }
+            for sort in SORT_ATTRIBUTES
+        }
+        self.names.rebuild(((item.name,), item.name, item.name) for item in self._items.values())
+        self.loaded = True
+
+        catalog_logger.debug(f"shop catalog rebuilt with {len(self._items)} items")
+
+    def merge(self, other: ShopCatalog) -> None:
+        """Bring in the Shop Items of another catalog, e.g. one reloaded in the background.
+
+        :param other: Catalog to merge.
+        :return: None
+        """
+        for item_id, item in other._items.items():  # noqa: SLF001
+            self._put(item, other._versions[item_id])  # noqa: SLF001
+
+    def put(self, item: ShopItem) -> None:
+        """Add the Shop Item to the catalog, or bring it up to date.
+
+        :param item: Shop Item, as committed to the database.
+        :return: None
+        """
+        if item.id is not None:
+            self._put(ShopItemPublic.model_validate(item), item.version)
+
+    def _put(self, item: ShopItemPublic, version: int) -> None:
+        """Add the Shop Item to the catalog, or merge it with the copy already there.
+
+        :param item: Details of the Shop Item.
+        :param version: Version of the Shop Item the details were read at.
+        :return: None
+        """
+        current: ShopItemPublic | None = self._items.get(item.id)
+
+        if current is not None:
+            current_version: int = self._versions[item.id]
+
+            if version < current_version:
+                return
+
+            if version == current_version:
+                if item.available_quantity >= current.available_quantity and current.is_disabled >= item.is_disabled:
+                    return
+                item = current.model_copy(
+                    update={
+                        "available_quantity": min(item.available_quantity, current.available_quantity),
+                        "is_disabled": current.is_disabled or item.is_disabled,
+                    }
+                )
+
+            self._remove(current)
+
+        self._items[item.id] = item
+        self._versions[item.id] = version
+        self._by_name[item.name] = item.id
+        self.names.add(item.name, item.name, item.name)
+
+        for sort, indexes in self._indexes.items():
+            key: CatalogKey = self._key(item, sort)
+            insort(indexes[None], key)
+            insort(indexes[item.is_disabled], key)
+
+    def _remove(self, item: ShopItemPublic) -> None:
+        """Remove the Shop Item from the indexes.
+
+        :param item: Details of the Shop Item, as indexed.
+        :return: None
+        """
+        if self._by_name.get(item.name) == item.id:
+            del self._by_name[item.name]
+        self.names.discard(item.name, item.name, item.name)
+
+        for sort, indexes in self._indexes.items():
+            key: CatalogKey = self._key(item, sort)
+            for index in (indexes[None], indexes[item.is_disabled]):
+                del index[bisect_left(index, key)]
+
+    def get(self, item_id: int) -> ShopItemPublic | None:
+        """Get the Shop Item with the given ID.
+
+        :param item_id: ID of the Shop Item.
+        :return: Shop Item, or None if it is not in the catalog.
+        """
+        return self._items.get(item_id)
+
+    def get_by_name(self, name: str) -> ShopItemPublic | None:
+        """Get the Shop Item with the given name.
+
+        :param name: Name of the Shop Item.
+        :return: Shop Item, or None if it is not in the catalog.
+        """
+        item_id: int | None = self._by_name.get(name)
+        return self._items[item_id] if item_id is not None else None
+
+    def index(self, sort: str, is_disabled: bool | None = None) -> list[CatalogKey]:
+        """Get the (value, ID) keys of the Shop Items, in ascending order. Not to be modified.
+
+        :param sort: What to sort the Shop Items by: `price`, `quantity`, `name`, or anything else for their ID.
+        :param is_disabled: Only get the disabled Shop Items, or only the enabled ones.
+        :return: Sorted keys.
+        """
+        return self._indexes[sort if sort in SORT_ATTRIBUTES else "id"][is_disabled]
+
+
+shop_catalog: ShopCatalog = ShopCatalog()
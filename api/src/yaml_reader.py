@@ -1,5 +1,10 @@
+import hashlib
 import logging
 import math
+import mmap
+import os
+import pickle
+import tempfile
 import warnings
 from collections.abc import Callable
 from pathlib import Path
@@ -10,9 +15,56 @@ import yaml
 yaml_logger = logging.getLogger(__name__)
 root = Path().absolute()
 
+# Directory holding the compiled snapshots of the config files
+snapshot_dir = Path(os.environ.get("GAME_CONFIG_SNAPSHOTS", root.joinpath("game_config", ".snapshots")))
+
+# Use the libyaml parser when PyYAML has been built with it
+_Loader: Any = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class DecayFunction:
+    """Decay function of a resource, along with its inverse.
+
+    Called as `(init_units, epoch) -> units left rounded`, like a plain function.
+    """
+
+    def __init__(
+        self, function: Callable[[float, float], float], inverse: Callable[[float], float] | None = None
+    ) -> None:
+        self._function: Callable[[float, float], float] = function
+        # Epoch at which the units left reach -0.5 (and so round below zero), or None if they never do
+        self._inverse: Callable[[float], float] | None = inverse
+
+    def __call__(self, init_units: float, epoch: float) -> float:
+        """Get the units left at the given epoch."""
+        return self._function(init_units, epoch)
+
+    def last_epoch(self, init_units: float) -> float:
+        """Get the last epoch at which the units left are not negative.
+
+        :param init_units: Initial amount of units, must not be negative.
+        :return: Last epoch, or infinity if the units left are never negative.
+        """
+        if self._inverse is None:
+            return math.inf
+
+        last: int = math.floor(self._inverse(init_units))
+
+        # Absorb any floating point error around the boundary
+        while self(init_units, last + 1) >= 0:
+            last += 1
+        while self(init_units, last) < 0:
+            last -= 1
+
+        return last
+
 
 class YamlReader:
-    """Class to read YAML config files."""
+    """Class to read YAML config files.
+
+    Each file is only parsed once per version: the parsed contents are compiled to a snapshot named after
+    the hash of the file, which every later read (in this or any other process) loads instead.
+    """
 
     def __init__(self, filename: str) -> None:
         if not filename.endswith(".yaml"):
@@ -20,9 +72,79 @@ class YamlReader:
             raise ValueError(error)
 
         filepath = root.joinpath("game_config", filename)
-        yaml_logger.debug(f"reading {filename}")
-        with filepath.open() as file:
-            self.contents: dict[str, Any] = yaml.safe_load(file)
+        raw: bytes = filepath.read_bytes()
+        snapshot: Path = snapshot_dir.joinpath(f"{filepath.stem}-{hashlib.sha256(raw).hexdigest()}.pickle")
+
+        try:
+            self.contents: dict[str, Any] = self._load_snapshot(snapshot)
+            yaml_logger.debug(f"read {filename} from snapshot")
+
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            yaml_logger.debug(f"reading {filename}")
+            self.contents = yaml.load(raw, Loader=_Loader)  # noqa: S506
+            self.validate(filename, self.contents)
+            self._write_snapshot(snapshot, self.contents)
+
+    @staticmethod
+    def _load_snapshot(snapshot: Path) -> dict[str, Any]:
+        """Load the contents of a config file from its snapshot.
+
+        :param snapshot: Path to the snapshot.
+        :return: Contents of the config file.
+        """
+        with snapshot.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+            return pickle.loads(blob)  # noqa: S301
+
+    @staticmethod
+    def _write_snapshot(snapshot: Path, contents: dict[str, Any]) -> None:
+        """Write the snapshot of a config file, replacing it atomically so concurrent readers never see half of it.
+
+        :param snapshot: Path to the snapshot.
+        :param contents: Contents of the config file.
+        :return: None
+        """
+        try:
+            snapshot.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=snapshot.parent, suffix=".tmp", delete=False) as file:
+                pickle.dump(contents, file, protocol=pickle.HIGHEST_PROTOCOL)
+            Path(file.name).replace(snapshot)
+
+            # Remove the snapshots of older versions of the file
+            for old in snapshot.parent.glob(f"{snapshot.stem.rsplit('-', 1)[0]}-*.pickle"):
+                if old != snapshot:
+                    old.unlink(missing_ok=True)
+
+        except OSError as ex:
+            yaml_logger.warning(f"cannot write config snapshot {snapshot.name}: {ex}")
+
+    @classmethod
+    def validate(cls, filename: str, contents: Any) -> None:  # noqa: ANN401
+        """Check that a config file holds a mapping, and that its decay functions are valid.
+
+        :param filename: Name of the config file.
+        :param contents: Parsed contents of the config file.
+        :return: None
+        """
+        if not isinstance(contents, dict):
+            error = f"{filename} must contain a mapping"
+            raise TypeError(error)
+
+        cursors: list[dict[str, Any]] = [contents]
+        while cursors:
+            cursor: dict[str, Any] = cursors.pop()
+            if "decay_function" in cursor:
+                cls.str_to_decay_function(cursor["decay_function"], cursor.get("decay_factor", 1))
+            cursors.extend(value for value in cursor.values() if isinstance(value, dict))
+
+    @staticmethod
+    def fingerprint(filename: str) -> str:
+        """Hash the contents of a config file, without parsing it.
+
+        :param filename: Name of the config file.
+        :return: SHA-256 hex digest of the file.
+        """
+        filepath = root.joinpath("game_config", filename)
+        return hashlib.sha256(filepath.read_bytes()).hexdigest()
 
     def parse_special(self, cursor: dict[str, Any]) -> None:
         """Parse special YAML content."""
@@ -40,7 +162,7 @@ class YamlReader:
     def str_to_decay_function(
         fct_name: str,
         factor: float = 1,
-    ) -> Callable[[int, int], float]:
+    ) -> DecayFunction:
         """Match a string to a decay function.
 
         :param fct_name: Decay function name
@@ -48,7 +170,8 @@ class YamlReader:
         :param factor: Decay function factor
         :type factor: float
 
-        :returns: a callable object for the decay function (init_units:int, epoch:int) -> (resources left: float)
+        :returns: a callable object for the decay function (init_units:int, epoch:int) -> (resources left: float),
+            which also gives the last epoch at which resources are left
 
         """
         match fct_name:
@@ -57,22 +180,47 @@ class YamlReader:
                     error = "Linear factor must be strictly positive"
                     raise ValueError(error)
 
-                return lambda init_units, x: round(init_units - x * factor, 0)
+                return DecayFunction(
+                    lambda init_units, x: round(init_units - x * factor, 0),
+                    lambda init_units: (init_units + 0.5) / factor,
+                )
 
             case "geometric":
                 if not 0 <= factor < 1:
                     error = "Geometric factor must be in [0, 1]"
                     raise ValueError(error)
 
-                return lambda init_units, x: round(init_units * factor**x, 0)
+                # Never negative, the units left only tend towards zero
+                return DecayFunction(lambda init_units, x: round(init_units * factor**x, 0))
 
             case "exponential":
                 if factor <= 0:
                     error = "Exponential factor must be strictly positive"
                     raise ValueError(error)
 
-                return lambda init_units, x: round(init_units * math.exp(-x / factor), 0)
+                # Never negative, the units left only tend towards zero
+                return DecayFunction(lambda init_units, x: round(init_units * math.exp(-x / factor), 0))
 
             case _:
                 error = "Unknown fct_name"
                 raise ValueError(error)
+
+
+class LazyConfig:
+    """Class attribute holding the contents of a config file, read the first time it is accessed."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename: str = filename
+        self._contents: dict[str, Any] | None = None
+
+    def __get__(self, instance: object, owner: type) -> dict[str, Any]:
+        if self._contents is None:
+            self._contents = YamlReader(self.filename).contents
+        return self._contents
+
+
+def compile_snapshots() -> None:
+    """Validate every config file and compile its snapshot, so the server does not have to parse YAML at startup."""
+    for filepath in sorted(root.joinpath("game_config").glob("*.yaml")):
+        YamlReader(filepath.name)
+        print(f"Compiled {filepath.name}")
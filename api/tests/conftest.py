@@ -0,0 +1,4 @@
+import os
+
+# The app reads its configuration at import, the tests only need it to point at a database
+os.environ.setdefault("DATABASE", "sqlite://")
@@ -0,0 +1,37 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from src.query_profiler import QueryProfiler, slow_query_logger
+
+
+@pytest.fixture()
+def profiler(tmp_path: Path) -> Iterator[QueryProfiler]:
+    """Query profiler logging every statement as slow, to a log file in a directory that does not exist yet."""
+    profiler: QueryProfiler = QueryProfiler(
+        enabled=True, slow_query_ms=0, repeat_threshold=5, slow_query_log=tmp_path.joinpath("logs", "slow.log")
+    )
+    yield profiler
+
+    if profiler.slow_query_handler is not None:
+        slow_query_logger.removeHandler(profiler.slow_query_handler)
+        profiler.slow_query_handler.close()
+    slow_query_logger.propagate = True
+
+
+def test_slow_query_log(profiler: QueryProfiler, caplog: pytest.LogCaptureFixture) -> None:
+    bind: Engine = create_engine("sqlite://")
+    profiler.instrument(bind)
+
+    with bind.connect() as connection:
+        connection.execute(text("CREATE TABLE planet (name TEXT)"))
+        connection.execute(text("SELECT name FROM planet WHERE name = :name"), {"name": "EA0000"})
+
+    # Nothing reaches the root logger, nor the stderr fallback used when no handler is found. Checked first, as the
+    # log file is missing when there is no handler.
+    assert not [record for record in caplog.records if record.name == slow_query_logger.name]
+
+    log: str = profiler.slow_query_log.read_text()
+    assert "SELECT name FROM planet WHERE name = ?" in log
+    assert "SCAN planet" in log
@@ -0,0 +1,102 @@
+import random
+
+from src.resource import Resource
+from src.yaml_reader import DecayFunction, YamlReader
+
+# Decay functions and factors to check, besides the ones of the config
+DECAY_FUNCTIONS: list[tuple[str, float]] = [
+    ("linear", 1.0),
+    ("linear", 0.3),
+    ("linear", 2.5),
+    ("linear", 7.0),
+    ("geometric", 0.986),
+    ("geometric", 0.5),
+    ("geometric", 0.0),
+    ("exponential", 75.0),
+    ("exponential", 0.4),
+]
+# Initial units, including amounts whose units left land right on the rounding of a half
+INIT_UNITS: list[float] = [0.0, 0.4, 0.5, 1.0, 2.5, 3.5, 10.0, 99.5, 100.0, 1234.567]
+
+
+def collect_by_epoch(resource: Resource, n: int) -> float | None:
+    """Collect the resource like `Resource.collect` used to, trying each epoch from `n` epochs away down to 1.
+
+    :param resource: Resource to collect.
+    :param n: Number of epochs to collect.
+    :return: Amount of units collected, or None if none can be collected.
+    """
+    for i in range(n, 0, -1):
+        if resource.decay_function(resource.init_units, resource.epoch + i) >= 0:
+            before_collection = resource.get_units_collected()
+            resource.epoch += i
+            return resource.get_units_collected() - before_collection
+
+    return None
+
+
+def assert_collects_like_loop(resource: Resource, reference: Resource, epochs: list[int]) -> None:
+    """Collect both resources the given numbers of epochs in turn, checking they collect the same every time.
+
+    :param resource: Resource collected with `Resource.collect`.
+    :param reference: Same resource, collected with `collect_by_epoch`.
+    :param epochs: Number of epochs of each collection.
+    :return: None
+    """
+    for n in epochs:
+        case: str = f"init_units={resource.init_units}, epoch={resource.epoch}, n={n}"
+        assert resource.collect(n) == collect_by_epoch(reference, n), case
+        assert resource.epoch == reference.epoch, case
+
+
+def test_collect_config_resources() -> None:
+    rng: random.Random = random.Random(9)
+
+    for r_id, config in Resource.config.items():
+        for tier in range(config["min_tier"], config["min_tier"] + 4):
+            init_units: float = Resource(r_id, tier).init_units
+            assert_collects_like_loop(
+                Resource(r_id, tier, init_units=init_units),
+                Resource(r_id, tier, init_units=init_units),
+                [rng.randint(1, 200) for _ in range(20)],
+            )
+
+
+def test_collect_decay_functions() -> None:
+    rng: random.Random = random.Random(9)
+    r_id: str = next(iter(Resource.config))
+
+    for name, factor in DECAY_FUNCTIONS:
+        decay: DecayFunction = YamlReader.str_to_decay_function(name, factor)
+
+        for init_units in [*INIT_UNITS, *(rng.uniform(0, 500) for _ in range(10))]:
+            for start in (0, 1, 7, 50):
+                resource: Resource = Resource(r_id, init_units=init_units, epoch=start)
+                reference: Resource = Resource(r_id, init_units=init_units, epoch=start)
+                resource.decay_function = reference.decay_function = decay
+
+                assert_collects_like_loop(resource, reference, [rng.randint(1, 60) for _ in range(10)])
+
+
+def test_collect_runs_out() -> None:
+    """The units run out at the last epoch, whether the collection stops right before, on or past it."""
+    r_id: str = next(iter(Resource.config))
+
+    for factor in (1.0, 0.3, 2.5, 7.0):
+        decay: DecayFunction = YamlReader.str_to_decay_function("linear", factor)
+
+        for init_units in INIT_UNITS:
+            last: int = int(decay.last_epoch(init_units))
+            assert decay(init_units, last) >= 0
+            assert decay(init_units, last + 1) < 0
+
+            for n in (last - 1, last, last + 1, last + 100):
+                if n < 1:
+                    continue
+
+                resource: Resource = Resource(r_id, init_units=init_units)
+                reference: Resource = Resource(r_id, init_units=init_units)
+                resource.decay_function = reference.decay_function = decay
+
+                # Then again, once there is little or nothing left
+                assert_collects_like_loop(resource, reference, [n, 1, 5])
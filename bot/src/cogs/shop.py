@@ -13,12 +13,10 @@ if TYPE_CHECKING:
 
 
 async def item_autocomplete(ctx: AutocompleteContext) -> list[str]:
-    shop = (
-        ctx.bot.interface.shop.iter_items()  # pyright: ignore[reportAttributeAccessIssue]
+    return await ctx.bot.interface.shop.autocomplete_names(  # pyright: ignore[reportAttributeAccessIssue]
+        ctx.value or ""
     )
 
-    return [item.name async for item in shop]
-
 
 class Confirm(discord.ui.View):
     """Discord view with confirm/cancel buttons."""
@@ -106,15 +104,9 @@ class Shop(commands.Cog):
             await ctx.error("You do not have a company.")
             return
 
-        shop = self.client.interface.shop.iter_items()
-        shop_item: ShopItem | None = None
-
-        async for i in shop:
-            if i.name == item:
-                shop_item = i
-                break
-
-        if shop_item is None:
+        try:
+            shop_item: ShopItem = await self.client.interface.shop.get_shop_item_by_name(item)
+        except DoesNotExistError:
             await ctx.error("Could not find item.")
             return
 
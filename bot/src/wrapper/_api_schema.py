@@ -32,6 +32,13 @@ type BatchCompaniesOutput = list[CompanyGetIdOutput]
 """JSON data for GET /companies endpoint output"""
 
 
+class CompaniesPageOutput(TypedDict):
+    """JSON data for GET /companies endpoint output, when paginating by cursor."""
+
+    companies: BatchCompaniesOutput
+    next_cursor: str | None
+
+
 class RawItem(TypedDict):
     """A item object."""
 
@@ -78,10 +85,33 @@ class CompanyIdInventoryGetOutput(TypedDict):
 type ShopGetOutput = list[RawShopItem]
 """JSON data for GET /shop endpoint output."""
 
+
+class ShopPageOutput(TypedDict):
+    """JSON data for GET /shop endpoint output, when paginating by cursor."""
+
+    shop_items: ShopGetOutput
+    next_cursor: str | None
+
+
 type ShopIdGetOutput = RawShopItem
 """JSON data for GET /shop/{id} endpoint output."""
 
 
+class AutocompleteSuggestion(TypedDict):
+    """A suggestion from the autocomplete."""
+
+    name: str
+    value: str
+
+
+class AutocompleteOutput(TypedDict):
+    """JSON data for GET /autocomplete/{kind} endpoint output."""
+
+    kind: str
+    prefix: str
+    suggestions: list[AutocompleteSuggestion]
+
+
 class ShopBuyInput(TypedDict):
     """JSON data for PUT /shop/{id}/buy endpoint input."""
 
@@ -167,6 +197,21 @@ class ShopPostInput(TypedDict):
     available_quantity: int
 
 
+class ShopBulkError(TypedDict):
+    """A line of a shop item import that could not be imported."""
+
+    line: int
+    name: str | None
+    detail: str
+
+
+class ShopBulkPostOutput(TypedDict):
+    """JSON data for POST /shop/bulk endpoint output."""
+
+    created: int
+    errors: list[ShopBulkError]
+
+
 class CompanyIdAchievementGetOutput(TypedDict):
     first_achievement: str
     latest_achievement: str
@@ -1,13 +1,17 @@
+import json
 from collections.abc import Callable, Coroutine
 from enum import IntEnum
 from typing import Literal
+from urllib.parse import quote
 
 import aiohttp
 
 from ._api_schema import (
     AchievementGetOutput,  # Achievement
     AchievementIdGetOutput,  # Company
+    AutocompleteOutput,
     BatchCompaniesOutput,
+    CompaniesPageOutput,
     CompanyGetIdOutput,
     CompanyIdAchievementGetOutput,
     CompanyIdInventoryGetOutput,
@@ -17,10 +21,12 @@ from ._api_schema import (
     RawResource,
     RawResourceCollector,
     RawShopItem,  # Shop
+    ShopBulkPostOutput,
     ShopBuyInput,
     ShopBuyOutput,
     ShopGetOutput,
     ShopIdPatchInput,
+    ShopPageOutput,
     ShopPostInput,
     UserIdExperiencePatchInput,  # User
     UserIdExperiencePatchOutput,
@@ -51,6 +57,7 @@ class Status(IntEnum):
     FORBIDDEN = 403
     NOT_FOUND = 404
     CONFLICT = 409
+    CONTENT_TOO_LARGE = 413
 
 
 class CompanyRawAPI:
@@ -165,6 +172,36 @@ class CompanyRawAPI:
 
         return await make_request(session, caller)
 
+    @staticmethod
+    async def list_companies_by_cursor(
+        session: aiohttp.ClientSession,
+        cursor: str = "",
+        limit: int = 10,
+        *,
+        ascending: bool = False,
+    ) -> CompaniesPageOutput:
+        """Get a page of the registered Companies, continuing from the given cursor."""
+
+        async def caller(session: aiohttp.ClientSession) -> CompaniesPageOutput:
+            async with (
+                session.get(
+                    "/companies",
+                    params={"cursor": cursor, "limit": limit, "ascending": str(ascending)},
+                ) as resp,
+            ):
+                if resp.ok:
+                    return await resp.json()
+                if resp.status == Status.NOT_FOUND:
+                    message = "No company found"
+                    raise DoesNotExistError(message)
+                message = (
+                    "Undefined behaviour bot.src.wrapper.CompanyRawAPI.list_companies_by_cursor,"
+                    f" Status received {resp.status}"
+                )
+                raise UnknownNetworkError(message)
+
+        return await make_request(session, caller)
+
     @staticmethod
     async def get_company_inventory(session: aiohttp.ClientSession, user_id: int) -> CompanyIdInventoryGetOutput:
         """Get the company inventory."""
@@ -252,6 +289,46 @@ class ShopRawAPI:
 
         return await make_request(session, caller)
 
+    @staticmethod
+    async def list_shop_items_by_cursor(  # noqa: PLR0913
+        session: aiohttp.ClientSession,
+        *,
+        cursor: str = "",
+        limit: int = 10,
+        sort: Literal["price", "quantity"] = "price",
+        ascending: bool = True,
+        is_disabled: bool | None = None,
+    ) -> ShopPageOutput:
+        """Get a page of items in the shop, continuing from the given cursor, through a direct HTTP request."""
+
+        async def caller(session: aiohttp.ClientSession) -> ShopPageOutput:
+            params = {
+                "cursor": cursor,
+                "limit": limit,
+                "sort_by": sort,
+                "ascending": str(ascending),
+            }
+            if isinstance(is_disabled, bool):
+                params["is_disabled"] = str(is_disabled)
+            async with (
+                session.get(
+                    "/shop",
+                    params=params,
+                ) as resp,
+            ):
+                if resp.ok:
+                    return await resp.json()
+                if resp.status == Status.NOT_FOUND:
+                    message = "No item found"
+                    raise DoesNotExistError(message)
+                message = (
+                    "Undefined behaviour bot.src.wrapper.ShopRawAPI.list_shop_items_by_cursor,"
+                    f" Status received {resp.status}"
+                )
+                raise UnknownNetworkError(message)
+
+        return await make_request(session, caller)
+
     @staticmethod
     async def patch_shop_item(session: aiohttp.ClientSession, item: ShopIdPatchInput) -> None:
         """Edit a item by its id in the shop through a direct HTTP request."""
@@ -295,6 +372,33 @@ class ShopRawAPI:
 
         return await make_request(session, caller)
 
+    @staticmethod
+    async def add_shop_items(session: aiohttp.ClientSession, items: list[ShopPostInput]) -> ShopBulkPostOutput:
+        """Create many items in the shop at once through a direct HTTP request."""
+
+        async def caller(session: aiohttp.ClientSession) -> ShopBulkPostOutput:
+            async with (
+                session.post(
+                    "/shop/bulk",
+                    data="\n".join(json.dumps(item) for item in items),
+                    headers={"Content-Type": "application/x-ndjson"},
+                ) as resp,
+            ):
+                if resp.ok:
+                    return await resp.json()
+                if resp.status == Status.CONFLICT:
+                    message = "Items with the same names have been created at the same time"
+                    raise AlreadyExistError(message)
+                if resp.status == Status.CONTENT_TOO_LARGE:
+                    message = "Too many items to create at once"
+                    raise UserError(message)
+                message = (
+                    f"Undefined behaviour bot.src.wrapper.ShopRawAPI.add_shop_items, Status received {resp.status}"
+                )
+                raise UnknownNetworkError(message)
+
+        return await make_request(session, caller)
+
     @staticmethod
     async def get_shop_item(session: aiohttp.ClientSession, item_id: int) -> RawShopItem:
         """Get a item by its id in the shop through a direct HTTP request."""
@@ -315,6 +419,45 @@ class ShopRawAPI:
 
         return await make_request(session, caller)
 
+    @staticmethod
+    async def get_shop_item_by_name(session: aiohttp.ClientSession, name: str) -> RawShopItem:
+        """Get a item by its name in the shop through a direct HTTP request."""
+
+        async def caller(session: aiohttp.ClientSession) -> RawShopItem:
+            async with (
+                session.get(f"/shop/by-name/{quote(name, safe='')}") as resp,
+            ):
+                if resp.ok:
+                    return await resp.json()
+                if resp.status == Status.NOT_FOUND:
+                    message = f"Item with name: {name} not found"
+                    raise DoesNotExistError(message)
+                message = (
+                    "Undefined behaviour bot.src.wrapper.ShopRawAPI.get_shop_item_by_name,"
+                    f" Status received {resp.status}"
+                )
+                raise UnknownNetworkError(message)
+
+        return await make_request(session, caller)
+
+    @staticmethod
+    async def autocomplete_shop_items(session: aiohttp.ClientSession, prefix: str, limit: int) -> AutocompleteOutput:
+        """Get the items whose name starts with the prefix through a direct HTTP request."""
+
+        async def caller(session: aiohttp.ClientSession) -> AutocompleteOutput:
+            async with (
+                session.get("/autocomplete/shop", params={"prefix": prefix, "limit": limit}) as resp,
+            ):
+                if resp.ok:
+                    return await resp.json()
+                message = (
+                    "Undefined behaviour bot.src.wrapper.ShopRawAPI.autocomplete_shop_items,"
+                    f" Status received {resp.status}"
+                )
+                raise UnknownNetworkError(message)
+
+        return await make_request(session, caller)
+
     @staticmethod
     async def purchase_shop_item(session: aiohttp.ClientSession, item_id: int, src: ShopBuyInput) -> ShopBuyOutput:
         """Get a item by its id and quantity in the shop through a direct HTTP request."""
@@ -17,9 +17,9 @@ from .error import DoesNotExistError, UserError
 from .schema import Achievement, Company, Planet, Resource, ResourceCollector, ShopItem, User
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncGenerator, Iterable
 
-    from ._api_schema import CompanyGetIdOutput, CompanyPatchIdInput, CompanyPostInput
+    from ._api_schema import CompanyGetIdOutput, CompanyPatchIdInput, CompanyPostInput, ShopBulkError
 
 
 class BaseAPI:
@@ -89,16 +89,19 @@ class CompanyAPI(BaseAPI):
             )
         ]
 
-    async def iter_companies(self, *, ascending: bool = False) -> AsyncGenerator[Company, None]:
+    async def iter_companies(self, *, ascending: bool = False, limit: int = 100) -> AsyncGenerator[Company, None]:
         """Iterate through all company until there are no company left."""
-        page = 1
-        while True:
+        cursor: str | None = ""
+        while cursor is not None:
             try:
-                for company in await self.list_companies(page=page, ascending=ascending):
-                    yield company
-                page += 1
+                out = await CompanyRawAPI.list_companies_by_cursor(
+                    self.parent.session, cursor=cursor, limit=limit, ascending=ascending
+                )
             except DoesNotExistError:
                 return
+            for company in out["companies"]:
+                yield Company.from_dict(company)
+            cursor = out["next_cursor"]
 
     async def get_inventory(self, company: Company | int) -> Company:
         """Get the inventory of the company.
@@ -164,16 +167,25 @@ class ShopAPI(BaseAPI):
         sort: Literal["price", "quantity"] = "price",
         ascending: bool = True,
         is_disabled: bool | None = None,
+        limit: int = 100,
     ) -> AsyncGenerator[ShopItem, None]:
         """Iterate through all item until there are no item left."""
-        page = 1
-        while True:
+        cursor: str | None = ""
+        while cursor is not None:
             try:
-                for item in await self.list_items(page=page, sort=sort, ascending=ascending, is_disabled=is_disabled):
-                    yield item
-                page += 1
+                out = await ShopRawAPI.list_shop_items_by_cursor(
+                    self.parent.session,
+                    cursor=cursor,
+                    limit=limit,
+                    sort=sort,
+                    ascending=ascending,
+                    is_disabled=is_disabled,
+                )
             except DoesNotExistError:
                 return
+            for item in out["shop_items"]:
+                yield ShopItem.from_dict(item)
+            cursor = out["next_cursor"]
 
     async def get_shop_item(self, item_id: int) -> ShopItem:
         """Get a specific shop item.
@@ -182,6 +194,18 @@ class ShopAPI(BaseAPI):
         """
         return ShopItem.from_dict(await ShopRawAPI.get_shop_item(self.parent.session, item_id))
 
+    async def get_shop_item_by_name(self, name: str) -> ShopItem:
+        """Get a specific shop item by its name.
+
+        :raise DoesNotExistError: The item cannot be found with the name
+        """
+        return ShopItem.from_dict(await ShopRawAPI.get_shop_item_by_name(self.parent.session, name))
+
+    async def autocomplete_names(self, prefix: str, limit: int = 25) -> list[str]:
+        """Return the names of the items starting with the prefix, regardless of case."""
+        out = await ShopRawAPI.autocomplete_shop_items(self.parent.session, prefix, limit)
+        return [suggestion["name"] for suggestion in out["suggestions"]]
+
     async def create_shop_item(
         self, item: ShopItem | None = None, /, *, name: str, price: float, quantity: int
     ) -> None:
@@ -209,6 +233,21 @@ class ShopAPI(BaseAPI):
             raise UserError(msg) from exc
         await ShopRawAPI.add_shop_item(self.parent.session, item_definition)
 
+    async def create_shop_items(self, items: Iterable[ShopItem]) -> list[ShopBulkError]:
+        """Create many items at once, e.g. for a seasonal catalog drop.
+
+        :param items: `ShopItem`s created from `ShopItem.from_future_definition`
+        :raise UserError: An item is not created with `ShopItem.from_future_definition`, or there are too many items
+        :raise AlreadyExistError: Items with the same names have been created at the same time
+        :return: The items that have not been created, e.g. as they already exist, by position in `items` from 1
+        """
+        try:
+            item_definitions = [item.to_creation() for item in items]
+        except ValueError as exc:
+            msg = "The item is not created properly"
+            raise UserError(msg) from exc
+        return (await ShopRawAPI.add_shop_items(self.parent.session, item_definitions))["errors"]
+
     async def patch_item(self, item: ShopItem) -> None:
         """Edit the item with the ShopItem with edited attribute.
 
@@ -168,7 +168,7 @@ class ShopItem:
         :return: A dictionary of an item definition
         :raise ValueError: The item have already been created
         """
-        if self.id == -1:
+        if self.id != -1:
             msg = "This item have already been created with a given item id"
             raise ValueError(msg)
         return {